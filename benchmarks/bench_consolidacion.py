@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la consolidación completa sobre archivos sintéticos.
+
+Genera archivos con generador_datos.py y mide por separado
+FileProcessor.leer_archivo, FileProcessor.procesar_dataframe,
+Consolidator.procesar_archivos y FileProcessor.guardar_archivo, y luego
+procesar_y_guardar de extremo a extremo. Para cada etapa reporta el mejor
+tiempo de las repeticiones, el throughput (filas/s y MB/s) y el pico de
+memoria de Python/NumPy (tracemalloc, en una ejecución aparte). La memoria
+de Arrow no pasa por tracemalloc; el pico de RSS del proceso se informa al
+final.
+
+Con --json el resultado se agrega a un historial y se compara con la última
+ejecución con los mismos parámetros; --umbral marca como regresión las
+etapas que se hicieron más lentas que ese porcentaje, y con
+--fallar-si-regresion el proceso termina con código 1 (para el job nocturno).
+También termina con código 1 si la eliminación de duplicados en memoria, en
+streaming y drop_duplicates() no coinciden (ver verificar_duplicados).
+
+Uso:
+    python benchmarks/bench_consolidacion.py [--archivos N] [--filas N] [--columnas N]
+        [--formatos csv,xlsx] [--encodings utf-8,latin-1] [--formatos-fecha %d/%m/%Y,%Y-%m-%d]
+        [--duplicados 0.1] [--salidas csv,parquet] [--repeticiones N]
+        [--json historial.json] [--umbral 10] [--fallar-si-regresion]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generador_datos import COLUMNAS_BASE, FORMATOS_FECHA, generar_archivos, separar_lista  # noqa: E402
+from src.metricas import rss_pico_mb  # noqa: E402
+from src.processor import Consolidator  # noqa: E402
+from src.utils import FileProcessor  # noqa: E402
+
+
+def reiniciar_caches():
+    """Vacía las cachés en memoria para que cada repetición empiece en frío."""
+    FileProcessor._cache_encodings.clear()
+
+
+def medir(funcion, repeticiones: int):
+    """
+    Ejecuta una función varias veces.
+
+    Returns:
+        Tupla (mejor tiempo en segundos, mediana en segundos, resultado de la última ejecución)
+    """
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        reiniciar_caches()
+        # El resultado anterior se libera antes de medir la siguiente ejecución
+        resultado = None
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return tiempos[0], tiempos[len(tiempos) // 2], resultado
+
+
+def medir_pico(funcion) -> float:
+    """Pico de memoria de Python/NumPy (MB) de una ejecución, con tracemalloc."""
+    reiniciar_caches()
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    finally:
+        tracemalloc.stop()
+
+
+def ejecutar_etapa(nombre: str, funcion, filas: int, megabytes, repeticiones: int, memoria: bool):
+    """
+    Mide una etapa y retorna (resultado de la etapa para el historial, valor retornado).
+
+    `megabytes` puede ser una función, para los tamaños que solo se conocen
+    después de ejecutar la etapa (el archivo escrito).
+    """
+    mejor, mediana, valor = medir(funcion, repeticiones)
+    if callable(megabytes):
+        megabytes = megabytes()
+    resultado = {
+        'segundos': round(mejor, 4),
+        'mediana_segundos': round(mediana, 4),
+        'filas': filas,
+        'filas_por_segundo': round(filas / mejor) if mejor else None,
+        'mb_por_segundo': round(megabytes / mejor, 2) if mejor else None,
+    }
+    if memoria:
+        resultado['pico_tracemalloc_mb'] = round(medir_pico(funcion), 1)
+    pico = f"{resultado['pico_tracemalloc_mb']:8.1f} MB" if memoria else ''
+    print(f"{nombre:<28} {mejor:8.3f} s  {resultado['filas_por_segundo'] or 0:>12,} filas/s  "
+          f"{resultado['mb_por_segundo'] or 0:8.2f} MB/s  {pico}")
+    return resultado, valor
+
+
+def comparar(resultados, anterior, umbral: float):
+    """
+    Compara los tiempos con una ejecución anterior del historial.
+
+    Returns:
+        Lista de etapas que se hicieron más lentas que el umbral (en %)
+    """
+    print(f"\nComparación con {anterior['fecha']} (pandas {anterior.get('pandas')}):")
+    regresiones = []
+    for nombre, actual in resultados.items():
+        previo = anterior['resultados'].get(nombre)
+        if not previo or not previo.get('segundos'):
+            continue
+        cambio = (actual['segundos'] / previo['segundos'] - 1) * 100
+        marca = ''
+        if cambio > umbral:
+            marca = '  REGRESIÓN'
+            regresiones.append(nombre)
+        print(f"  {nombre:<26} {previo['segundos']:8.3f} s -> {actual['segundos']:8.3f} s  {cambio:+6.1f}%{marca}")
+    return regresiones
+
+
+def verificar_duplicados(directorio: str, rutas) -> bool:
+    """
+    Comprueba que la eliminación de duplicados en memoria, en streaming y
+    drop_duplicates() coincidan, con los archivos generados más dos archivos
+    cuya clave mezcla números y texto (1 y '1' no son la misma fila).
+
+    Returns:
+        True si los tres conteos coinciden
+    """
+    mixtos = []
+    for nombre, contenido in (('mixto_numeros.csv', 'COD,VALOR\n1,10\n2,20\n1,10\n'),
+                              ('mixto_texto.csv', 'COD,VALOR\n1,10\nX,30\n2.0,20\n')):
+        ruta = os.path.join(directorio, nombre)
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        mixtos.append(ruta)
+
+    correcto = True
+    for nombre, archivos in (('generados', rutas), ('clave mixta', mixtos)):
+        consolidador = Consolidator()
+        consolidador.configurar()
+        base = consolidador.procesar_archivos(archivos)['dataframe']
+        esperados = int(base.duplicated().sum())
+        del base
+        conteos = {}
+        for streaming in (False, True):
+            consolidador = Consolidator()
+            consolidador.configurar(eliminar_duplicados=True, modo_streaming=streaming)
+            resultado = consolidador.procesar_y_guardar(
+                archivos, ruta_salida=os.path.join(directorio, f'duplicados_{streaming}.csv'))
+            conteos['streaming' if streaming else 'memoria'] = resultado['duplicados_eliminados']
+        coinciden = all(conteo == esperados for conteo in conteos.values())
+        correcto &= coinciden
+        print(f"Duplicados ({nombre}): drop_duplicates {esperados}, memoria {conteos['memoria']}, "
+              f"streaming {conteos['streaming']}{'' if coinciden else '  DIFERENCIA'}")
+    return correcto
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--archivos', type=int, default=6)
+    parser.add_argument('--filas', type=int, default=20_000, help='Filas por archivo')
+    parser.add_argument('--columnas', type=int, default=len(COLUMNAS_BASE) + 6, help='Columnas por archivo')
+    parser.add_argument('--formatos', type=separar_lista, default=['csv', 'xlsx'], help='Formatos de entrada (csv,xlsx,xls)')
+    parser.add_argument('--encodings', type=separar_lista, default=['utf-8', 'latin-1'], help='Encodings de los CSV')
+    parser.add_argument('--formatos-fecha', type=separar_lista, default=['%d/%m/%Y', '%Y-%m-%d', 'nativo'],
+                        help=f"Formatos de FECHA_ASIG/FECHA_LEG ({', '.join(f.replace('%', '%%') for f in FORMATOS_FECHA)})")
+    parser.add_argument('--duplicados', type=float, default=0.05, help='Proporción de filas duplicadas')
+    parser.add_argument('--eliminar-duplicados', action='store_true', help='Eliminar duplicados en procesar_archivos')
+    parser.add_argument('--salidas', type=separar_lista, default=['csv'], help='Formatos de guardar_archivo (csv,xlsx,parquet,feather)')
+    parser.add_argument('--repeticiones', type=int, default=3, help='Ejecuciones por etapa (se reporta la mejor)')
+    parser.add_argument('--sin-memoria', action='store_true', help='No medir el pico de memoria (más rápido)')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--json', default=None, help='Archivo JSON de historial al que agregar el resultado')
+    parser.add_argument('--umbral', type=float, default=10.0,
+                        help='Porcentaje de aumento de tiempo que cuenta como regresión')
+    parser.add_argument('--fallar-si-regresion', action='store_true',
+                        help='Terminar con código 1 si alguna etapa supera el umbral')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    memoria = not args.sin_memoria
+    parametros = {
+        'archivos': args.archivos, 'filas': args.filas, 'columnas': args.columnas,
+        'formatos': args.formatos, 'encodings': args.encodings, 'formatos_fecha': args.formatos_fecha,
+        'duplicados': args.duplicados, 'eliminar_duplicados': args.eliminar_duplicados,
+        'salidas': args.salidas, 'semilla': args.semilla,
+    }
+
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = generar_archivos(os.path.join(directorio, 'entrada'), args.archivos, args.filas, args.columnas,
+                                 args.formatos, args.encodings, args.formatos_fecha, args.duplicados, args.semilla)
+        filas = args.archivos * args.filas
+        megabytes = sum(os.path.getsize(ruta) for ruta in rutas) / 1e6
+        print(f"pandas {pd.__version__} | {args.archivos} archivos ({', '.join(args.formatos)}) x "
+              f"{args.filas} filas x {args.columnas} columnas ({megabytes:.1f} MB)\n")
+
+        resultados = {}
+        resultados['leer_archivo'], leidos = ejecutar_etapa(
+            'leer_archivo', lambda: [FileProcessor.leer_archivo(ruta) for ruta in rutas],
+            filas, megabytes, args.repeticiones, memoria)
+
+        resultados['procesar_dataframe'], _ = ejecutar_etapa(
+            'procesar_dataframe',
+            lambda: [FileProcessor.procesar_dataframe(df, os.path.basename(ruta), [])
+                     for ruta, df in zip(rutas, leidos)],
+            filas, megabytes, args.repeticiones, memoria)
+        del leidos
+
+        def procesar_archivos():
+            consolidador = Consolidator()
+            consolidador.configurar(eliminar_duplicados=args.eliminar_duplicados)
+            return consolidador.procesar_archivos(rutas)
+
+        resultados['procesar_archivos'], resultado = ejecutar_etapa(
+            'procesar_archivos', procesar_archivos, filas, megabytes, args.repeticiones, memoria)
+        if not resultado['exito']:
+            raise SystemExit(f"procesar_archivos falló: {resultado.get('error')}")
+        resultados['procesar_archivos']['etapas'] = {
+            etapa: round(datos['segundos'], 4) for etapa, datos in resultado['metricas']['por_etapa'].items()
+        }
+        consolidado = resultado['dataframe']
+        del resultado
+
+        for formato in args.salidas:
+            ruta_salida = os.path.join(directorio, f'salida.{formato}')
+            nombre = f'guardar_archivo[{formato}]'
+            resultados[nombre], _ = ejecutar_etapa(
+                nombre, lambda: FileProcessor.guardar_archivo(consolidado, ruta_salida, formato),
+                len(consolidado), lambda: os.path.getsize(ruta_salida) / 1e6, args.repeticiones, memoria)
+        del consolidado
+
+        def extremo_a_extremo():
+            consolidador = Consolidator()
+            consolidador.configurar(eliminar_duplicados=args.eliminar_duplicados)
+            return consolidador.procesar_y_guardar(
+                rutas, formato=args.salidas[0], ruta_salida=os.path.join(directorio, f'e2e.{args.salidas[0]}'))
+
+        resultados['extremo_a_extremo'], _ = ejecutar_etapa(
+            'extremo_a_extremo', extremo_a_extremo, filas, megabytes, args.repeticiones, memoria)
+
+        print()
+        duplicados_correctos = verificar_duplicados(directorio, rutas)
+
+    print('\nEtapas de procesar_archivos: ' + ', '.join(
+        f'{etapa} {segundos:.3f}s' for etapa, segundos in resultados['procesar_archivos']['etapas'].items()))
+    pico_rss = rss_pico_mb()
+    if pico_rss is not None:
+        print(f'Pico de RSS del proceso: {pico_rss:.0f} MB')
+
+    regresiones = []
+    if args.json:
+        historial = []
+        if os.path.exists(args.json):
+            with open(args.json, encoding='utf-8') as archivo:
+                historial = json.load(archivo)
+        anteriores = [entrada for entrada in historial if entrada.get('parametros') == parametros]
+        if anteriores:
+            regresiones = comparar(resultados, anteriores[-1], args.umbral)
+        historial.append({
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'plataforma': platform.platform(),
+            'parametros': parametros,
+            'rss_pico_mb': round(pico_rss, 1) if pico_rss is not None else None,
+            'resultados': resultados,
+        })
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(historial, archivo, ensure_ascii=False, indent=2)
+
+    if not duplicados_correctos:
+        print('\nLa eliminación de duplicados no coincide con drop_duplicates()')
+        sys.exit(1)
+    if regresiones and args.fallar_si_regresion:
+        print(f"\nRegresiones (> {args.umbral}%): {', '.join(regresiones)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
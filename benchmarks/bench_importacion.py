@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark de tiempo de arranque (python -X importtime).
+
+Ejecuta cada escenario en un intérprete nuevo, suma los tiempos propios de
+todos los módulos importados y reporta qué dependencias pesadas se cargaron.
+Con --json se agrega el resultado a un historial para comparar versiones.
+
+Uso:
+    python benchmarks/bench_importacion.py [--repeticiones N] [--json historial.json]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Escenario -> argumentos del intérprete
+ESCENARIOS = {
+    'import src': ['-c', 'import src'],
+    'import src.cli': ['-c', 'import src.cli'],
+    'import src.utils': ['-c', 'import src.utils'],
+    'from src import Consolidator': ['-c', 'from src import Consolidator'],
+    'main.py consolidate --help': ['main.py', 'consolidate', '--help'],
+}
+
+MODULOS_PESADOS = ('pandas', 'numpy', 'openpyxl', 'xlrd', 'tkinter', 'pyarrow')
+
+# importtime también lista los intentos fallidos: solo cuentan los instalados
+_INSTALADOS = {modulo for modulo in MODULOS_PESADOS if importlib.util.find_spec(modulo) is not None}
+
+_LINEA = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def medir_escenario(argumentos):
+    """
+    Ejecuta un escenario con -X importtime.
+
+    Returns:
+        Tupla (microsegundos totales de importación, módulos pesados importados)
+    """
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', *argumentos],
+        cwd=RAIZ, capture_output=True, text=True
+    )
+    total = 0
+    pesados = set()
+    for linea in proceso.stderr.splitlines():
+        coincidencia = _LINEA.match(linea)
+        if not coincidencia:
+            continue
+        total += int(coincidencia.group(1))
+        modulo = coincidencia.group(4).split('.')[0]
+        if modulo in _INSTALADOS:
+            pesados.add(modulo)
+    return total, sorted(pesados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=3,
+                        help='Ejecuciones por escenario (se reporta la mediana)')
+    parser.add_argument('--json', default=None, help='Archivo JSON de historial al que agregar el resultado')
+    args = parser.parse_args()
+
+    resultados = {}
+    for nombre, argumentos in ESCENARIOS.items():
+        mediciones = [medir_escenario(argumentos) for _ in range(args.repeticiones)]
+        tiempos = sorted(total for total, _ in mediciones)
+        mediana = tiempos[len(tiempos) // 2]
+        pesados = mediciones[0][1]
+        resultados[nombre] = {'importacion_ms': round(mediana / 1000, 1), 'modulos_pesados': pesados}
+        print(f"{nombre:32s} {mediana / 1000:8.1f} ms   {', '.join(pesados) or '-'}")
+
+    if args.json:
+        historial = []
+        if os.path.exists(args.json):
+            with open(args.json, encoding='utf-8') as archivo:
+                historial = json.load(archivo)
+        historial.append({
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'resultados': resultados,
+        })
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(historial, archivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
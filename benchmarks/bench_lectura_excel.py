@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los motores de lectura de Excel de FileProcessor.
+
+Genera libros .xlsx con columnas de texto, números y fechas (una o varias
+hojas) y compara el tiempo de FileProcessor.leer_hojas_excel con cada motor
+instalado de MOTORES_EXCEL que lea .xlsx (openpyxl, la lectura original, y
+calamine si python-calamine está instalado). También verifica que todos los
+motores produzcan los mismos DataFrames que openpyxl.
+
+Uso:
+    python benchmarks/bench_lectura_excel.py [--filas N] [--hojas N] [--repeticiones N]
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import FileProcessor, MOTORES_EXCEL  # noqa: E402
+
+
+def generar_libro(ruta: str, filas: int, hojas: int):
+    """Genera un .xlsx con `hojas` hojas de `filas` filas cada una."""
+    rng = np.random.default_rng(0)
+    with pd.ExcelWriter(ruta, engine="openpyxl") as escritor:
+        for numero in range(hojas):
+            fechas = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, filas), unit="D")
+            df = pd.DataFrame({
+                "ID": np.arange(filas),
+                "Nombre": [f"Cliente {i}" for i in rng.integers(0, 5000, filas)],
+                "FECHA_ASIG": fechas.strftime("%d/%m/%Y"),
+                "FECHA_LEG": fechas,
+                "Valor": rng.random(filas) * 1000,
+                "Codigo": rng.choice(["A1", "B2", "C3", None], filas),
+            })
+            df.to_excel(escritor, sheet_name=f"Hoja{numero + 1}", index=False)
+
+
+def medir(funcion, ruta: str, repeticiones: int):
+    """Retorna (mejor tiempo en segundos, resultado de la última ejecución)."""
+    mejor = float("inf")
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(ruta)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=50_000, help="Filas por hoja")
+    parser.add_argument("--hojas", type=int, default=2)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    # openpyxl primero: es la referencia para comparar resultados
+    modulos = {"openpyxl": "openpyxl", "calamine": "python_calamine"}
+    motores = [motor for motor in ("openpyxl", "calamine") if motor in MOTORES_EXCEL
+               and importlib.util.find_spec(modulos[motor]) is not None]
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "benchmark.xlsx")
+        generar_libro(ruta, args.filas, args.hojas)
+        tamano = os.path.getsize(ruta)
+
+        print(f"pandas {pd.__version__} | {args.hojas} hojas x {args.filas} filas ({tamano / 1e6:.1f} MB)")
+
+        referencia = None
+        base = None
+        for nombre in motores:
+            segundos, resultado = medir(
+                lambda r: FileProcessor.leer_hojas_excel(r, motor=nombre), ruta, args.repeticiones)
+            if referencia is None:
+                referencia, base = resultado, segundos
+                iguales = "referencia"
+            else:
+                iguales = "iguales" if (list(resultado) == list(referencia) and all(
+                    resultado[hoja].equals(referencia[hoja]) for hoja in referencia)) else "DIFERENTES"
+            filas_por_segundo = args.filas * args.hojas / segundos
+            print(f"{nombre:<9}: {segundos:8.3f} s  {filas_por_segundo:10,.0f} filas/s  "
+                  f"x{base / segundos:5.1f}  {iguales}")
+
+        if "calamine" not in motores:
+            print("calamine  : no instalado (pip install python-calamine)")
+
+
+if __name__ == "__main__":
+    main()
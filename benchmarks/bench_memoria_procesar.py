@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria de FileProcessor.procesar_dataframe.
+
+Genera un DataFrame ancho (por defecto 400 columnas, de las que se conservan
+12) y mide con tracemalloc el pico de memoria adicional que reserva la etapa
+de transformación, comparándolo con la implementación anterior (copia
+completa + un drop por columna).
+
+Uso:
+    python benchmarks/bench_memoria_procesar.py [--filas N] [--columnas N] [--conservar N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import FileProcessor  # noqa: E402
+
+
+def generar_dataframe(filas: int, columnas: int) -> pd.DataFrame:
+    """Genera un DataFrame ancho con columnas numéricas y las dos fechas."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((filas, columnas - 2)),
+                      columns=[f"COL_{i:03d}" for i in range(columnas - 2)])
+    fechas = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, filas), unit="D")
+    df["FECHA_ASIG"] = fechas.strftime("%d/%m/%Y")
+    df["FECHA_LEG"] = fechas.strftime("%d/%m/%Y")
+    return df
+
+
+def procesar_anterior(df: pd.DataFrame, columnas_a_ignorar):
+    """Réplica de la etapa anterior: copia completa y un drop por columna."""
+    df_procesado = df.copy()
+    for columna in columnas_a_ignorar:
+        if columna in df_procesado.columns:
+            df_procesado = df_procesado.drop(columns=[columna])
+    return df_procesado
+
+
+def medir(funcion, *args, **kwargs):
+    """Ejecuta una función y retorna (pico de memoria en bytes, segundos)."""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+    return pico, segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=20_000)
+    parser.add_argument("--columnas", type=int, default=400)
+    parser.add_argument("--conservar", type=int, default=12)
+    parser.add_argument("--limite", type=float, default=1.2,
+                        help="Pico máximo aceptado, en múltiplos del tamaño de entrada")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    df = generar_dataframe(args.filas, args.columnas)
+    entrada = df.memory_usage(deep=True).sum()
+    ignorar = [c for c in df.columns if c.startswith("COL_")][args.conservar:]
+
+    pico_anterior, seg_anterior = medir(procesar_anterior, df, ignorar)
+    pico_actual, seg_actual = medir(FileProcessor.procesar_dataframe, df, "benchmark", ignorar)
+
+    print(f"pandas {pd.__version__} | {args.filas} filas x {args.columnas} columnas "
+          f"({entrada / 1e6:.1f} MB), se eliminan {len(ignorar)}")
+    print(f"anterior : pico {pico_anterior / entrada:6.2f}x entrada  {seg_anterior:8.3f} s")
+    print(f"actual   : pico {pico_actual / entrada:6.2f}x entrada  {seg_actual:8.3f} s")
+
+    if pico_actual > args.limite * entrada:
+        print(f"ERROR: el pico supera {args.limite}x el tamaño de entrada")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
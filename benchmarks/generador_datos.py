@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Generador de archivos sintéticos para los benchmarks del consolidador.
+
+Produce N archivos CSV/Excel con el mismo esquema que los archivos reales
+(FECHA_ASIG y FECHA_LEG más columnas de texto y números), rotando entre los
+formatos de archivo, encodings y formatos de fecha indicados, con una
+proporción configurable de filas duplicadas. Todo es determinista dada la
+semilla, para que dos ejecuciones del benchmark midan los mismos datos.
+
+Uso:
+    python benchmarks/generador_datos.py DIRECTORIO [--archivos N] [--filas N] [--columnas N]
+        [--formatos csv,xlsx,xls] [--encodings utf-8,latin-1] [--formatos-fecha %d/%m/%Y,%Y-%m-%d]
+        [--duplicados 0.1] [--semilla N]
+
+El formato .xls requiere xlwt (pandas ya no escribe .xls).
+"""
+
+import argparse
+import importlib.util
+import os
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+
+FORMATOS_ARCHIVO = ('csv', 'xlsx', 'xls')
+
+# 'nativo' escribe las fechas como fechas de Excel (en CSV, como ISO 8601)
+FORMATOS_FECHA = ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%Y%m%d', '%d/%m/%Y %H:%M:%S', 'nativo')
+
+# Valores con acentos y eñes, para que el encoding importe
+CIUDADES = ['Bogotá', 'Medellín', 'Cúcuta', 'Ibagué', 'Popayán', 'Montería', 'Neiva', 'Peñol']
+PRODUCTOS = ['Crédito', 'Ahorro', 'Tarjeta', 'Inversión', 'Seguro', 'Leasing']
+
+# Columnas fijas; el resto hasta `columnas` se completa con números y texto
+COLUMNAS_BASE = ('ID', 'CLIENTE', 'CIUDAD', 'PRODUCTO', 'FECHA_ASIG', 'FECHA_LEG', 'MONTO')
+
+# Límite de filas de una hoja .xls
+MAX_FILAS_XLS = 65_535
+
+
+def generar_dataframe(filas: int,
+                      columnas: int = len(COLUMNAS_BASE),
+                      proporcion_duplicados: float = 0.0,
+                      semilla: int = 0) -> pd.DataFrame:
+    """
+    Genera un DataFrame con el esquema de los archivos de entrada.
+
+    Args:
+        filas: Número de filas
+        columnas: Número total de columnas (mínimo len(COLUMNAS_BASE))
+        proporcion_duplicados: Fracción de filas que repiten exactamente
+            otra fila del mismo DataFrame (0 a 1)
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        DataFrame con las fechas como datetime (se formatean al escribir)
+    """
+    if not 0 <= proporcion_duplicados < 1:
+        raise ValueError('La proporción de duplicados debe estar en [0, 1)')
+    rng = np.random.default_rng(semilla)
+
+    asignacion = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 730, filas), unit='D')
+    legalizacion = asignacion + pd.to_timedelta(rng.integers(0, 90, filas), unit='D')
+    datos = {
+        'ID': np.arange(filas) + semilla * 10_000_000,
+        'CLIENTE': [f'Cliente Núñez {i}' for i in rng.integers(0, max(filas // 4, 1), filas)],
+        'CIUDAD': rng.choice(CIUDADES, filas),
+        'PRODUCTO': rng.choice(PRODUCTOS, filas),
+        'FECHA_ASIG': asignacion,
+        'FECHA_LEG': legalizacion,
+        'MONTO': np.round(rng.random(filas) * 1_000_000, 2),
+    }
+    for numero in range(max(columnas - len(COLUMNAS_BASE), 0)):
+        if numero % 2 == 0:
+            datos[f'VALOR_{numero:03d}'] = np.round(rng.random(filas) * 1000, 3)
+        else:
+            datos[f'TEXTO_{numero:03d}'] = rng.choice(['Sí', 'No', 'Pendiente', 'Revisión'], filas)
+    df = pd.DataFrame(datos)
+
+    duplicadas = int(filas * proporcion_duplicados)
+    if duplicadas:
+        # Las últimas filas pasan a ser copias de filas anteriores
+        posiciones = np.arange(filas)
+        posiciones[filas - duplicadas:] = rng.integers(0, filas - duplicadas, duplicadas)
+        df = df.iloc[posiciones].reset_index(drop=True)
+    return df
+
+
+def _formatear_fechas(df: pd.DataFrame, formato_fecha: str) -> pd.DataFrame:
+    """Pasa FECHA_ASIG y FECHA_LEG a texto con el formato indicado."""
+    if formato_fecha == 'nativo':
+        return df
+    df = df.copy()
+    for columna in ('FECHA_ASIG', 'FECHA_LEG'):
+        df[columna] = df[columna].dt.strftime(formato_fecha)
+    return df
+
+
+def _escribir_xls(df: pd.DataFrame, ruta: str):
+    """Escribe un .xls con xlwt (una hoja, fechas como texto ISO si son nativas)."""
+    import xlwt
+
+    libro = xlwt.Workbook(encoding='utf-8')
+    hoja = libro.add_sheet('Hoja1')
+    for columna, nombre in enumerate(df.columns):
+        hoja.write(0, columna, nombre)
+    for fila, valores in enumerate(df.itertuples(index=False), start=1):
+        for columna, valor in enumerate(valores):
+            if isinstance(valor, pd.Timestamp):
+                valor = valor.strftime('%Y-%m-%d')
+            elif isinstance(valor, np.generic):
+                valor = valor.item()
+            hoja.write(fila, columna, valor)
+    libro.save(ruta)
+
+
+def escribir_archivo(df: pd.DataFrame, ruta: str, formato_fecha: str = '%d/%m/%Y', encoding: str = 'utf-8'):
+    """
+    Escribe un DataFrame generado según la extensión de `ruta`.
+
+    Args:
+        df: DataFrame de generar_dataframe
+        ruta: Ruta de salida (.csv, .xlsx o .xls)
+        formato_fecha: Formato strftime de las fechas, o 'nativo'
+        encoding: Encoding de los CSV (se ignora en Excel)
+    """
+    df = _formatear_fechas(df, formato_fecha)
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.csv':
+        df.to_csv(ruta, index=False, encoding=encoding)
+    elif extension == '.xlsx':
+        df.to_excel(ruta, index=False, engine='openpyxl')
+    elif extension == '.xls':
+        if len(df) > MAX_FILAS_XLS:
+            raise ValueError(f'Un .xls admite como máximo {MAX_FILAS_XLS} filas de datos')
+        _escribir_xls(df, ruta)
+    else:
+        raise ValueError(f'Extensión no soportada: {extension}')
+
+
+def generar_archivos(directorio: str,
+                     archivos: int = 4,
+                     filas: int = 10_000,
+                     columnas: int = len(COLUMNAS_BASE),
+                     formatos: Sequence[str] = ('csv',),
+                     encodings: Sequence[str] = ('utf-8',),
+                     formatos_fecha: Sequence[str] = ('%d/%m/%Y',),
+                     proporcion_duplicados: float = 0.0,
+                     semilla: int = 0) -> List[str]:
+    """
+    Genera un conjunto de archivos de entrada.
+
+    Los formatos de archivo se alternan de a uno, los encodings entre los
+    CSV y los formatos de fecha cada vuelta completa de formatos, así que
+    todas las combinaciones quedan representadas al generar suficientes
+    archivos.
+
+    Args:
+        directorio: Carpeta de salida (se crea si no existe)
+        archivos: Número de archivos
+        filas: Filas por archivo
+        columnas: Columnas por archivo
+        formatos: Formatos de archivo de FORMATOS_ARCHIVO
+        encodings: Encodings de los CSV
+        formatos_fecha: Formatos de FECHA_ASIG/FECHA_LEG (ver FORMATOS_FECHA)
+        proporcion_duplicados: Fracción de filas duplicadas en cada archivo
+        semilla: Semilla base; el archivo i usa semilla + i
+
+    Returns:
+        Rutas de los archivos generados, en orden
+    """
+    invalidos = [formato for formato in formatos if formato not in FORMATOS_ARCHIVO]
+    if invalidos:
+        raise ValueError(f'Formatos no soportados: {invalidos}. Use {list(FORMATOS_ARCHIVO)}')
+    if 'xls' in formatos and importlib.util.find_spec('xlwt') is None:
+        raise ValueError('El formato xls requiere xlwt (pip install xlwt)')
+
+    os.makedirs(directorio, exist_ok=True)
+    rutas = []
+    csv_generados = 0
+    for numero in range(archivos):
+        formato = formatos[numero % len(formatos)]
+        formato_fecha = formatos_fecha[(numero // len(formatos)) % len(formatos_fecha)]
+        encoding = encodings[csv_generados % len(encodings)]
+        csv_generados += formato == 'csv'
+        df = generar_dataframe(filas, columnas, proporcion_duplicados, semilla + numero)
+        sufijo = encoding.replace('-', '') if formato == 'csv' else 'excel'
+        ruta = os.path.join(directorio, f'datos_{numero:03d}_{sufijo}.{formato}')
+        escribir_archivo(df, ruta, formato_fecha, encoding)
+        rutas.append(ruta)
+    return rutas
+
+
+def separar_lista(texto: str) -> List[str]:
+    """Convierte 'a,b' en ['a', 'b'] (las comas dentro de un formato de fecha no se admiten)."""
+    return [valor.strip() for valor in texto.split(',') if valor.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directorio', help='Carpeta donde escribir los archivos')
+    parser.add_argument('--archivos', type=int, default=4)
+    parser.add_argument('--filas', type=int, default=10_000, help='Filas por archivo')
+    parser.add_argument('--columnas', type=int, default=len(COLUMNAS_BASE), help='Columnas por archivo')
+    parser.add_argument('--formatos', type=separar_lista, default=['csv'], help='Formatos, p. ej. csv,xlsx,xls')
+    parser.add_argument('--encodings', type=separar_lista, default=['utf-8'], help='Encodings de los CSV, p. ej. utf-8,latin-1')
+    parser.add_argument('--formatos-fecha', type=separar_lista, default=['%d/%m/%Y'],
+                        help=f"Formatos de fecha ({', '.join(f.replace('%', '%%') for f in FORMATOS_FECHA)})")
+    parser.add_argument('--duplicados', type=float, default=0.0, help='Proporción de filas duplicadas (0 a 1)')
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    rutas = generar_archivos(args.directorio, args.archivos, args.filas, args.columnas, args.formatos,
+                             args.encodings, args.formatos_fecha, args.duplicados, args.semilla)
+    for ruta in rutas:
+        print(f'{ruta}  ({os.path.getsize(ruta) / 1e6:.1f} MB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,7 @@ Programa principal para consolidar múltiples archivos CSV y Excel
 en un solo archivo con opciones avanzadas de configuración.
 
 Características:
-- Soporte para archivos CSV y Excel (.xlsx, .xls)
+- Soporte para archivos CSV (también comprimidos), Excel (.xlsx, .xls), Parquet y Feather
 - Múltiples columnas a ignorar
 - Exportación a CSV y Excel
 - Interfaz gráfica moderna
@@ -15,6 +15,10 @@ Características:
 - Logging detallado
 - Archivos de salida en carpeta separada
 
+Uso sin interfaz gráfica (cron, servidores):
+    python main.py consolidate "entrada/*.csv" --salida consolidado.csv
+    python main.py consolidate --help
+
 Autor: Sebastian Abdala Asencio
 Versión: 2.0.0
 """
@@ -22,6 +26,7 @@ Versión: 2.0.0
 import sys
 import os
 import logging
+import importlib.util
 from pathlib import Path
 
 # Agregar el directorio src al path para importaciones
@@ -29,14 +34,6 @@ current_dir = Path(__file__).parent
 src_dir = current_dir / 'src'
 sys.path.insert(0, str(src_dir))
 
-try:
-    from src.ui import ConsolidadorUI
-except ImportError as e:
-    print(f"Error al importar módulos: {e}")
-    print("Asegúrate de que todas las dependencias estén instaladas.")
-    print("Ejecuta: pip install pandas openpyxl")
-    sys.exit(1)
-
 
 def configurar_logging():
     """Configura el sistema de logging."""
@@ -63,10 +60,9 @@ def verificar_dependencias():
     dependencias = ['pandas', 'openpyxl']
     faltantes = []
     
+    # find_spec solo localiza el paquete, sin importarlo
     for dep in dependencias:
-        try:
-            __import__(dep)
-        except ImportError:
+        if importlib.util.find_spec(dep) is None:
             faltantes.append(dep)
     
     if faltantes:
@@ -109,6 +105,14 @@ def main():
     # Configurar logging
     configurar_logging()
     
+    try:
+        from src.ui import ConsolidadorUI
+    except ImportError as e:
+        print(f"Error al importar módulos: {e}")
+        print("Asegúrate de que todas las dependencias estén instaladas.")
+        print("Ejecuta: pip install pandas openpyxl")
+        sys.exit(1)
+    
     try:
         print("✅ Dependencias verificadas")
         print("✅ Estructura de directorios creada")
@@ -130,4 +134,8 @@ def main():
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Modo línea de comandos: no se importa la interfaz gráfica
+        from src.cli import main as main_cli
+        sys.exit(main_cli(sys.argv[1:]))
     main()
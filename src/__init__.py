@@ -8,11 +8,10 @@ Módulos:
 - utils: Utilidades para procesamiento de archivos y análisis de datos
 - processor: Lógica principal de consolidación
 - ui: Interfaz gráfica de usuario
+- cli: Línea de comandos (sin interfaz gráfica)
 """
 
-from .utils import FileProcessor, FileManager, DataAnalyzer
-from .processor import Consolidator
-from .ui import ConsolidadorUI
+import importlib
 
 __version__ = "2.0.0"
 __author__ = "Consolidador Pro Team"
@@ -24,3 +23,26 @@ __all__ = [
     'Consolidator',
     'ConsolidadorUI'
 ]
+
+# Módulo que define cada nombre exportado. Se importan bajo demanda (PEP 562):
+# `import src` o `import src.cli` no cargan pandas ni tkinter hasta que se usan.
+_EXPORTACIONES = {
+    'FileProcessor': '.utils',
+    'FileManager': '.utils',
+    'DataAnalyzer': '.utils',
+    'Consolidator': '.processor',
+    'ConsolidadorUI': '.ui',
+}
+
+
+def __getattr__(nombre):
+    modulo = _EXPORTACIONES.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(modulo, __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
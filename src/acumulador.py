@@ -0,0 +1,269 @@
+"""
+Módulo de acumulación columnar para el consolidador de archivos.
+Copia cada DataFrame procesado en columnas preasignadas a medida que llega,
+en lugar de guardarlos todos y concatenarlos al final.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .esquema import PlanEsquema
+
+logger = logging.getLogger(__name__)
+
+# Cómo se unen los DataFrames procesados en procesar_archivos
+MODOS_CONSOLIDACION = ('concat', 'preasignado')
+
+
+class _Columna:
+    """
+    Datos de una columna del acumulador.
+
+    Los tipos de NumPy y los códigos de las categorías se guardan en un arreglo
+    preasignado. Los tipos de extensión (texto Arrow, Int64, fechas con zona
+    horaria...) se guardan como trozos que se unen una sola vez al final.
+    """
+
+    def __init__(self, tipo: Any, capacidad: int):
+        self.tipo = tipo
+        self.datos = None
+        self.categorias = None
+        self.trozos: List[Tuple[int, Any]] = []
+        self.tramos: List[Tuple[int, int]] = []
+        if isinstance(tipo, pd.CategoricalDtype):
+            self.categorias = tipo.categories
+            self.datos = np.full(capacidad, -1, dtype=np.int32)
+        elif isinstance(tipo, np.dtype):
+            self.datos = np.empty(capacidad, dtype=tipo)
+
+    @property
+    def categorica(self) -> bool:
+        """Si la columna guarda códigos de categorías."""
+        return self.categorias is not None
+
+    def escribir(self, inicio: int, serie: pd.Series):
+        """Copia una serie a partir de la fila `inicio`."""
+        fin = inicio + len(serie)
+        if self.categorica:
+            self.datos[inicio:fin] = self._codigos(serie)
+        elif self.datos is not None:
+            valores = serie if serie.dtype == self.tipo else serie.astype(self.tipo)
+            self.datos[inicio:fin] = valores.to_numpy()
+        else:
+            valores = serie if serie.dtype == self.tipo else serie.astype(self.tipo)
+            self.trozos.append((inicio, valores.array))
+        self.tramos.append((inicio, fin))
+
+    def _codigos(self, serie: pd.Series) -> np.ndarray:
+        """Códigos de la serie en las categorías de la columna, agregando las nuevas."""
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos, categorias = serie.cat.codes.to_numpy(), serie.cat.categories
+        else:
+            codigos, categorias = pd.factorize(serie)
+            categorias = pd.Index(categorias)
+        posiciones = self.categorias.get_indexer(categorias)
+        if (posiciones == -1).any():
+            self.categorias = self.categorias.append(categorias[posiciones == -1])
+            posiciones = self.categorias.get_indexer(categorias)
+        return np.where(codigos >= 0, posiciones[codigos], -1) if len(posiciones) else np.full(len(codigos), -1)
+
+    def crecer(self, capacidad: int, filas: int):
+        """Pasa el arreglo preasignado a `capacidad` filas, conservando las `filas` escritas."""
+        if self.datos is None:
+            return
+        if self.categorica:
+            datos = np.full(capacidad, -1, dtype=self.datos.dtype)
+        else:
+            datos = np.empty(capacidad, dtype=self.datos.dtype)
+        datos[:filas] = self.datos[:filas]
+        self.datos = datos
+
+    def huecos(self, filas: int) -> List[Tuple[int, int]]:
+        """Rangos de filas sin valores (archivos que no tenían la columna)."""
+        huecos, posicion = [], 0
+        for inicio, fin in self.tramos:
+            if inicio > posicion:
+                huecos.append((posicion, inicio))
+            posicion = fin
+        if posicion < filas:
+            huecos.append((posicion, filas))
+        return huecos
+
+    def materializar(self, filas: int):
+        """
+        Arreglo de `filas` valores, con nulos en los huecos.
+
+        Como en PlanEsquema, una columna de enteros o booleanos con huecos
+        pasa a Int*/boolean en lugar de float64/object.
+        """
+        huecos = self.huecos(filas)
+        if self.categorica:
+            return pd.Categorical.from_codes(self._recortar(filas), dtype=pd.CategoricalDtype(self.categorias))
+
+        if self.datos is not None:
+            datos = self._recortar(filas)
+            if not huecos:
+                return datos
+            mascara = np.zeros(filas, dtype=bool)
+            for inicio, fin in huecos:
+                mascara[inicio:fin] = True
+            if datos.dtype.kind in 'iu':
+                datos[mascara] = 0
+                return pd.arrays.IntegerArray(datos, mascara)
+            if datos.dtype.kind == 'b':
+                datos[mascara] = False
+                return pd.arrays.BooleanArray(datos, mascara)
+            datos[mascara] = np.array('NaT', dtype=datos.dtype) if datos.dtype.kind in 'mM' else np.nan
+            return datos
+
+        partes, posicion = [], 0
+        for inicio, trozo in self.trozos:
+            if inicio > posicion:
+                partes.append(pd.Series(index=pd.RangeIndex(inicio - posicion), dtype=self.tipo))
+            partes.append(pd.Series(trozo, copy=False))
+            posicion = inicio + len(trozo)
+        if posicion < filas:
+            partes.append(pd.Series(index=pd.RangeIndex(filas - posicion), dtype=self.tipo))
+        if len(partes) == 1:
+            return partes[0].array
+        return pd.concat(partes, ignore_index=True).array
+
+    def _recortar(self, filas: int) -> np.ndarray:
+        """Las primeras `filas` del arreglo preasignado; se copian si sobra mucho espacio."""
+        datos = self.datos[:filas]
+        if len(self.datos) > filas * 1.25:
+            datos = datos.copy()
+        return datos
+
+
+class AcumuladorColumnar:
+    """
+    Une DataFrames procesados copiándolos en columnas preasignadas.
+
+    Con pd.concat, todos los DataFrames de entrada y el resultado coexisten
+    en memoria. Aquí cada columna se reserva una vez para el total estimado
+    de filas y cada DataFrame se copia en ella apenas llega, así que quien
+    llama puede liberarlo enseguida. El pico queda en el consolidado más el
+    archivo en curso.
+
+    Los tipos se resuelven a medida que aparecen, con las mismas reglas que
+    PlanEsquema. Si un archivo trae un tipo más amplio, se convierte solo esa
+    columna. Si se supera la estimación de filas, las columnas crecen
+    (factor_crecimiento). Las categorías se unen en orden de aparición.
+    """
+
+    def __init__(self, filas_estimadas: int = 0, modo: str = 'union', factor_crecimiento: float = 1.5):
+        """
+        Args:
+            filas_estimadas: Filas totales previstas (ver FileProcessor.estimar_filas)
+            modo: 'union' o 'interseccion', como en PlanEsquema
+            factor_crecimiento: Cuánto crece la capacidad si se supera la estimación
+        """
+        self.capacidad = max(int(filas_estimadas), 0)
+        self.modo = modo
+        self.factor_crecimiento = factor_crecimiento
+        self.filas = 0
+        self.crecimientos = 0
+        self._columnas: Dict[Any, _Columna] = {}
+        self._esquemas: List[Tuple[str, List[Any], Dict[Any, Any]]] = []
+
+    def agregar(self, archivo: str, df: pd.DataFrame):
+        """
+        Copia las filas de un DataFrame al final del acumulador.
+
+        Args:
+            archivo: Archivo de origen (para el reporte de esquema)
+            df: DataFrame procesado; puede liberarse después de la llamada
+        """
+        fin = self.filas + len(df)
+        if fin > self.capacidad:
+            self._crecer(fin)
+
+        for posicion, nombre in enumerate(df.columns):
+            serie = df.iloc[:, posicion]
+            columna = self._columnas.get(nombre)
+            if columna is None:
+                columna = self._columnas[nombre] = _Columna(serie.dtype, self.capacidad)
+            elif serie.dtype != columna.tipo:
+                columna = self._columnas[nombre] = self._promover(nombre, columna, serie.dtype)
+            columna.escribir(self.filas, serie)
+
+        self._esquemas.append((archivo, list(df.columns), df.dtypes.to_dict()))
+        self.filas = fin
+
+    def _crecer(self, minimo: int):
+        """Amplía todas las columnas para al menos `minimo` filas."""
+        capacidad = max(minimo, int(self.capacidad * self.factor_crecimiento))
+        if self.capacidad:
+            logger.info(f"Estimación de filas superada ({self.capacidad}); se amplía a {capacidad}")
+            self.crecimientos += 1
+        for columna in self._columnas.values():
+            columna.crecer(capacidad, self.filas)
+        self.capacidad = capacidad
+
+    def _promover(self, nombre: Any, columna: _Columna, tipo: Any) -> _Columna:
+        """Columna que admite los valores actuales y los de tipo `tipo`."""
+        nueva_categorica = isinstance(tipo, pd.CategoricalDtype) and not tipo.ordered
+        if columna.categorica and not columna.tipo.ordered and (
+                nueva_categorica or pd.api.types.is_string_dtype(tipo)):
+            # Las categorías de la columna absorben los valores nuevos
+            return columna
+
+        if nueva_categorica and pd.api.types.is_string_dtype(columna.tipo):
+            actual = pd.Series(columna.materializar(self.filas), copy=False)
+            destino = pd.CategoricalDtype(pd.Index(actual.dropna().unique()))
+        else:
+            tipo_actual = columna.tipo
+            if columna.huecos(self.filas):
+                tipo_actual = PlanEsquema._tipo_con_nulos(tipo_actual)
+            destino = PlanEsquema._tipo_comun([tipo_actual, tipo])
+            if destino == columna.tipo:
+                return columna
+            actual = pd.Series(columna.materializar(self.filas), copy=False)
+
+        logger.info(f"Columna '{nombre}' pasa de {columna.tipo} a {destino}")
+        nueva = _Columna(destino, self.capacidad)
+        nueva.escribir(0, actual.astype(destino))
+        return nueva
+
+    def plan(self) -> PlanEsquema:
+        """
+        Plan de esquema de los DataFrames agregados (columnas, faltantes y conflictos).
+
+        Returns:
+            PlanEsquema; los tipos se completan en finalizar
+        """
+        return PlanEsquema.desde_tipos(self._esquemas, self.modo)
+
+    def finalizar(self, plan: Optional[PlanEsquema] = None) -> pd.DataFrame:
+        """
+        Arma el consolidado y vacía el acumulador.
+
+        Las columnas se entregan sin volver a copiar los arreglos, salvo que
+        la estimación de filas haya sobrado más de un 25 %.
+
+        Args:
+            plan: Plan calculado con `plan()` (se calcula si no se indica); sus
+                tipos se actualizan con los del consolidado
+
+        Returns:
+            DataFrame con las columnas del plan y un índice 0..n-1
+        """
+        if plan is None:
+            plan = self.plan()
+        indice = pd.RangeIndex(self.filas)
+        datos = {}
+        for nombre in plan.columnas:
+            columna = self._columnas.pop(nombre, None)
+            if columna is not None:
+                valores = columna.materializar(self.filas)
+                # dtype explícito: pandas no debe inferir 'str' en las columnas object
+                datos[nombre] = pd.Series(valores, index=indice, dtype=valores.dtype, copy=False)
+        self._columnas.clear()
+
+        df = pd.DataFrame(datos, index=indice, copy=False)
+        plan.tipos = df.dtypes.to_dict()
+        return df
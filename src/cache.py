@@ -0,0 +1,260 @@
+"""
+Módulo de caché de resultados por archivo para el consolidador.
+Guarda en disco el DataFrame ya procesado de cada archivo para que las
+ejecuciones siguientes solo relean los archivos que cambiaron.
+"""
+
+import hashlib
+import json
+import os
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Cambiar si cambia la forma en que se procesan los archivos, para invalidar
+# las entradas generadas por versiones anteriores.
+VERSION_CACHE = 1
+
+
+class CacheResultados:
+    """
+    Caché en disco de (DataFrame procesado, columnas eliminadas) por archivo.
+
+    La clave combina la ruta, el tamaño y la fecha de modificación del archivo
+    (o un hash de su contenido) con la configuración de procesamiento. Los
+    datos se guardan en Feather (columnar, requiere pyarrow) y, si no es
+    posible, en pickle. Al superar `max_bytes` se eliminan las entradas usadas
+    hace más tiempo (LRU).
+    """
+
+    NOMBRE_INDICE = 'indice.json'
+
+    def __init__(self,
+                 directorio: str,
+                 max_bytes: int = 2 * 1024 ** 3,
+                 hash_contenido: bool = False):
+        """
+        Args:
+            directorio: Carpeta donde se guardan las entradas
+            max_bytes: Tamaño máximo total de la caché en disco
+            hash_contenido: Si usar un hash SHA-256 del contenido en lugar de
+                tamaño + fecha de modificación para detectar cambios
+        """
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.hash_contenido = hash_contenido
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+        os.makedirs(directorio, exist_ok=True)
+        self._ruta_indice = os.path.join(directorio, self.NOMBRE_INDICE)
+        self._indice: Dict[str, Dict[str, Any]] = self._cargar_indice()
+        self._pendiente_guardar = False
+
+    def _cargar_indice(self) -> Dict[str, Dict[str, Any]]:
+        """Lee el índice de entradas, descartando las que ya no tienen datos."""
+        if not os.path.exists(self._ruta_indice):
+            return {}
+        try:
+            with open(self._ruta_indice, encoding='utf-8') as archivo:
+                indice = json.load(archivo)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Índice de caché ilegible, se reinicia: {e}")
+            return {}
+        return {clave: entrada for clave, entrada in indice.items()
+                if os.path.exists(os.path.join(self.directorio, entrada['datos']))}
+
+    def persistir(self):
+        """Escribe el índice en disco si hubo cambios (de forma atómica)."""
+        if not self._pendiente_guardar:
+            return
+        temporal = f"{self._ruta_indice}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(self._indice, archivo, ensure_ascii=False)
+        os.replace(temporal, self._ruta_indice)
+        self._pendiente_guardar = False
+
+    def _huella_archivo(self, ruta_archivo: str) -> Dict[str, Any]:
+        """Datos que identifican la versión actual de un archivo."""
+        stat = os.stat(ruta_archivo)
+        huella = {'ruta': os.path.abspath(ruta_archivo), 'tamano': stat.st_size}
+        if self.hash_contenido:
+            sha = hashlib.sha256()
+            with open(ruta_archivo, 'rb') as archivo:
+                for bloque in iter(lambda: archivo.read(1024 * 1024), b''):
+                    sha.update(bloque)
+            huella['sha256'] = sha.hexdigest()
+        else:
+            huella['mtime_ns'] = stat.st_mtime_ns
+        return huella
+
+    def clave(self, ruta_archivo: str, configuracion: Dict[str, Any]) -> str:
+        """
+        Calcula la clave de caché de un archivo.
+
+        Args:
+            ruta_archivo: Ruta del archivo de entrada
+            configuracion: Opciones que afectan al resultado del procesamiento
+
+        Returns:
+            Clave hexadecimal
+        """
+        contenido = json.dumps({
+            'version': VERSION_CACHE,
+            'archivo': self._huella_archivo(ruta_archivo),
+            'configuracion': configuracion,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    def obtener(self, clave: str) -> Optional[Tuple[pd.DataFrame, List[str]]]:
+        """
+        Busca una entrada en la caché.
+
+        Args:
+            clave: Clave calculada con `clave`
+
+        Returns:
+            Tupla (DataFrame procesado, columnas eliminadas) o None si no está
+        """
+        entrada = self._indice.get(clave)
+        if entrada is None:
+            self.fallos += 1
+            return None
+
+        ruta_datos = os.path.join(self.directorio, entrada['datos'])
+        try:
+            if entrada['formato'] == 'feather':
+                df = pd.read_feather(ruta_datos)
+            else:
+                df = pd.read_pickle(ruta_datos)
+        except Exception as e:
+            logger.warning(f"Entrada de caché dañada para {entrada['archivo']}, se descarta: {e}")
+            self._eliminar(clave)
+            self.fallos += 1
+            return None
+        if 'tipos' in entrada:
+            df = self._restaurar_tipos(df, entrada['tipos'])
+
+        entrada['ultimo_acceso'] = time.time()
+        self._pendiente_guardar = True
+        self.aciertos += 1
+        logger.info(f"Archivo {entrada['archivo']} leído desde caché: {len(df)} registros")
+        return df, list(entrada['columnas_eliminadas'])
+
+    @staticmethod
+    def _restaurar_tipos(df: pd.DataFrame, tipos: Dict[str, str]) -> pd.DataFrame:
+        """
+        Devuelve a cada columna el dtype que tenía al guardarse.
+
+        Feather no distingue object de texto: las columnas object vuelven como
+        'str', y el resumen y el esquema no coincidirían con los de una
+        ejecución sin caché.
+        """
+        for columna, tipo in tipos.items():
+            if columna not in df.columns or str(df[columna].dtype) == tipo:
+                continue
+            try:
+                df[columna] = df[columna].astype(pd.api.types.pandas_dtype(tipo))
+            except (TypeError, ValueError) as e:
+                logger.debug(f"No se pudo restaurar el tipo {tipo} de '{columna}': {e}")
+        return df
+
+    def guardar(self, clave: str, ruta_archivo: str, df: pd.DataFrame, columnas_eliminadas: List[str]):
+        """
+        Guarda el resultado procesado de un archivo.
+
+        Args:
+            clave: Clave calculada con `clave`
+            ruta_archivo: Archivo de entrada (solo informativo)
+            df: DataFrame procesado
+            columnas_eliminadas: Columnas eliminadas del archivo
+        """
+        self._eliminar(clave)
+        try:
+            nombre_datos, formato = f"{clave}.feather", 'feather'
+            ruta_datos = os.path.join(self.directorio, nombre_datos)
+            try:
+                df.reset_index(drop=True).to_feather(ruta_datos)
+            except Exception as e:
+                # Sin pyarrow, o columnas que Arrow no puede representar
+                logger.debug(f"No se pudo guardar en Feather ({e}); se usa pickle")
+                if os.path.exists(ruta_datos):
+                    os.remove(ruta_datos)
+                nombre_datos, formato = f"{clave}.pkl", 'pickle'
+                ruta_datos = os.path.join(self.directorio, nombre_datos)
+                df.to_pickle(ruta_datos)
+        except Exception as e:
+            logger.warning(f"No se pudo guardar {os.path.basename(ruta_archivo)} en caché: {e}")
+            return
+
+        self._indice[clave] = {
+            'archivo': os.path.basename(ruta_archivo),
+            'datos': nombre_datos,
+            'formato': formato,
+            'bytes': os.path.getsize(ruta_datos),
+            'registros': len(df),
+            'columnas_eliminadas': list(columnas_eliminadas),
+            'ultimo_acceso': time.time(),
+        }
+        if formato == 'feather':
+            self._indice[clave]['tipos'] = {str(columna): str(tipo) for columna, tipo in df.dtypes.items()}
+        self._pendiente_guardar = True
+        self._desalojar()
+
+    def _eliminar(self, clave: str):
+        """Elimina una entrada y su archivo de datos."""
+        entrada = self._indice.pop(clave, None)
+        if entrada is None:
+            return
+        ruta_datos = os.path.join(self.directorio, entrada['datos'])
+        if os.path.exists(ruta_datos):
+            os.remove(ruta_datos)
+        self._pendiente_guardar = True
+
+    def _desalojar(self):
+        """Elimina las entradas menos usadas hasta quedar bajo max_bytes."""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for clave in sorted(self._indice, key=lambda c: self._indice[c]['ultimo_acceso']):
+            if total <= self.max_bytes:
+                break
+            total -= self._indice[clave]['bytes']
+            logger.info(f"Desalojando de caché: {self._indice[clave]['archivo']}")
+            self._eliminar(clave)
+            self.desalojos += 1
+
+    def total_bytes(self) -> int:
+        """Tamaño total en disco de las entradas."""
+        return sum(entrada['bytes'] for entrada in self._indice.values())
+
+    def limpiar(self):
+        """Elimina todas las entradas de la caché."""
+        for clave in list(self._indice):
+            self._eliminar(clave)
+        self.persistir()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """
+        Resumen del uso de la caché desde que se creó esta instancia.
+
+        Returns:
+            Diccionario con aciertos, fallos, desalojos, entradas y tamaño
+        """
+        consultas = self.aciertos + self.fallos
+        return {
+            'directorio': self.directorio,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': round(self.aciertos / consultas, 3) if consultas else 0.0,
+            'desalojos': self.desalojos,
+            'entradas': len(self._indice),
+            'bytes': self.total_bytes(),
+            'max_bytes': self.max_bytes,
+        }
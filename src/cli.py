@@ -0,0 +1,368 @@
+"""
+Módulo de línea de comandos para el consolidador de archivos.
+Permite consolidar sin interfaz gráfica (cron, servidores sin pantalla).
+
+No importa tkinter, y pandas solo se carga después de interpretar los
+argumentos, para que el arranque sea rápido.
+
+Uso:
+    python main.py consolidate "entrada/*.csv" "entrada/*.xlsx" --salida consolidado.csv
+    python main.py watch entrada/ --salida consolidado.csv
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import signal
+import sys
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Formatos de salida (igual que utils.FORMATOS_SALIDA, sin importar pandas)
+FORMATOS_SALIDA = ('csv', 'xlsx', 'parquet', 'feather')
+
+# Códigos de salida
+EXIT_OK = 0
+EXIT_ERROR = 1
+
+
+def _lista_columnas(texto: str) -> List[str]:
+    """Convierte 'A, B, C' en ['A', 'B', 'C']."""
+    return [columna.strip() for columna in texto.split(',') if columna.strip()]
+
+
+def expandir_entradas(patrones: List[str]) -> List[str]:
+    """
+    Expande patrones glob (admite '**') a una lista ordenada de archivos.
+
+    Los patrones sin coincidencias se conservan tal cual, para que la
+    validación los reporte como archivos no encontrados.
+
+    Args:
+        patrones: Rutas o patrones glob
+
+    Returns:
+        Lista de rutas sin duplicados, en el orden de los patrones
+    """
+    archivos = []
+    for patron in patrones:
+        coincidencias = sorted(glob.glob(patron, recursive=True))
+        for archivo in coincidencias or [patron]:
+            if archivo not in archivos:
+                archivos.append(archivo)
+    return archivos
+
+
+def resultado_a_json(resultado: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Prepara el resultado de Consolidator para serializarlo como JSON.
+
+    Quita el DataFrame y convierte tipos de NumPy/pandas en tipos nativos.
+
+    Args:
+        resultado: Diccionario retornado por procesar_y_guardar
+
+    Returns:
+        Diccionario serializable
+    """
+    def convertir(valor):
+        if isinstance(valor, dict):
+            return {str(clave): convertir(v) for clave, v in valor.items()}
+        if isinstance(valor, (list, tuple)):
+            return [convertir(v) for v in valor]
+        if isinstance(valor, (str, int, float, bool)) or valor is None:
+            return valor
+        if hasattr(valor, 'item'):
+            # Escalares de NumPy (np.int64, np.bool_, ...)
+            return valor.item()
+        return str(valor)
+
+    return convertir({clave: valor for clave, valor in resultado.items() if clave != 'dataframe'})
+
+
+def _agregar_opciones_consolidacion(subparser: argparse.ArgumentParser):
+    """Agrega las opciones de Consolidator.configurar comunes a los subcomandos."""
+    columnas = subparser.add_mutually_exclusive_group()
+    columnas.add_argument('--ignorar', type=_lista_columnas, default=[],
+                          help='Columnas a ignorar, separadas por comas')
+    columnas.add_argument('--incluir', type=_lista_columnas, default=None,
+                          help='Columnas a incluir (las demás se descartan), separadas por comas')
+    subparser.add_argument('--eliminar-duplicados', action='store_true',
+                           help='Eliminar filas duplicadas del resultado final')
+    subparser.add_argument('--columnas-duplicados', type=_lista_columnas, default=None,
+                           help='Columnas que definen un duplicado, separadas por comas (por defecto, todas)')
+    subparser.add_argument('--duplicados-sin-periodo', action='store_true',
+                           help='No considerar las columnas de periodo al comparar duplicados')
+    subparser.add_argument('--verificar-duplicados', action='store_true',
+                           help='Comparar valores ante hashes iguales (más lento, sin falsos positivos)')
+    subparser.add_argument('--compresion', default=None,
+                           help='Compresión de la salida parquet/feather (p. ej. snappy, zstd, lz4)')
+    subparser.add_argument('--filas-por-grupo', type=int, default=None,
+                           help='Filas por row group (parquet) o record batch (feather)')
+    subparser.add_argument('--columna-1', default='PERIODO_L',
+                           help='Nombre de la columna de periodo derivada de FECHA_LEG')
+    subparser.add_argument('--columna-2', default='PERIODO_A',
+                           help='Nombre de la columna de periodo derivada de FECHA_ASIG')
+    subparser.add_argument('--formato-periodo', choices=['texto', 'entero', 'categoria'], default='texto',
+                           help='Tipo de las columnas de periodo')
+    subparser.add_argument('--modo-ejecucion', choices=['secuencial', 'hilos', 'procesos'], default='secuencial',
+                           help='Cómo leer y transformar los archivos')
+    subparser.add_argument('--workers', type=int, default=None,
+                           help='Número máximo de workers en modo hilos/procesos')
+    subparser.add_argument('--motor-excel', choices=['calamine', 'openpyxl', 'xlrd'], default=None,
+                           help='Motor de lectura de Excel (por defecto, el más rápido instalado)')
+    hojas = subparser.add_mutually_exclusive_group()
+    hojas.add_argument('--hojas', default=None, metavar='REGEX',
+                       help='Consolidar las hojas de Excel cuyo nombre coincida con la expresión regular')
+    hojas.add_argument('--todas-las-hojas', action='store_const', const='.*', dest='hojas',
+                       help='Consolidar todas las hojas de los archivos Excel')
+    subparser.add_argument('--columna-hoja', default='HOJA_ORIGEN',
+                           help='Nombre de la columna con la hoja de origen (con --hojas)')
+    subparser.add_argument('--esquema', choices=['union', 'interseccion'], default='union',
+                           help='Columnas del consolidado: todas (union) o solo las comunes a todos los archivos')
+    subparser.add_argument('--esquema-estricto', action='store_true',
+                           help='Fallar si los archivos difieren en columnas o tipos en lugar de unificarlos')
+    subparser.add_argument('--optimizar-memoria', action='store_true',
+                           help='Convertir cada archivo a tipos compactos (category, enteros reducidos, texto Arrow) antes de concatenar')
+    subparser.add_argument('--consolidacion', choices=['concat', 'preasignado'], default='concat',
+                           help='Unir los archivos con pd.concat o copiándolos en columnas preasignadas (menor pico de memoria)')
+    subparser.add_argument('--streaming', action='store_true',
+                           help='Escribir cada archivo directamente en la salida (CSV o xlsx)')
+    subparser.add_argument('--tamano-bloque', type=int, default=None,
+                           help='En modo streaming, leer los CSV en bloques de N filas')
+    subparser.add_argument('--cache', action='store_true',
+                           help='Reutilizar el resultado de los archivos que no cambiaron (caché en disco)')
+    subparser.add_argument('--directorio-cache', default=None,
+                           help='Carpeta de la caché (por defecto, cache/)')
+    subparser.add_argument('--metricas', default=None, metavar='RUTA',
+                           help='Exportar las métricas por etapa y por archivo a este JSON')
+    subparser.add_argument('--medir-memoria', action='store_true',
+                           help='Registrar el pico de memoria de cada etapa con tracemalloc (más lento)')
+    subparser.add_argument('--perfil', choices=['cprofile', 'pyinstrument'], default=None,
+                           help='Perfilar la ejecución completa con este perfilador')
+    subparser.add_argument('--ruta-perfil', default=None,
+                           help='Archivo del perfil (por defecto, carpeta generados/)')
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    """Crea el parser de argumentos de la línea de comandos."""
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description='Consolidador Pro - consolidación de archivos CSV y Excel sin interfaz gráfica.'
+    )
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    consolidar = subparsers.add_parser(
+        'consolidate',
+        help='Consolida archivos y guarda el resultado',
+        description='Consolida archivos CSV/Excel y escribe un resumen JSON en la salida estándar.'
+    )
+    consolidar.add_argument('entradas', nargs='+',
+                            help="Archivos o patrones glob (p. ej. 'datos/**/*.csv')")
+    consolidar.add_argument('--formato', choices=list(FORMATOS_SALIDA), default=None,
+                            help='Formato de salida (por defecto se deduce de --salida, o csv)')
+    consolidar.add_argument('--salida', default=None,
+                            help='Ruta del archivo de salida (por defecto, carpeta generados/)')
+    _agregar_opciones_consolidacion(consolidar)
+    consolidar.add_argument('--estricto', action='store_true',
+                            help='Terminar con error si algún archivo no se pudo procesar')
+    consolidar.add_argument('--verbose', action='store_true',
+                            help='Mostrar el log detallado en la salida de errores')
+    consolidar.set_defaults(funcion=comando_consolidar)
+
+    vigilar = subparsers.add_parser(
+        'watch',
+        help='Vigila una carpeta y consolida los archivos a medida que llegan',
+        description='Vigila una carpeta y consolida de forma incremental los archivos nuevos o '
+                    'modificados (CSV, Excel, Parquet, Feather). Escribe una línea JSON por lote '
+                    'en la salida estándar.'
+    )
+    vigilar.add_argument('carpeta', help='Carpeta a vigilar')
+    vigilar.add_argument('--salida', required=True,
+                         help='Ruta del archivo consolidado')
+    vigilar.add_argument('--formato', choices=list(FORMATOS_SALIDA), default=None,
+                         help='Formato de salida (por defecto se deduce de --salida, o csv)')
+    vigilar.add_argument('--modo', choices=['reconstruir', 'anexar'], default='reconstruir',
+                         help='Reemplazar la salida en cada lote (con caché) o agregar las filas nuevas al CSV')
+    vigilar.add_argument('--intervalo', type=float, default=2.0,
+                         help='Segundos entre revisiones de la carpeta')
+    vigilar.add_argument('--espera', type=float, default=5.0,
+                         help='Segundos sin cambios antes de procesar un archivo (archivos en copia)')
+    vigilar.add_argument('--estado', default=None, metavar='RUTA',
+                         help='Diario de archivos procesados (por defecto, junto a la salida)')
+    vigilar.add_argument('--recursivo', action='store_true',
+                         help='Vigilar también las subcarpetas')
+    vigilar.add_argument('--sondeo', action='store_true',
+                         help='Revisar la carpeta periódicamente aunque watchdog esté instalado')
+    vigilar.add_argument('--una-vez', action='store_true',
+                         help='Consolidar lo que haya en la carpeta y terminar (para cron)')
+    _agregar_opciones_consolidacion(vigilar)
+    vigilar.add_argument('--verbose', action='store_true',
+                         help='Mostrar el log detallado en la salida de errores')
+    vigilar.set_defaults(funcion=comando_vigilar)
+
+    return parser
+
+
+def _deducir_formato(formato: Optional[str], salida: Optional[str]) -> str:
+    """Formato indicado, o el de la extensión de la salida, o csv."""
+    if formato is not None:
+        return formato
+    extension = os.path.splitext(salida or '')[1].lower().lstrip('.')
+    return extension if extension in FORMATOS_SALIDA else 'csv'
+
+
+def _configurar(consolidador, args: argparse.Namespace):
+    """Aplica a un Consolidator las opciones de _agregar_opciones_consolidacion."""
+    consolidador.configurar(
+        columna_1_nombre=args.columna_1,
+        columna_2_nombre=args.columna_2,
+        columnas_a_ignorar=args.ignorar,
+        columnas_a_incluir=args.incluir,
+        eliminar_duplicados=args.eliminar_duplicados,
+        columnas_duplicados=args.columnas_duplicados,
+        duplicados_ignorar_periodo=args.duplicados_sin_periodo,
+        verificar_duplicados=args.verificar_duplicados,
+        modo_ejecucion=args.modo_ejecucion,
+        max_workers=args.workers,
+        modo_streaming=args.streaming,
+        tamano_bloque=args.tamano_bloque,
+        formato_periodo=args.formato_periodo,
+        usar_cache=args.cache,
+        directorio_cache=args.directorio_cache,
+        compresion_salida=args.compresion,
+        filas_por_grupo=args.filas_por_grupo,
+        motor_excel=args.motor_excel,
+        hojas_excel=args.hojas,
+        columna_hoja_nombre=args.columna_hoja,
+        modo_esquema=args.esquema,
+        esquema_estricto=args.esquema_estricto,
+        optimizar_memoria=args.optimizar_memoria,
+        modo_consolidacion=args.consolidacion,
+        medir_memoria=args.medir_memoria,
+        perfilador=args.perfil,
+        ruta_perfil=args.ruta_perfil,
+        ruta_metricas=args.metricas
+    )
+
+
+def comando_consolidar(args: argparse.Namespace) -> int:
+    """
+    Ejecuta el subcomando 'consolidate'.
+
+    Args:
+        args: Argumentos interpretados
+
+    Returns:
+        Código de salida del proceso
+    """
+    try:
+        from .processor import Consolidator
+    except ImportError as e:
+        _imprimir_json({'exito': False, 'error': f"Dependencias faltantes: {e}"})
+        return EXIT_ERROR
+
+    formato = _deducir_formato(args.formato, args.salida)
+    archivos = expandir_entradas(args.entradas)
+    logger.info(f"Archivos de entrada: {len(archivos)}")
+
+    consolidador = Consolidator()
+    try:
+        _configurar(consolidador, args)
+        resultado = consolidador.procesar_y_guardar(archivos, formato=formato, ruta_salida=args.salida)
+    except Exception as e:
+        logger.error(f"Error en procesamiento: {str(e)}")
+        resultado = {'exito': False, 'error': str(e)}
+
+    exito = resultado.get('exito', False) and resultado.get('guardado', {}).get('exito', False)
+    if exito and args.estricto and resultado.get('archivos_con_errores'):
+        exito = False
+
+    _imprimir_json({**resultado_a_json(resultado), 'exito': exito})
+    return EXIT_OK if exito else EXIT_ERROR
+
+
+def comando_vigilar(args: argparse.Namespace) -> int:
+    """
+    Ejecuta el subcomando 'watch'.
+
+    Args:
+        args: Argumentos interpretados
+
+    Returns:
+        Código de salida del proceso
+    """
+    try:
+        from .processor import Consolidator
+        from .vigilante import VigilanteCarpeta
+    except ImportError as e:
+        _imprimir_json({'exito': False, 'error': f"Dependencias faltantes: {e}"})
+        return EXIT_ERROR
+
+    def informar(resumen: Dict[str, Any]):
+        json.dump(resultado_a_json(resumen), sys.stdout, ensure_ascii=False)
+        sys.stdout.write('\n')
+        sys.stdout.flush()
+
+    consolidador = Consolidator()
+    try:
+        _configurar(consolidador, args)
+        vigilante = VigilanteCarpeta(
+            consolidador,
+            args.carpeta,
+            args.salida,
+            formato=_deducir_formato(args.formato, args.salida),
+            modo=args.modo,
+            recursivo=args.recursivo,
+            intervalo=args.intervalo,
+            espera_estable=args.espera,
+            ruta_estado=args.estado,
+            usar_eventos=False if args.sondeo else None,
+            al_consolidar=informar
+        )
+    except Exception as e:
+        logger.error(f"Error al iniciar la vigilancia: {str(e)}")
+        _imprimir_json({'exito': False, 'error': str(e)})
+        return EXIT_ERROR
+
+    if args.una_vez:
+        resumen = vigilante.procesar_existentes()
+        return EXIT_OK if resumen is None or resumen['exito'] else EXIT_ERROR
+
+    # Ctrl+C o SIGTERM terminan la vigilancia al final del lote en curso
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(senal, lambda *_: vigilante.detener())
+    vigilante.ejecutar()
+    return EXIT_OK
+
+
+def _imprimir_json(datos: Dict[str, Any]):
+    """Escribe el resumen JSON en la salida estándar."""
+    json.dump(datos, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write('\n')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+
+    Args:
+        argv: Argumentos (sin el nombre del programa); por defecto sys.argv[1:]
+
+    Returns:
+        Código de salida del proceso
+    """
+    args = crear_parser().parse_args(argv)
+
+    # La salida estándar queda reservada para el resumen JSON
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr,
+        force=True
+    )
+
+    return args.funcion(args)
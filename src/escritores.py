@@ -0,0 +1,271 @@
+"""
+Módulo de escritores incrementales para el consolidador de archivos.
+Permite volcar el consolidado bloque a bloque sin mantenerlo completo en memoria.
+"""
+
+import os
+import pickle
+import logging
+import tempfile
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _alinear_columnas(df: pd.DataFrame, columnas: List[str]) -> pd.DataFrame:
+    """Reordena un bloque a las columnas de salida, avisando de las que sobran."""
+    if list(df.columns) == columnas:
+        return df
+    sobrantes = [c for c in df.columns if c not in columnas]
+    if sobrantes:
+        logger.warning(f"Columnas fuera del plan de salida descartadas: {sobrantes}")
+    return df.reindex(columns=columnas)
+
+
+class EscritorCSV:
+    """Escribe un CSV agregando DataFrames al final, con el encabezado una sola vez."""
+
+    def __init__(self, ruta_salida: str, columnas: Optional[List[str]] = None):
+        """
+        Args:
+            ruta_salida: Ruta final del archivo CSV
+            columnas: Columnas (y su orden) del archivo de salida. Si no se
+                indican, se toman del primer bloque escrito.
+        """
+        self.ruta_salida = ruta_salida
+        self.columnas = list(columnas) if columnas is not None else None
+        self.registros = 0
+        self._control = None
+
+        # Se escribe sobre un archivo temporal que se renombra al cerrar,
+        # para no dejar un consolidado a medias si el proceso falla.
+        self._ruta_temporal = f"{ruta_salida}.parcial"
+        self._archivo = None
+
+    def escribir(self, df: pd.DataFrame):
+        """
+        Agrega las filas de un DataFrame al archivo de salida.
+
+        Args:
+            df: DataFrame a escribir; se alinea a las columnas de salida
+        """
+        if self.columnas is None:
+            self.columnas = list(df.columns)
+
+        if self._archivo is None:
+            os.makedirs(os.path.dirname(self.ruta_salida) or '.', exist_ok=True)
+            self._archivo = open(self._ruta_temporal, 'w', encoding='utf-8-sig', newline='')
+            pd.DataFrame(columns=self.columnas).to_csv(self._archivo, index=False)
+
+        df = _alinear_columnas(df, self.columnas)
+        df.to_csv(self._archivo, index=False, header=False)
+        self.registros += len(df)
+
+    def punto_control(self):
+        """Marca la posición actual para poder deshacer lo escrito después."""
+        if self._archivo is None:
+            self._control = (None, 0)
+            return
+        self._archivo.flush()
+        self._control = (self._archivo.tell(), self.registros)
+
+    def revertir(self):
+        """Descarta todo lo escrito desde el último punto de control."""
+        if self._control is None:
+            return
+        posicion, registros = self._control
+        if posicion is None:
+            # Aún no había nada escrito: se vuelve al estado inicial
+            self.descartar()
+        else:
+            self._archivo.seek(posicion)
+            self._archivo.truncate()
+        self.registros = registros
+        logger.info(f"Escritura revertida a {registros} registros en {self.ruta_salida}")
+
+    def cerrar(self):
+        """Cierra el archivo y lo mueve a su ruta definitiva."""
+        if self._archivo is None:
+            # Sin filas: igual se genera un archivo con el encabezado
+            self.escribir(pd.DataFrame(columns=self.columnas or []))
+
+        self._archivo.close()
+        os.replace(self._ruta_temporal, self.ruta_salida)
+        logger.info(f"Archivo CSV guardado: {self.ruta_salida} ({self.registros} registros)")
+
+    def descartar(self):
+        """Cierra y elimina el archivo temporal sin publicar el resultado."""
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        if os.path.exists(self._ruta_temporal):
+            os.remove(self._ruta_temporal)
+
+
+class EscritorXlsx:
+    """
+    Escribe un xlsx fila a fila con un libro de openpyxl en modo write_only.
+
+    La memoria no depende del tamaño del resultado: openpyxl vuelca cada fila
+    a disco al agregarla. Al llegar al límite de filas de Excel se continúa en
+    una hoja nueva (Sheet2, Sheet3, ...) con el mismo encabezado.
+
+    Un libro write_only no permite borrar filas, así que lo escrito después de
+    un punto de control se guarda en un archivo temporal hasta el siguiente
+    punto de control (o el cierre) para poder revertirlo. Las filas se
+    convierten y se copian de a FILAS_POR_TROZO, así que en memoria nunca hay
+    más que un trozo.
+    """
+
+    # Filas por hoja de Excel, incluido el encabezado
+    MAX_FILAS_HOJA = 1_048_576
+
+    # Filas que se convierten a objetos de Python de una vez
+    FILAS_POR_TROZO = 10_000
+
+    def __init__(self, ruta_salida: str, columnas: Optional[List[str]] = None):
+        """
+        Args:
+            ruta_salida: Ruta final del archivo xlsx
+            columnas: Columnas (y su orden) del archivo de salida. Si no se
+                indican, se toman del primer bloque escrito.
+        """
+        self.ruta_salida = ruta_salida
+        self.columnas = list(columnas) if columnas is not None else None
+        self.registros = 0
+        self.hojas = 0
+
+        self._ruta_temporal = f"{ruta_salida}.parcial"
+        self._libro = None
+        self._hoja = None
+        self._filas_hoja = 0
+        self._pendientes = None
+        self._control = None
+
+    def escribir(self, df: pd.DataFrame):
+        """
+        Agrega las filas de un DataFrame al libro.
+
+        Args:
+            df: DataFrame a escribir; se alinea a las columnas de salida
+        """
+        if self.columnas is None:
+            self.columnas = list(df.columns)
+
+        df = _alinear_columnas(df, self.columnas)
+        self.registros += len(df)
+        for filas in self._trozos(df):
+            if self._control is not None:
+                self._retener(filas)
+            else:
+                self._volcar(filas)
+
+    def _trozos(self, df: pd.DataFrame) -> Iterator[List[tuple]]:
+        """Filas de un DataFrame como tuplas para openpyxl, de a FILAS_POR_TROZO."""
+        for inicio in range(0, len(df), self.FILAS_POR_TROZO):
+            trozo = df.iloc[inicio:inicio + self.FILAS_POR_TROZO]
+            # Excel muestra los nulos como celdas vacías, igual que to_excel
+            valores = trozo.astype(object).where(trozo.notna(), None)
+            yield list(valores.itertuples(index=False, name=None))
+
+    def _retener(self, filas: List[tuple]):
+        """Guarda filas en el archivo temporal de lo escrito desde el punto de control."""
+        if self._pendientes is None:
+            self._pendientes = tempfile.TemporaryFile(prefix='consolidador_xlsx_')
+        pickle.dump(filas, self._pendientes, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _descartar_pendientes(self):
+        """Cierra (y así elimina) el archivo temporal de filas retenidas."""
+        if self._pendientes is not None:
+            self._pendientes.close()
+            self._pendientes = None
+
+    def _volcar(self, filas: List[tuple]):
+        """Escribe las filas en el libro, abriendo hojas nuevas cuando se llenan."""
+        if self._libro is None:
+            from openpyxl import Workbook
+            self._libro = Workbook(write_only=True)
+
+        for fila in filas:
+            if self._hoja is None or self._filas_hoja >= self.MAX_FILAS_HOJA:
+                self._nueva_hoja()
+            self._hoja.append(fila)
+            self._filas_hoja += 1
+
+    def _nueva_hoja(self):
+        """Crea la siguiente hoja y escribe el encabezado con el estilo de pandas."""
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, Side
+
+        self.hojas += 1
+        self._hoja = self._libro.create_sheet(f"Sheet{self.hojas}")
+        if self.hojas > 1:
+            logger.info(f"Límite de filas de Excel alcanzado; se continúa en Sheet{self.hojas}")
+
+        borde = Side(style='thin')
+        encabezado = []
+        for columna in self.columnas:
+            celda = WriteOnlyCell(self._hoja, value=columna)
+            celda.font = Font(bold=True)
+            celda.border = Border(left=borde, right=borde, top=borde, bottom=borde)
+            celda.alignment = Alignment(horizontal='center', vertical='top')
+            encabezado.append(celda)
+        self._hoja.append(encabezado)
+        self._filas_hoja = 1
+
+    def punto_control(self):
+        """Confirma lo escrito hasta ahora y marca la posición actual."""
+        if self._pendientes is not None:
+            self._pendientes.seek(0)
+            while True:
+                try:
+                    filas = pickle.load(self._pendientes)
+                except EOFError:
+                    break
+                self._volcar(filas)
+            self._descartar_pendientes()
+        self._control = self.registros
+
+    def revertir(self):
+        """Descarta todo lo escrito desde el último punto de control."""
+        if self._control is None:
+            return
+        self._descartar_pendientes()
+        self.registros = self._control
+        logger.info(f"Escritura revertida a {self.registros} registros en {self.ruta_salida}")
+
+    def cerrar(self):
+        """Guarda el libro y lo mueve a su ruta definitiva."""
+        self.punto_control()
+        self._control = None
+        if self._hoja is None:
+            # Sin filas: igual se genera un libro con el encabezado
+            if self._libro is None:
+                from openpyxl import Workbook
+                self._libro = Workbook(write_only=True)
+            self.columnas = self.columnas or []
+            self._nueva_hoja()
+
+        os.makedirs(os.path.dirname(self.ruta_salida) or '.', exist_ok=True)
+        try:
+            self._libro.save(self._ruta_temporal)
+        except Exception:
+            self.descartar()
+            raise
+        self._libro = None
+        os.replace(self._ruta_temporal, self.ruta_salida)
+        logger.info(f"Archivo Excel guardado: {self.ruta_salida} ({self.registros} registros, {self.hojas} hojas)")
+
+    def descartar(self):
+        """Descarta el libro sin publicar el resultado."""
+        self._libro = None
+        self._hoja = None
+        self._descartar_pendientes()
+        if os.path.exists(self._ruta_temporal):
+            os.remove(self._ruta_temporal)
+
+
+# Escritores incrementales por formato de salida
+ESCRITORES = {'csv': EscritorCSV, 'xlsx': EscritorXlsx}
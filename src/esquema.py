@@ -0,0 +1,411 @@
+"""
+Módulo de esquema para el consolidador de archivos.
+Obtiene los encabezados de muchos archivos sin parsear sus datos y unifica
+las columnas y los tipos de los DataFrames antes de concatenarlos.
+"""
+
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .utils import FileProcessor
+
+logger = logging.getLogger(__name__)
+
+# Cómo se combinan las columnas de archivos distintos
+MODOS_ESQUEMA = ('union', 'interseccion')
+
+
+class DescubridorEsquema:
+    """
+    Servicio de lectura de encabezados con caché por archivo.
+
+    Lee solo la fila de encabezados de cada archivo (ver
+    FileProcessor.leer_encabezados), varios archivos en paralelo, y recuerda
+    el resultado mientras el archivo no cambie de tamaño ni de fecha de
+    modificación.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        """
+        Args:
+            max_workers: Número máximo de archivos leídos a la vez
+        """
+        self.max_workers = max_workers
+        self._cache: Dict[Tuple[str, Optional[str]], Tuple[Tuple[int, int], List]] = {}
+        self._lock = threading.Lock()
+
+    def encabezados(self, ruta_archivo: str, patron_hojas: Optional[str] = None) -> List:
+        """
+        Retorna los encabezados de un archivo, desde la caché si no cambió.
+
+        Args:
+            ruta_archivo: Ruta del archivo
+            patron_hojas: En Excel, expresión regular de las hojas a consultar
+                (None = solo la primera hoja)
+
+        Returns:
+            Lista de nombres de columnas
+
+        Raises:
+            Exception: Si no se pueden leer los encabezados
+        """
+        ruta = os.path.abspath(ruta_archivo)
+        stat = os.stat(ruta)
+        version = (stat.st_size, stat.st_mtime_ns)
+        clave = (ruta, patron_hojas)
+
+        with self._lock:
+            guardado = self._cache.get(clave)
+        if guardado is not None and guardado[0] == version:
+            return list(guardado[1])
+
+        columnas = FileProcessor.leer_encabezados(ruta, patron_hojas)
+        with self._lock:
+            self._cache[clave] = (version, columnas)
+        return list(columnas)
+
+    def descubrir(self, archivos: List[str], patron_hojas: Optional[str] = None) -> Dict[str, List]:
+        """
+        Lee los encabezados de varios archivos en paralelo.
+
+        Los archivos que no se pueden leer se registran en el log y se omiten.
+
+        Args:
+            archivos: Lista de rutas de archivos
+            patron_hojas: En Excel, expresión regular de las hojas a consultar
+
+        Returns:
+            Diccionario ruta -> encabezados, en el orden de `archivos`
+        """
+        def leer(ruta):
+            try:
+                return self.encabezados(ruta, patron_hojas)
+            except Exception as e:
+                logger.warning(f"No se pudieron leer encabezados de {os.path.basename(ruta)}: {e}")
+                return None
+
+        if len(archivos) < 2:
+            resultados = [leer(ruta) for ruta in archivos]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(archivos))) as executor:
+                resultados = list(executor.map(leer, archivos))
+
+        return {ruta: columnas for ruta, columnas in zip(archivos, resultados) if columnas is not None}
+
+    def union_columnas(self, archivos: List[str], patron_hojas: Optional[str] = None) -> List[str]:
+        """
+        Unión ordenada alfabéticamente de las columnas de varios archivos.
+
+        Args:
+            archivos: Lista de rutas de archivos
+            patron_hojas: En Excel, expresión regular de las hojas a consultar
+
+        Returns:
+            Lista ordenada de nombres de columnas (como texto)
+        """
+        columnas = set()
+        for encabezados in self.descubrir(archivos, patron_hojas).values():
+            columnas.update(map(str, encabezados))
+        return sorted(columnas)
+
+    def limpiar(self):
+        """Vacía la caché de encabezados."""
+        with self._lock:
+            self._cache.clear()
+
+
+class ErrorEsquema(ValueError):
+    """Los archivos no comparten columnas y tipos (modo estricto)."""
+
+    def __init__(self, mensaje: str, reporte: Dict[str, Any]):
+        super().__init__(mensaje)
+        self.reporte = reporte
+
+
+class PlanEsquema:
+    """
+    Columnas y tipos de destino del consolidado.
+
+    Se calcula una vez a partir de los DataFrames procesados (o solo de sus
+    encabezados) y luego cada DataFrame se lleva a ese esquema con una sola
+    conversión, de modo que pd.concat ya no tenga que reindexar ni promover
+    tipos. El tipo de cada columna es el que elegiría pd.concat, salvo que:
+
+    * Si la columna falta en algún archivo, los enteros pasan a Int64 (y los
+      booleanos a boolean) en lugar de float64/object.
+    * Las categorías de varios archivos se unen en una sola categoría, también
+      con las columnas de texto de los archivos donde no era categórica.
+
+    Solo cuenta como conflicto de tipos un cambio de familia (entero,
+    decimal, texto, fecha...); enteros de distinto ancho, por ejemplo, no.
+    """
+
+    def __init__(self,
+                 columnas: List[str],
+                 tipos: Dict[str, Any],
+                 modo: str = 'union',
+                 faltantes: Optional[Dict[str, List[str]]] = None,
+                 descartadas: Optional[Dict[str, List[str]]] = None,
+                 conflictos: Optional[Dict[str, Dict[str, str]]] = None):
+        """
+        Args:
+            columnas: Columnas del consolidado, en orden
+            tipos: Tipo de destino por columna (las que no estén no se convierten)
+            modo: 'union' o 'interseccion'
+            faltantes: Archivo -> columnas del plan que no tiene
+            descartadas: Archivo -> columnas que tiene y el plan no incluye
+            conflictos: Columna -> {archivo: tipo} cuando los tipos difieren
+        """
+        self.columnas = list(columnas)
+        self.tipos = dict(tipos)
+        self.modo = modo
+        self.faltantes = faltantes or {}
+        self.descartadas = descartadas or {}
+        self.conflictos = conflictos or {}
+
+    @classmethod
+    def desde_encabezados(cls,
+                          encabezados: Sequence[Tuple[str, List[str]]],
+                          modo: str = 'union',
+                          fijas: Sequence[str] = ()) -> 'PlanEsquema':
+        """
+        Plan de columnas (sin tipos) a partir de los encabezados de cada archivo.
+
+        Args:
+            encabezados: Pares (archivo, columnas)
+            modo: 'union' (todas las columnas) o 'interseccion' (solo las
+                presentes en todos los archivos)
+            fijas: Columnas que siempre van primero (p. ej., los periodos)
+
+        Returns:
+            PlanEsquema
+        """
+        return cls._planificar([(archivo, list(columnas), {}) for archivo, columnas in encabezados], modo, fijas)
+
+    @classmethod
+    def desde_tipos(cls,
+                    esquemas: Sequence[Tuple[str, List[str], Dict[str, Any]]],
+                    modo: str = 'union') -> 'PlanEsquema':
+        """
+        Plan de columnas y tipos a partir de los tipos de cada archivo, sin sus datos.
+
+        A diferencia de desde_dataframes, no une categorías con columnas de
+        texto (para eso hacen falta los valores).
+
+        Args:
+            esquemas: Tuplas (archivo, columnas, {columna: tipo})
+            modo: 'union' o 'interseccion'
+
+        Returns:
+            PlanEsquema
+        """
+        return cls._planificar([(archivo, list(columnas), dict(tipos)) for archivo, columnas, tipos in esquemas], modo)
+
+    @classmethod
+    def desde_dataframes(cls,
+                         dataframes: Sequence[Tuple[str, pd.DataFrame]],
+                         modo: str = 'union') -> 'PlanEsquema':
+        """
+        Plan de columnas y tipos a partir de los DataFrames ya procesados.
+
+        Args:
+            dataframes: Pares (archivo, DataFrame)
+            modo: 'union' o 'interseccion'
+
+        Returns:
+            PlanEsquema
+        """
+        plan = cls._planificar(
+            [(archivo, list(df.columns), df.dtypes.to_dict()) for archivo, df in dataframes], modo
+        )
+        for columna in list(plan.tipos):
+            categorias = cls._categorias_unidas(dataframes, columna)
+            if categorias is not None:
+                plan.tipos[columna] = categorias
+        return plan
+
+    @staticmethod
+    def _categorias_unidas(dataframes: Sequence[Tuple[str, pd.DataFrame]], columna: str) -> Optional[pd.CategoricalDtype]:
+        """
+        Categoría que une los valores de una columna categórica en algunos
+        archivos y de texto en otros (None si no es el caso).
+        """
+        series = [df[columna] for _, df in dataframes if columna in df.columns]
+        categoricas = [serie for serie in series if isinstance(serie.dtype, pd.CategoricalDtype)]
+        if not categoricas or len(categoricas) == len(series) or any(serie.dtype.ordered for serie in categoricas):
+            return None
+        textos = [serie for serie in series if not isinstance(serie.dtype, pd.CategoricalDtype)]
+        if not all(pd.api.types.is_string_dtype(serie.dtype) for serie in textos):
+            return None
+        valores = [serie.dtype.categories for serie in categoricas]
+        valores += [pd.Index(serie.dropna().unique()) for serie in textos]
+        return pd.CategoricalDtype(pd.Index([v for indice in valores for v in indice]).unique())
+
+    @classmethod
+    def _planificar(cls, esquemas: List[Tuple[str, List[str], Dict[str, Any]]],
+                    modo: str, fijas: Sequence[str] = ()) -> 'PlanEsquema':
+        """Calcula el plan a partir de (archivo, columnas, tipos) de cada archivo."""
+        if modo not in MODOS_ESQUEMA:
+            raise ValueError(f"Modo de esquema no soportado: {modo}. Use uno de {list(MODOS_ESQUEMA)}")
+
+        # Mismo orden que pd.concat: de aparición (unión) o el del primer archivo (intersección)
+        columnas = list(fijas)
+        vistas = set(columnas)
+        for _, columnas_archivo, _ in esquemas:
+            for columna in columnas_archivo:
+                if columna not in vistas:
+                    vistas.add(columna)
+                    columnas.append(columna)
+        if modo == 'interseccion' and esquemas:
+            comunes = set.intersection(*(set(columnas_archivo) for _, columnas_archivo, _ in esquemas))
+            columnas = [columna for columna in columnas if columna in comunes or columna in fijas]
+
+        incluidas = set(columnas)
+        faltantes, descartadas = {}, {}
+        for archivo, columnas_archivo, _ in esquemas:
+            presentes = set(columnas_archivo)
+            nombre = os.path.basename(archivo)
+            sin = [columna for columna in columnas if columna not in presentes and columna not in fijas]
+            if sin:
+                faltantes[nombre] = sin
+            sobran = [columna for columna in columnas_archivo if columna not in incluidas]
+            if sobran:
+                descartadas[nombre] = sobran
+
+        tipos, conflictos = {}, {}
+        for columna in columnas:
+            por_archivo = [(archivo, t[columna]) for archivo, _, t in esquemas if columna in t]
+            if not por_archivo:
+                continue
+            familias = {cls._familia(tipo) for _, tipo in por_archivo}
+            if len(familias) > 1:
+                conflictos[columna] = {os.path.basename(archivo): str(tipo) for archivo, tipo in por_archivo}
+            tipo = cls._tipo_comun([tipo for _, tipo in por_archivo])
+            if len(por_archivo) < len(esquemas):
+                tipo = cls._tipo_con_nulos(tipo)
+            tipos[columna] = tipo
+
+        return cls(columnas, tipos, modo, faltantes, descartadas, conflictos)
+
+    @staticmethod
+    def _familia(tipo: Any) -> str:
+        """Familia de un tipo, para distinguir cambios de esquema de simples cambios de ancho."""
+        if pd.api.types.is_bool_dtype(tipo):
+            return 'booleano'
+        if pd.api.types.is_integer_dtype(tipo):
+            return 'entero'
+        if pd.api.types.is_float_dtype(tipo):
+            return 'decimal'
+        if pd.api.types.is_datetime64_any_dtype(tipo):
+            return 'fecha'
+        if isinstance(tipo, pd.CategoricalDtype) or pd.api.types.is_string_dtype(tipo):
+            return 'texto'
+        return str(tipo)
+
+    @staticmethod
+    def _tipo_comun(tipos: List[Any]) -> Any:
+        """Tipo al que pd.concat llevaría columnas de estos tipos (con categorías unidas)."""
+        if all(tipo == tipos[0] for tipo in tipos[1:]):
+            return tipos[0]
+        if all(isinstance(tipo, pd.CategoricalDtype) and not tipo.ordered for tipo in tipos):
+            categorias = pd.Index([c for tipo in tipos for c in tipo.categories]).unique()
+            return pd.CategoricalDtype(categorias)
+        # Una concatenación de Series vacías aplica las reglas de promoción de pandas sin copiar datos
+        return pd.concat([pd.Series([], dtype=tipo) for tipo in tipos], ignore_index=True).dtype
+
+    @staticmethod
+    def _tipo_con_nulos(tipo: Any) -> Any:
+        """Versión del tipo que admite valores faltantes sin cambiar a float/object."""
+        if isinstance(tipo, pd.api.extensions.ExtensionDtype):
+            return tipo
+        if pd.api.types.is_bool_dtype(tipo):
+            return pd.BooleanDtype()
+        if pd.api.types.is_integer_dtype(tipo):
+            prefijo = 'UInt' if pd.api.types.is_unsigned_integer_dtype(tipo) else 'Int'
+            return pd.api.types.pandas_dtype(f"{prefijo}{tipo.itemsize * 8}")
+        return tipo
+
+    def alinear(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Lleva un DataFrame a las columnas y tipos del plan.
+
+        Las columnas que faltan se crean ya con su tipo de destino (vacías) y
+        solo se convierten las columnas cuyo tipo difiere; si el DataFrame ya
+        coincide con el plan se retorna sin copiar.
+
+        Args:
+            df: DataFrame procesado de un archivo
+
+        Returns:
+            DataFrame con las columnas del plan, en orden
+        """
+        if list(df.columns) == self.columnas and all(
+                df[columna].dtype == tipo for columna, tipo in self.tipos.items()):
+            return df
+
+        datos = {}
+        for columna in self.columnas:
+            tipo = self.tipos.get(columna)
+            if columna not in df.columns:
+                datos[columna] = pd.Series(index=df.index, dtype=tipo if tipo is not None else object)
+            elif tipo is not None and df[columna].dtype != tipo:
+                datos[columna] = df[columna].astype(tipo)
+            else:
+                datos[columna] = df[columna]
+        return pd.DataFrame(datos, index=df.index)
+
+    @property
+    def consistente(self) -> bool:
+        """Si todos los archivos tienen las mismas columnas con los mismos tipos."""
+        return not (self.faltantes or self.descartadas or self.conflictos)
+
+    def reporte(self) -> Dict[str, Any]:
+        """
+        Resumen del plan para el resultado de la consolidación.
+
+        Returns:
+            Diccionario con modo, columnas, tipos de destino, columnas
+            faltantes y descartadas por archivo, conflictos de tipo y si el
+            esquema es consistente
+        """
+        return {
+            'modo': self.modo,
+            'columnas': list(self.columnas),
+            'tipos': {columna: str(tipo) for columna, tipo in self.tipos.items()},
+            'columnas_faltantes': self.faltantes,
+            'columnas_descartadas': self.descartadas,
+            'conflictos_tipo': self.conflictos,
+            'consistente': self.consistente,
+        }
+
+    def verificar(self):
+        """
+        Exige que el esquema sea consistente (modo estricto).
+
+        Raises:
+            ErrorEsquema: Si algún archivo tiene otras columnas o tipos
+        """
+        if self.consistente:
+            return
+        detalles = []
+        for nombre, columnas in self.faltantes.items():
+            detalles.append(f"{nombre} no tiene {columnas}")
+        for nombre, columnas in self.descartadas.items():
+            detalles.append(f"{nombre} tiene columnas extra {columnas}")
+        for columna, tipos in self.conflictos.items():
+            detalles.append(f"'{columna}' con tipos distintos {tipos}")
+        raise ErrorEsquema(f"Esquema inconsistente entre archivos: {'; '.join(detalles)}", self.reporte())
+
+    def registrar(self):
+        """Escribe en el log las diferencias de esquema entre archivos."""
+        for nombre, columnas in self.faltantes.items():
+            logger.warning(f"{nombre} no tiene las columnas {columnas}; quedan vacías")
+        for nombre, columnas in self.descartadas.items():
+            logger.warning(f"Columnas de {nombre} fuera del esquema ({self.modo}): {columnas}")
+        for columna, tipos in self.conflictos.items():
+            logger.warning(f"Columna '{columna}' con tipos distintos {tipos}; se usa {self.tipos.get(columna)}")
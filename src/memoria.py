@@ -0,0 +1,130 @@
+"""
+Módulo de optimización de memoria para el consolidador de archivos.
+Convierte las columnas de cada DataFrame a tipos más compactos antes de
+concatenarlos: categorías, enteros y decimales reducidos y texto en Arrow.
+"""
+
+import importlib.util
+import logging
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class OptimizadorMemoria:
+    """
+    Reduce la memoria de un DataFrame sin cambiar sus valores.
+
+    * Texto con pocos valores distintos (en proporción a las filas) pasa a
+      category; el resto del texto, a string[pyarrow] si pyarrow está
+      instalado (en cualquier versión de pandas; el texto que ya está en
+      Arrow, como el tipo str de pandas 3, se deja como está).
+    * Los enteros se reducen al tipo más chico que contiene sus valores.
+    * Los decimales pasan a float32 solo si ningún valor cambia al hacerlo.
+
+    Las columnas de texto con valores que no son cadenas (mezcla de tipos),
+    las fechas y los booleanos no se modifican.
+    """
+
+    def __init__(self, max_fraccion_categorias: float = 0.5, min_filas_categoria: int = 100):
+        """
+        Args:
+            max_fraccion_categorias: Máxima proporción de valores distintos
+                sobre el total de filas para convertir el texto a category
+            min_filas_categoria: Filas mínimas para considerar category (en
+                DataFrames chicos no compensa)
+        """
+        self.max_fraccion_categorias = max_fraccion_categorias
+        self.min_filas_categoria = min_filas_categoria
+        self.tipo_texto = pd.StringDtype('pyarrow') if importlib.util.find_spec('pyarrow') is not None else None
+
+    def optimizar(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Convierte las columnas de un DataFrame a tipos compactos.
+
+        Args:
+            df: DataFrame a optimizar (no se modifica)
+
+        Returns:
+            Tupla (DataFrame optimizado, información con memoria_antes y
+            memoria_despues en bytes y las conversiones {columna: 'antes -> después'})
+        """
+        memoria_antes = int(df.memory_usage(deep=True, index=False).sum())
+        conversiones = {}
+        columnas = {}
+        for posicion, columna in enumerate(df.columns):
+            serie = df.iloc[:, posicion]
+            compacta = self._compactar(serie)
+            if compacta.dtype != serie.dtype:
+                conversiones[str(columna)] = f"{self._nombre_tipo(serie.dtype)} -> {self._nombre_tipo(compacta.dtype)}"
+            columnas[posicion] = compacta
+
+        if conversiones:
+            resultado = pd.concat(columnas, axis=1)
+            resultado.columns = df.columns
+        else:
+            resultado = df
+        memoria_despues = int(resultado.memory_usage(deep=True, index=False).sum())
+        return resultado, {
+            'memoria_antes': memoria_antes,
+            'memoria_despues': memoria_despues,
+            'conversiones': conversiones,
+        }
+
+    def _compactar(self, serie: pd.Series) -> pd.Series:
+        """Versión compacta de una columna (la misma serie si no hay mejora)."""
+        tipo = serie.dtype
+        if isinstance(tipo, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(tipo):
+            return serie
+        if pd.api.types.is_integer_dtype(tipo):
+            destino = 'unsigned' if pd.api.types.is_unsigned_integer_dtype(tipo) else 'integer'
+            return pd.to_numeric(serie, downcast=destino)
+        if pd.api.types.is_float_dtype(tipo):
+            return self._compactar_decimal(serie)
+        if tipo == object or pd.api.types.is_string_dtype(tipo):
+            return self._compactar_texto(serie)
+        return serie
+
+    @staticmethod
+    def _compactar_decimal(serie: pd.Series) -> pd.Series:
+        """float64 -> float32 solo si la conversión no pierde precisión."""
+        if serie.dtype != np.float64:
+            return serie
+        valores = serie.to_numpy()
+        reducidos = valores.astype(np.float32)
+        with np.errstate(invalid='ignore'):
+            exacto = np.array_equal(reducidos.astype(np.float64), valores, equal_nan=True)
+        return pd.Series(reducidos, index=serie.index, name=serie.name) if exacto else serie
+
+    def _compactar_texto(self, serie: pd.Series) -> pd.Series:
+        """Texto -> category (pocos valores distintos) o string[pyarrow]."""
+        if serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=True) not in ('string', 'empty'):
+            return serie
+
+        filas = len(serie)
+        if filas >= self.min_filas_categoria:
+            distintos = serie.nunique(dropna=True)
+            if distintos <= self.max_fraccion_categorias * filas:
+                return serie.astype('category')
+
+        if self.tipo_texto is not None and not self._texto_arrow(serie.dtype):
+            return serie.astype(self.tipo_texto)
+        return serie
+
+    @staticmethod
+    def _nombre_tipo(tipo: Any) -> str:
+        """Nombre de un dtype para el reporte ('string' indica también dónde guarda los valores)."""
+        if isinstance(tipo, pd.StringDtype) and str(tipo) == 'string':
+            return f"string[{tipo.storage}]"
+        return str(tipo)
+
+    @staticmethod
+    def _texto_arrow(tipo: Any) -> bool:
+        """Si un tipo de texto ya guarda sus valores en Arrow."""
+        if isinstance(tipo, pd.StringDtype):
+            return tipo.storage == 'pyarrow'
+        tipo_arrow = getattr(pd, 'ArrowDtype', None)
+        return tipo_arrow is not None and isinstance(tipo, tipo_arrow)
@@ -0,0 +1,256 @@
+"""
+Módulo de métricas por etapa para el consolidador de archivos.
+Mide tiempo, filas, bytes y memoria de cada etapa (y de cada archivo) de una
+consolidación, y opcionalmente perfila la ejecución completa.
+"""
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+import importlib.util
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Perfiladores admitidos y el módulo que requiere cada uno
+PERFILADORES = {'cprofile': 'cProfile', 'pyinstrument': 'pyinstrument'}
+
+
+def rss_pico_mb() -> Optional[float]:
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return pico / 1024 ** 2 if sys.platform == 'darwin' else pico / 1024
+
+
+class RegistroMetricas:
+    """
+    Acumula mediciones por (etapa, archivo).
+
+    Las mediciones repetidas de una misma etapa y archivo (por ejemplo, los
+    bloques de un CSV) se suman en un solo registro. Cada registro guarda
+    segundos, filas, bytes, llamadas y el pico de RSS del proceso al terminar;
+    con medir_memoria también el pico de tracemalloc durante la etapa.
+
+    tracemalloc es global al proceso, así que solo un registro por proceso
+    debe medir memoria (el del consolidador, o el de cada worker en modo
+    'procesos'). En modo 'hilos' los archivos se miden sin pico propio y el
+    pico de las etapas globales incluye lo que asignen los workers.
+
+    Solo contiene tipos básicos para poder devolverse desde un pool de procesos.
+    """
+
+    def __init__(self, medir_memoria: bool = False):
+        """
+        Args:
+            medir_memoria: Si registrar el pico de memoria de Python de cada
+                etapa con tracemalloc (hace más lenta la ejecución)
+        """
+        self.medir_memoria = medir_memoria
+        self._registros: Dict[tuple, Dict[str, Any]] = {}
+        self._inicio = time.perf_counter()
+        self._inicio_tracemalloc = False
+
+    @contextmanager
+    def medir(self, etapa: str, archivo: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Mide el tiempo (y la memoria) de un bloque de código.
+
+        Entrega un diccionario donde el bloque puede anotar 'filas', 'bytes'
+        y otros contadores numéricos propios de la etapa, que también se suman.
+
+        Args:
+            etapa: Nombre de la etapa ('lectura', 'guardado', ...)
+            archivo: Archivo al que pertenece la medición (None = global)
+        """
+        if self.medir_memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._inicio_tracemalloc = True
+            tracemalloc.reset_peak()
+
+        datos = {'filas': 0, 'bytes': 0}
+        inicio = time.perf_counter()
+        try:
+            yield datos
+        finally:
+            medicion = {
+                'etapa': etapa,
+                'archivo': archivo,
+                'segundos': time.perf_counter() - inicio,
+                'filas': int(datos['filas']),
+                'bytes': int(datos['bytes']),
+                'llamadas': 1,
+                'rss_pico_mb': rss_pico_mb(),
+            }
+            medicion.update({campo: valor for campo, valor in datos.items() if campo not in ('filas', 'bytes')})
+            if self.medir_memoria:
+                medicion['tracemalloc_pico_mb'] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            self._acumular(medicion)
+
+    def _acumular(self, medicion: Dict[str, Any]):
+        """Suma una medición al registro de su etapa y archivo."""
+        clave = (medicion['etapa'], medicion['archivo'])
+        registro = self._registros.get(clave)
+        if registro is None:
+            self._registros[clave] = dict(medicion)
+            return
+        for campo, valor in medicion.items():
+            if campo in ('etapa', 'archivo') or valor is None:
+                continue
+            if campo in ('rss_pico_mb', 'tracemalloc_pico_mb'):
+                registro[campo] = max(registro.get(campo) or 0.0, valor)
+            else:
+                registro[campo] = registro.get(campo, 0) + valor
+
+    @property
+    def mediciones(self) -> List[Dict[str, Any]]:
+        """Registros por (etapa, archivo), en orden de aparición."""
+        return [dict(registro) for registro in self._registros.values()]
+
+    def agregar(self, mediciones: List[Dict[str, Any]]):
+        """
+        Incorpora mediciones tomadas en otro registro (por ejemplo, en un worker).
+
+        Args:
+            mediciones: Lista retornada por `mediciones`
+        """
+        for medicion in mediciones:
+            self._acumular(medicion)
+
+    def detener(self):
+        """Detiene tracemalloc si lo inició este registro."""
+        if self._inicio_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._inicio_tracemalloc = False
+
+    def resumen(self) -> Dict[str, Any]:
+        """
+        Métricas de la ejecución, agregadas por etapa y por archivo.
+
+        Returns:
+            Diccionario con total_segundos, rss_pico_mb, por_etapa (segundos,
+            filas, bytes y llamadas de cada etapa), por_archivo (segundos,
+            filas y bytes de cada archivo) y la lista de mediciones
+        """
+        por_etapa: Dict[str, Dict[str, Any]] = {}
+        por_archivo: Dict[str, Dict[str, Any]] = {}
+        for registro in self._registros.values():
+            etapa = por_etapa.setdefault(registro['etapa'], {'segundos': 0.0, 'filas': 0, 'bytes': 0, 'llamadas': 0})
+            for campo in etapa:
+                etapa[campo] += registro[campo]
+            if registro['archivo'] is not None:
+                nombre = os.path.basename(registro['archivo'])
+                archivo = por_archivo.setdefault(nombre, {'segundos': 0.0, 'filas_leidas': 0, 'bytes_leidos': 0})
+                archivo['segundos'] += registro['segundos']
+                if registro['etapa'] in ('lectura', 'cache'):
+                    archivo['filas_leidas'] += registro['filas']
+                    archivo['bytes_leidos'] += registro['bytes']
+
+        return {
+            'total_segundos': time.perf_counter() - self._inicio,
+            'rss_pico_mb': rss_pico_mb(),
+            'medir_memoria': self.medir_memoria,
+            'por_etapa': por_etapa,
+            'por_archivo': dict(sorted(por_archivo.items(), key=lambda item: -item[1]['segundos'])),
+            'mediciones': self.mediciones,
+        }
+
+    def texto_resumen(self) -> str:
+        """Una línea con los segundos de cada etapa, para el log."""
+        resumen = self.resumen()
+        etapas = ", ".join(f"{etapa} {datos['segundos']:.2f}s" for etapa, datos in resumen['por_etapa'].items())
+        return f"Métricas: total {resumen['total_segundos']:.2f}s ({etapas})"
+
+    def exportar_json(self, ruta: str) -> str:
+        """
+        Guarda el resumen de métricas en un archivo JSON.
+
+        Args:
+            ruta: Ruta del archivo JSON
+
+        Returns:
+            Ruta absoluta del archivo escrito
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(self.resumen(), archivo, ensure_ascii=False, indent=2)
+        logger.info(f"Métricas exportadas: {ruta}")
+        return os.path.abspath(ruta)
+
+
+class Perfilador:
+    """
+    Perfila una ejecución completa con cProfile o pyinstrument.
+
+    cProfile solo ve el hilo que lo inicia: en los modos 'hilos' y 'procesos'
+    el trabajo de los workers no aparece en el perfil. pyinstrument es un
+    perfilador por muestreo y debe instalarse aparte.
+    """
+
+    def __init__(self, tipo: str, ruta: Optional[str] = None, directorio: Optional[str] = None):
+        """
+        Args:
+            tipo: 'cprofile' (genera .prof, legible con pstats o snakeviz) o
+                'pyinstrument' (genera un informe .html)
+            ruta: Archivo de salida (por defecto, perfil_<fecha>.<ext> en `directorio`)
+            directorio: Carpeta del archivo por defecto
+        """
+        validar_perfilador(tipo)
+        self.tipo = tipo
+        if ruta is None:
+            extension = 'prof' if tipo == 'cprofile' else 'html'
+            nombre = f"perfil_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+            ruta = os.path.join(directorio or os.getcwd(), nombre)
+        self.ruta = ruta
+        self._perfil = None
+
+    def iniciar(self):
+        """Comienza a perfilar."""
+        if self.tipo == 'cprofile':
+            import cProfile
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+        else:
+            from pyinstrument import Profiler
+            self._perfil = Profiler()
+            self._perfil.start()
+
+    def detener(self) -> Dict[str, Any]:
+        """
+        Termina de perfilar y guarda el informe.
+
+        Returns:
+            Diccionario con el tipo de perfilador y la ruta del informe
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        if self.tipo == 'cprofile':
+            self._perfil.disable()
+            self._perfil.dump_stats(self.ruta)
+        else:
+            self._perfil.stop()
+            with open(self.ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(self._perfil.output_html())
+        self._perfil = None
+        logger.info(f"Perfil guardado: {self.ruta}")
+        return {'perfilador': self.tipo, 'ruta': os.path.abspath(self.ruta)}
+
+
+def validar_perfilador(tipo: str):
+    """Lanza ValueError si el perfilador no existe o no está instalado."""
+    if tipo not in PERFILADORES:
+        raise ValueError(f"Perfilador no soportado: {tipo}. Use uno de {list(PERFILADORES)}")
+    if importlib.util.find_spec(PERFILADORES[tipo]) is None:
+        raise ValueError(f"El perfilador {tipo} no está instalado (pip install {tipo})")
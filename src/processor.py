@@ -3,13 +3,110 @@ Módulo principal de procesamiento para el consolidador de archivos.
 Maneja la lógica de consolidación y procesamiento de múltiples archivos.
 """
 
+import re
 import pandas as pd
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 import logging
-from .utils import FileProcessor, FileManager, DataAnalyzer
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .utils import (FileProcessor, FileManager, DataAnalyzer, ResumenIncremental, DeduplicadorIncremental,
+                    SelectorColumnas, FORMATOS_PERIODO, MOTORES_EXCEL)
+from .escritores import ESCRITORES
+from .esquema import DescubridorEsquema, PlanEsquema, ErrorEsquema, MODOS_ESQUEMA
+from .progreso import ProgresoConsolidacion, TokenCancelacion, ConsolidacionCancelada
+from .metricas import RegistroMetricas, Perfilador, validar_perfilador
+from .memoria import OptimizadorMemoria
+from .acumulador import AcumuladorColumnar, MODOS_CONSOLIDACION
 
 logger = logging.getLogger(__name__)
 
+# Modos de ejecución de la etapa de lectura/transformación por archivo
+MODOS_EJECUCION = ('secuencial', 'hilos', 'procesos')
+
+
+def _leer_y_procesar(archivo: str,
+                     opciones: Dict[str, Any],
+                     metricas: Optional[RegistroMetricas] = None) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Lee y transforma un único archivo.
+    
+    Se define a nivel de módulo para que pueda enviarse a un pool de procesos.
+    
+    Args:
+        archivo: Ruta del archivo a procesar
+        opciones: Opciones de lectura de Excel ('motor_excel', 'hojas_excel',
+            'columna_hoja_nombre'), 'optimizar_memoria' y argumentos
+            adicionales para FileProcessor.procesar_dataframe
+        metricas: Dónde registrar las etapas 'lectura', 'transformacion' y
+            'optimizacion'
+        
+    Returns:
+        Tupla (DataFrame procesado, columnas eliminadas)
+    """
+    if metricas is None:
+        metricas = RegistroMetricas()
+    opciones = dict(opciones)
+    motor_excel = opciones.pop('motor_excel', None)
+    hojas_excel = opciones.pop('hojas_excel', None)
+    columna_hoja_nombre = opciones.pop('columna_hoja_nombre', None)
+    optimizar_memoria = opciones.pop('optimizar_memoria', False)
+    selector = SelectorColumnas(opciones['columnas_a_ignorar'], opciones['columnas_a_incluir'])
+    
+    if hojas_excel is None:
+        with metricas.medir('lectura', archivo) as medicion:
+            df = FileProcessor.leer_archivo(archivo, usecols=selector, motor_excel=motor_excel)
+            medicion.update(filas=len(df), bytes=os.path.getsize(archivo))
+        with metricas.medir('transformacion', archivo) as medicion:
+            df_procesado, columnas_eliminadas = FileProcessor.procesar_dataframe(
+                df=df, nombre_archivo=archivo, columnas_origen=selector.columnas_origen, **opciones
+            )
+            medicion['filas'] = len(df_procesado)
+    else:
+        # Varias hojas por libro: los archivos sin hojas quedan con la columna de hoja vacía
+        with metricas.medir('lectura', archivo) as medicion:
+            if FileProcessor.tipo_archivo(archivo) in ('xlsx', 'xls'):
+                hojas = FileProcessor.leer_hojas_excel(
+                    archivo, usecols=selector, motor=motor_excel, patron=hojas_excel, max_workers=None
+                )
+            else:
+                hojas = {None: FileProcessor.leer_archivo(archivo, usecols=selector)}
+            medicion.update(filas=sum(len(df) for df in hojas.values()), bytes=os.path.getsize(archivo))
+        with metricas.medir('transformacion', archivo) as medicion:
+            df_procesado, columnas_eliminadas = FileProcessor.procesar_hojas(
+                hojas, nombre_archivo=archivo, columna_hoja_nombre=columna_hoja_nombre,
+                columnas_origen=selector.columnas_origen, **opciones
+            )
+            medicion['filas'] = len(df_procesado)
+    
+    if optimizar_memoria:
+        # Antes de concatenar: así cada archivo pendiente ocupa menos memoria
+        with metricas.medir('optimizacion', archivo) as medicion:
+            df_procesado, info = OptimizadorMemoria().optimizar(df_procesado)
+            medicion.update(filas=len(df_procesado), memoria_antes=info['memoria_antes'],
+                            memoria_despues=info['memoria_despues'])
+        logger.info(f"Memoria de {os.path.basename(archivo)}: {info['memoria_antes'] / 1e6:.1f} MB -> "
+                    f"{info['memoria_despues'] / 1e6:.1f} MB ({info['conversiones']})")
+    return df_procesado, columnas_eliminadas
+
+
+def _leer_y_procesar_medido(archivo: str, opciones: Dict[str, Any], medir_memoria: bool = False):
+    """
+    Igual que _leer_y_procesar, pero retorna también sus métricas.
+    
+    Para los pools: cada tarea mide en su propio registro (en un proceso hijo
+    no se puede escribir en el del consolidador) y el consumidor lo incorpora.
+    En un pool de hilos `medir_memoria` debe ser False: tracemalloc es global
+    al proceso y solo lo inicia y detiene el registro del consolidador.
+    
+    Returns:
+        Tupla ((DataFrame procesado, columnas eliminadas), lista de mediciones)
+    """
+    metricas = RegistroMetricas(medir_memoria)
+    try:
+        return _leer_y_procesar(archivo, opciones, metricas), metricas.mediciones
+    finally:
+        metricas.detener()
+
 
 class Consolidator:
     """Clase principal para consolidar archivos CSV y Excel."""
@@ -18,18 +115,75 @@ class Consolidator:
         self.file_processor = FileProcessor()
         self.file_manager = FileManager()
         self.data_analyzer = DataAnalyzer()
+        self.descubridor_esquema = DescubridorEsquema()
         
         # Configuración por defecto
         self.columna_1_nombre = "Archivo_Origen"
         self.columna_2_nombre = "Fecha_Procesamiento"
         self.eliminar_duplicados = False
+        self.columnas_duplicados = None
+        self.duplicados_ignorar_periodo = False
+        self.verificar_duplicados = False
+        self.compresion_salida = None
+        self.filas_por_grupo = None
+        self.motor_excel = None
+        self.hojas_excel = None
+        self.columna_hoja_nombre = "HOJA_ORIGEN"
         self.columnas_a_ignorar = []
+        self.columnas_a_incluir = None
+        self.formato_periodo = 'texto'
+        self.usar_cache = False
+        self.directorio_cache = None
+        self.cache_max_mb = 2048
+        self.cache_hash_contenido = False
+        self.cache = None
+        self.modo_ejecucion = 'secuencial'
+        self.max_workers = None
+        self.modo_streaming = False
+        self.tamano_bloque = None
+        self.modo_esquema = 'union'
+        self.esquema_estricto = False
+        self.optimizar_memoria = False
+        self.modo_consolidacion = 'concat'
+        self.medir_memoria = False
+        self.perfilador = None
+        self.ruta_perfil = None
+        self.ruta_metricas = None
+        self.progreso = ProgresoConsolidacion()
+        self.cancelacion = TokenCancelacion()
+        self.metricas = RegistroMetricas()
     
     def configurar(self, 
                    columna_1_nombre: str = "Archivo_Origen",
                    columna_2_nombre: str = "Fecha_Procesamiento",
                    columnas_a_ignorar: List[str] = None,
-                   eliminar_duplicados: bool = False):
+                   eliminar_duplicados: bool = False,
+                   modo_ejecucion: str = 'secuencial',
+                   max_workers: int = None,
+                   modo_streaming: bool = False,
+                   tamano_bloque: int = None,
+                   columnas_a_incluir: List[str] = None,
+                   formato_periodo: str = 'texto',
+                   usar_cache: bool = False,
+                   directorio_cache: str = None,
+                   cache_max_mb: int = 2048,
+                   cache_hash_contenido: bool = False,
+                   columnas_duplicados: List[str] = None,
+                   duplicados_ignorar_periodo: bool = False,
+                   verificar_duplicados: bool = False,
+                   compresion_salida: str = None,
+                   filas_por_grupo: int = None,
+                   motor_excel: str = None,
+                   hojas_excel: str = None,
+                   columna_hoja_nombre: str = "HOJA_ORIGEN",
+                   modo_esquema: str = 'union',
+                   esquema_estricto: bool = False,
+                   optimizar_memoria: bool = False,
+                   modo_consolidacion: str = 'concat',
+                   medir_memoria: bool = False,
+                   perfilador: str = None,
+                   ruta_perfil: str = None,
+                   ruta_metricas: str = None):
         """
         Configura los parámetros del consolidador.
         
@@ -38,24 +192,447 @@ class Consolidator:
             columna_2_nombre: Nombre de la segunda columna a agregar
             columnas_a_ignorar: Lista de columnas a ignorar
             eliminar_duplicados: Si eliminar duplicados del resultado final
+            modo_ejecucion: 'secuencial', 'hilos' (CSV, limitado por E/S) o
+                'procesos' (limitado por CPU) para leer y transformar los archivos
+            max_workers: Número máximo de workers del pool (None = automático)
+            modo_streaming: Si escribir cada archivo procesado directamente en la
+                salida en lugar de concatenar todo en memoria (CSV o xlsx)
+            tamano_bloque: En modo streaming, leer los CSV en bloques de este
+                número de filas (None = archivo completo)
+            columnas_a_incluir: Si se indica, solo se conservan estas columnas
+                (además de los periodos) y se ignora columnas_a_ignorar
+            formato_periodo: Tipo de las columnas de periodo: 'texto' (YYYYMM),
+                'entero' (Int32 compacto) o 'categoria'
+            usar_cache: Si reutilizar el resultado procesado de los archivos que
+                no cambiaron desde la última ejecución (caché en disco)
+            directorio_cache: Carpeta de la caché (por defecto, carpeta cache/)
+            cache_max_mb: Tamaño máximo de la caché; se eliminan las entradas
+                usadas hace más tiempo al superarlo
+            cache_hash_contenido: Detectar cambios por hash del contenido en
+                lugar de tamaño + fecha de modificación
+            columnas_duplicados: Columnas que definen un duplicado (None = todas)
+            duplicados_ignorar_periodo: No considerar las columnas de periodo
+                agregadas al comparar filas duplicadas
+            verificar_duplicados: Comparar los valores de las filas con el mismo
+                hash antes de descartarlas (más lento, sin falsos positivos)
+            compresion_salida: Compresión de la salida parquet/feather (None =
+                la del formato: snappy para parquet, lz4 para feather)
+            filas_por_grupo: Filas por row group (parquet) o record batch
+                (feather); None = valor de pyarrow
+            motor_excel: Motor de lectura de Excel ('calamine', 'openpyxl' o
+                'xlrd'); None elige el más rápido instalado
+            hojas_excel: Expresión regular de las hojas de Excel a consolidar
+                ('.*' = todas); None lee solo la primera hoja
+            columna_hoja_nombre: Columna con el nombre de la hoja de origen,
+                agregada tras los periodos cuando se usa hojas_excel
+            modo_esquema: 'union' (todas las columnas; las que falten en un
+                archivo quedan vacías) o 'interseccion' (solo las columnas
+                presentes en todos los archivos)
+            esquema_estricto: Fallar si los archivos difieren en columnas o
+                tipos, en lugar de unificarlos
+            optimizar_memoria: Convertir cada archivo a tipos compactos
+                (category, enteros/decimales reducidos, texto en Arrow) antes
+                de concatenar; el resumen informa la memoria antes y después
+            modo_consolidacion: 'concat' (guarda los DataFrames y los une con
+                pd.concat) o 'preasignado' (copia cada uno en columnas
+                reservadas para el total estimado de filas y lo libera;
+                menor pico de memoria)
+            medir_memoria: Registrar en las métricas el pico de tracemalloc de
+                cada etapa (más lento)
+            perfilador: 'cprofile' o 'pyinstrument' para perfilar cada
+                procesar_y_guardar (None = sin perfil)
+            ruta_perfil: Archivo del perfil (por defecto, en la carpeta generados)
+            ruta_metricas: Si se indica, exportar las métricas a este JSON
         """
+        if modo_ejecucion not in MODOS_EJECUCION:
+            raise ValueError(f"Modo de ejecución no soportado: {modo_ejecucion}")
+        if formato_periodo not in FORMATOS_PERIODO:
+            raise ValueError(f"Formato de periodo no soportado: {formato_periodo}")
+        if motor_excel is not None and motor_excel not in MOTORES_EXCEL:
+            raise ValueError(f"Motor de Excel no soportado: {motor_excel}")
+        if hojas_excel is not None:
+            try:
+                re.compile(hojas_excel)
+            except re.error as e:
+                raise ValueError(f"Patrón de hojas inválido '{hojas_excel}': {e}")
+        if modo_esquema not in MODOS_ESQUEMA:
+            raise ValueError(f"Modo de esquema no soportado: {modo_esquema}")
+        if modo_consolidacion not in MODOS_CONSOLIDACION:
+            raise ValueError(f"Modo de consolidación no soportado: {modo_consolidacion}")
+        if perfilador is not None:
+            validar_perfilador(perfilador)
+        
         self.columna_1_nombre = columna_1_nombre
         self.columna_2_nombre = columna_2_nombre
         self.columnas_a_ignorar = columnas_a_ignorar or []
         self.eliminar_duplicados = eliminar_duplicados
+        self.modo_ejecucion = modo_ejecucion
+        self.max_workers = max_workers
+        self.modo_streaming = modo_streaming
+        self.tamano_bloque = tamano_bloque
+        self.columnas_a_incluir = list(columnas_a_incluir) if columnas_a_incluir is not None else None
+        self.formato_periodo = formato_periodo
+        self.columnas_duplicados = list(columnas_duplicados) if columnas_duplicados else None
+        self.duplicados_ignorar_periodo = duplicados_ignorar_periodo
+        self.verificar_duplicados = verificar_duplicados
+        self.compresion_salida = compresion_salida
+        self.filas_por_grupo = filas_por_grupo
+        self.motor_excel = motor_excel
+        self.hojas_excel = hojas_excel
+        self.columna_hoja_nombre = columna_hoja_nombre
+        self.modo_esquema = modo_esquema
+        self.esquema_estricto = esquema_estricto
+        self.optimizar_memoria = optimizar_memoria
+        self.modo_consolidacion = modo_consolidacion
+        self.medir_memoria = medir_memoria
+        self.perfilador = perfilador
+        self.ruta_perfil = ruta_perfil
+        self.ruta_metricas = ruta_metricas
+        
+        configuracion_cache = (directorio_cache, cache_max_mb, cache_hash_contenido)
+        if configuracion_cache != (self.directorio_cache, self.cache_max_mb, self.cache_hash_contenido):
+            self.cache = None
+        self.usar_cache = usar_cache
+        self.directorio_cache = directorio_cache
+        self.cache_max_mb = cache_max_mb
+        self.cache_hash_contenido = cache_hash_contenido
         
         logger.info(f"Configuración actualizada: {self.__dict__}")
     
-    def procesar_archivos(self, archivos: List[str]) -> Dict[str, Any]:
+    def cancelar(self):
+        """Solicita cancelar la consolidación en curso (seguro desde otro hilo)."""
+        self.cancelacion.cancelar()
+    
+    def _preparar_seguimiento(self,
+                              progreso: Optional[ProgresoConsolidacion] = None,
+                              cancelacion: Optional[TokenCancelacion] = None,
+                              metricas: Optional[RegistroMetricas] = None):
+        """
+        Define el progreso, el token de cancelación y las métricas de la próxima ejecución.
+        
+        Los que no se indiquen se crean nuevos, para que una cancelación
+        anterior no afecte a la ejecución siguiente.
+        """
+        self.progreso = progreso if progreso is not None else ProgresoConsolidacion()
+        self.cancelacion = cancelacion if cancelacion is not None else TokenCancelacion()
+        self.metricas = metricas if metricas is not None else RegistroMetricas(self.medir_memoria)
+    
+    def _resultado_cancelado(self, archivos_procesados: List[str]) -> Dict[str, Any]:
+        """Resultado de una consolidación cancelada (no se guarda ningún archivo)."""
+        self.progreso.cambiar_etapa('cancelado')
+        logger.warning(f"Consolidación cancelada tras {len(archivos_procesados)} archivos")
+        return {
+            'exito': False,
+            'cancelado': True,
+            'error': 'Consolidación cancelada por el usuario',
+            'archivos_procesados': archivos_procesados,
+            'progreso': self.progreso.instantanea(),
+            'metricas': self.metricas.resumen()
+        }
+    
+    def _columnas_clave_duplicados(self, columnas: List[str]) -> Optional[List[str]]:
+        """
+        Columnas que definen una fila duplicada según la configuración.
+        
+        Args:
+            columnas: Columnas del consolidado
+            
+        Returns:
+            Lista de columnas, o None para comparar todas
+        """
+        if self.columnas_duplicados is None and not self.duplicados_ignorar_periodo:
+            return None
+        
+        clave = list(self.columnas_duplicados) if self.columnas_duplicados is not None else list(columnas)
+        if self.duplicados_ignorar_periodo:
+            periodos = (self.columna_1_nombre, self.columna_2_nombre)
+            clave = [col for col in clave if col not in periodos]
+        return clave
+    
+    def _reporte_memoria(self, df_consolidado: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Memoria de los archivos antes y después de optimizar sus tipos.
+        
+        Los datos por archivo vienen de la etapa 'optimizacion' de las
+        métricas (los archivos leídos de la caché ya estaban optimizados y no
+        aparecen).
+        
+        Args:
+            df_consolidado: Resultado de la concatenación
+            
+        Returns:
+            Diccionario con antes_mb, despues_mb, reduccion_pct, consolidado_mb
+            (y los totales en bytes) y el detalle por archivo
+        """
+        por_archivo = {}
+        antes = despues = 0
+        for medicion in self.metricas.mediciones:
+            if medicion['etapa'] == 'optimizacion':
+                # Los totales se suman en bytes: redondear cada archivo antes
+                # de sumar deja en 0 MB los archivos pequeños
+                antes += medicion['memoria_antes']
+                despues += medicion['memoria_despues']
+                por_archivo[os.path.basename(medicion['archivo'])] = {
+                    'antes_mb': round(medicion['memoria_antes'] / 1024 ** 2, 2),
+                    'despues_mb': round(medicion['memoria_despues'] / 1024 ** 2, 2),
+                }
+        return {
+            'antes_mb': round(antes / 1024 ** 2, 2),
+            'despues_mb': round(despues / 1024 ** 2, 2),
+            'antes_bytes': antes,
+            'despues_bytes': despues,
+            'reduccion_pct': round(100 * (1 - despues / antes), 1) if antes else 0.0,
+            'consolidado_mb': round(float(df_consolidado.memory_usage(deep=True).sum()) / 1024 ** 2, 2),
+            'por_archivo': por_archivo,
+        }
+    
+    def _opciones_procesamiento(self) -> Dict[str, Any]:
+        """Opciones de lectura y de FileProcessor.procesar_dataframe según la configuración actual."""
+        return {
+            'motor_excel': self.motor_excel,
+            'hojas_excel': self.hojas_excel,
+            'columna_hoja_nombre': self.columna_hoja_nombre,
+            'columnas_a_ignorar': self.columnas_a_ignorar,
+            'columnas_a_incluir': self.columnas_a_incluir,
+            'columna_1_nombre': self.columna_1_nombre,
+            'columna_2_nombre': self.columna_2_nombre,
+            'formato_periodo': self.formato_periodo,
+            'optimizar_memoria': self.optimizar_memoria
+        }
+    
+    def _iterar_resultados(self, archivos: List[str]):
+        """
+        Lee y transforma los archivos según el modo de ejecución configurado.
+        
+        Los resultados se entregan siempre en el mismo orden que `archivos`,
+        aunque se calculen en paralelo.
+        
+        Args:
+            archivos: Lista de rutas de archivos válidos
+            
+        Yields:
+            Tuplas (archivo, (df_procesado, columnas_eliminadas) o None, excepción o None)
+        """
+        opciones = self._opciones_procesamiento()
+        cache = self._obtener_cache()
+        
+        try:
+            if self.modo_ejecucion == 'secuencial' or len(archivos) < 2:
+                for archivo in archivos:
+                    clave, guardado = self._consultar_cache(cache, archivo, opciones)
+                    if guardado is not None:
+                        yield archivo, guardado, None
+                        continue
+                    logger.info(f"Procesando archivo: {archivo}")
+                    self.progreso.iniciar_archivo(archivo)
+                    try:
+                        resultado_archivo = _leer_y_procesar(archivo, opciones, self.metricas)
+                    except Exception as e:
+                        yield archivo, None, e
+                        continue
+                    if clave is not None:
+                        cache.guardar(clave, archivo, *resultado_archivo)
+                    yield archivo, resultado_archivo, None
+                    # Sin esta referencia el consumidor puede liberar el
+                    # DataFrame antes de que se lea el archivo siguiente
+                    del resultado_archivo
+                return
+            
+            pool = ProcessPoolExecutor if self.modo_ejecucion == 'procesos' else ThreadPoolExecutor
+            logger.info(f"Procesando {len(archivos)} archivos en paralelo ({self.modo_ejecucion}, workers={self.max_workers or 'auto'})")
+            
+            # Se limita la cantidad de archivos en vuelo para que los resultados
+            # pendientes de consumir no se acumulen en memoria.
+            en_vuelo = 2 * (self.max_workers or os.cpu_count() or 1)
+            
+            with pool(max_workers=self.max_workers) as executor:
+                pendientes = deque()
+                try:
+                    for archivo in archivos:
+                        clave, guardado = self._consultar_cache(cache, archivo, opciones)
+                        futuro = None
+                        if guardado is None:
+                            # tracemalloc es global al proceso: solo un worker de
+                            # 'procesos' puede medir su propio pico
+                            futuro = executor.submit(_leer_y_procesar_medido, archivo, opciones,
+                                                     self.metricas.medir_memoria and pool is ProcessPoolExecutor)
+                        pendientes.append((archivo, futuro, guardado, clave, cache))
+                        if len(pendientes) >= en_vuelo:
+                            self.progreso.iniciar_archivo(pendientes[0][0])
+                            yield self._resolver_futuro(*pendientes.popleft())
+                    while pendientes:
+                        self.progreso.iniciar_archivo(pendientes[0][0])
+                        yield self._resolver_futuro(*pendientes.popleft())
+                finally:
+                    # Si el consumidor se detiene antes (p. ej. por una
+                    # cancelación), no se inician los archivos pendientes
+                    for _, futuro, *_ in pendientes:
+                        if futuro is not None:
+                            futuro.cancel()
+        finally:
+            if cache is not None:
+                cache.persistir()
+    
+    def _obtener_cache(self):
+        """Retorna la caché de resultados si está activada (creándola la primera vez)."""
+        if not self.usar_cache:
+            return None
+        if self.cache is None:
+            from .cache import CacheResultados
+            self.cache = CacheResultados(
+                directorio=self.directorio_cache or self.file_manager.obtener_ruta_cache(),
+                max_bytes=self.cache_max_mb * 1024 * 1024,
+                hash_contenido=self.cache_hash_contenido
+            )
+        return self.cache
+    
+    def _consultar_cache(self, cache, archivo: str, opciones: Dict[str, Any]):
+        """
+        Busca el resultado de un archivo en la caché.
+        
+        Returns:
+            Tupla (clave o None, (df_procesado, columnas_eliminadas) o None)
+        """
+        if cache is None:
+            return None, None
+        with self.metricas.medir('cache', archivo) as medicion:
+            try:
+                clave = cache.clave(archivo, opciones)
+            except OSError as e:
+                # El error real se reportará al leer el archivo
+                logger.warning(f"No se pudo calcular la clave de caché de {archivo}: {e}")
+                return None, None
+            guardado = cache.obtener(clave)
+            if guardado is not None:
+                medicion['filas'] = len(guardado[0])
+        return clave, guardado
+    
+    def _iterar_bloques(self, archivos: List[str]):
+        """
+        Lee y transforma los archivos entregando cada uno como una secuencia de bloques.
+        
+        Sin tamano_bloque cada archivo es un único bloque (y se respeta el modo
+        de ejecución). Con tamano_bloque los archivos se procesan uno a uno y
+        sus bloques se leen y transforman a medida que se consumen.
+        
+        Args:
+            archivos: Lista de rutas de archivos válidos
+            
+        Yields:
+            Tuplas (archivo, iterable de (df_procesado, columnas_eliminadas) o None, excepción o None)
+        """
+        if not self.tamano_bloque:
+            for archivo, resultado_archivo, error in self._iterar_resultados(archivos):
+                yield archivo, ([resultado_archivo] if error is None else None), error
+            return
+        
+        if self.modo_ejecucion != 'secuencial':
+            logger.info("La lectura por bloques procesa los archivos de a uno; se ignora el modo de ejecución")
+        
+        opciones = self._opciones_procesamiento()
+        for archivo in archivos:
+            logger.info(f"Procesando archivo: {archivo}")
+            self.progreso.iniciar_archivo(archivo)
+            yield archivo, self._procesar_por_bloques(archivo, opciones), None
+    
+    def _procesar_por_bloques(self, archivo: str, opciones: Dict[str, Any]):
+        """Genera (df_procesado, columnas_eliminadas) para cada bloque de un archivo."""
+        if self.hojas_excel is not None and FileProcessor.tipo_archivo(archivo) in ('xlsx', 'xls'):
+            # Los Excel se leen completos de todos modos; así se unen sus hojas
+            yield _leer_y_procesar(archivo, opciones, self.metricas)
+            return
+        
+        opciones = dict(opciones)
+        motor_excel = opciones.pop('motor_excel', None)
+        hojas_excel = opciones.pop('hojas_excel', None)
+        columna_hoja_nombre = opciones.pop('columna_hoja_nombre', None)
+        opciones.pop('optimizar_memoria', None)
+        selector = SelectorColumnas(self.columnas_a_ignorar, self.columnas_a_incluir)
+        bloques = self.file_processor.leer_archivo_por_bloques(
+            archivo, self.tamano_bloque, usecols=selector, motor_excel=motor_excel
+        )
+        tamano_archivo = os.path.getsize(archivo)
+        while True:
+            with self.metricas.medir('lectura', archivo) as medicion:
+                bloque = next(bloques, None)
+                if bloque is not None:
+                    # Los bytes del archivo se cuentan con el primer bloque
+                    medicion.update(filas=len(bloque), bytes=tamano_archivo)
+                    tamano_archivo = 0
+            if bloque is None:
+                return
+            with self.metricas.medir('transformacion', archivo) as medicion:
+                if hojas_excel is not None:
+                    resultado = self.file_processor.procesar_hojas(
+                        {None: bloque}, nombre_archivo=archivo, columna_hoja_nombre=columna_hoja_nombre,
+                        columnas_origen=selector.columnas_origen, **opciones
+                    )
+                else:
+                    resultado = self.file_processor.procesar_dataframe(
+                        df=bloque, nombre_archivo=archivo, columnas_origen=selector.columnas_origen, **opciones
+                    )
+                medicion['filas'] = len(resultado[0])
+            yield resultado
+    
+    def _resolver_futuro(self, archivo: str, futuro, guardado=None, clave=None, cache=None):
+        """
+        Espera un futuro y lo convierte en la tupla que entrega _iterar_resultados.
+        
+        Si el resultado ya venía de la caché (`guardado`) no hay futuro que
+        esperar; si se calculó y hay `clave`, se guarda en la caché. Las
+        métricas medidas por el worker se suman a self.metricas.
+        """
+        if guardado is not None:
+            return archivo, guardado, None
+        try:
+            resultado_archivo, mediciones = futuro.result()
+        except Exception as e:
+            return archivo, None, e
+        self.metricas.agregar(mediciones)
+        if clave is not None:
+            cache.guardar(clave, archivo, *resultado_archivo)
+        return archivo, resultado_archivo, None
+    
+    def _estimar_filas(self, archivos: List[str]) -> int:
+        """
+        Total estimado de filas de los archivos, sin parsearlos (en paralelo).
+        
+        Los archivos que no se pueden estimar cuentan como 0; si la estimación
+        se queda corta, el acumulador crece.
+        """
+        def estimar(archivo):
+            try:
+                return FileProcessor.estimar_filas(archivo, self.hojas_excel)
+            except Exception as e:
+                logger.warning(f"No se pudieron estimar las filas de {os.path.basename(archivo)}: {e}")
+                return 0
+        
+        if len(archivos) < 2:
+            return sum(estimar(archivo) for archivo in archivos)
+        with ThreadPoolExecutor(max_workers=min(8, len(archivos))) as executor:
+            return sum(executor.map(estimar, archivos))
+    
+    def procesar_archivos(self,
+                          archivos: List[str],
+                          progreso: Optional[ProgresoConsolidacion] = None,
+                          cancelacion: Optional[TokenCancelacion] = None,
+                          metricas: Optional[RegistroMetricas] = None) -> Dict[str, Any]:
         """
         Procesa múltiples archivos y los consolida.
         
         Args:
             archivos: Lista de rutas de archivos a procesar
+            progreso: Dónde informar el avance (por defecto, uno nuevo en self.progreso)
+            cancelacion: Token que se consulta entre archivos y entre etapas
+                (por defecto, uno nuevo en self.cancelacion)
+            metricas: Dónde registrar las métricas por etapa (por defecto, uno
+                nuevo en self.metricas)
             
         Returns:
-            Diccionario con el resultado del procesamiento
+            Diccionario con el resultado del procesamiento; si se canceló,
+            'exito' es False y 'cancelado' es True
         """
+        self._preparar_seguimiento(progreso, cancelacion, metricas)
         logger.info(f"Iniciando procesamiento de {len(archivos)} archivos")
         
         # Validar archivos
@@ -77,56 +654,119 @@ class Consolidator:
         errores = []
         columnas_eliminadas_por_archivo = {}
         
-        for archivo in validacion['validos']:
-            try:
-                logger.info(f"Procesando archivo: {archivo}")
-                
-                # Leer archivo
-                df = self.file_processor.leer_archivo(archivo)
-                
-                # Procesar DataFrame
-                df_procesado, columnas_eliminadas = self.file_processor.procesar_dataframe(
-                    df=df,
-                    nombre_archivo=archivo,
-                    columnas_a_ignorar=self.columnas_a_ignorar,
-                    columna_1_nombre=self.columna_1_nombre,
-                    columna_2_nombre=self.columna_2_nombre
-                )
+        acumulador = None
+        if self.modo_consolidacion == 'preasignado':
+            if self.esquema_estricto:
+                # Las diferencias de columnas se detectan antes de leer datos
+                try:
+                    self._plan_esquema_salida(validacion['validos']).verificar()
+                except ErrorEsquema as e:
+                    logger.error(str(e))
+                    return {'exito': False, 'error': str(e), 'errores': errores, 'esquema': e.reporte}
+            with self.metricas.medir('estimacion') as medicion:
+                medicion['filas'] = self._estimar_filas(validacion['validos'])
+            logger.info(f"Filas estimadas: {medicion['filas']}")
+            acumulador = AcumuladorColumnar(medicion['filas'], self.modo_esquema)
+        
+        self.progreso.iniciar(validacion['validos'])
+        for archivo, resultado_archivo, error in self._iterar_resultados(validacion['validos']):
+            if error is not None:
+                error_msg = f"Error procesando {archivo}: {str(error)}"
+                logger.error(error_msg)
+                errores.append(error_msg)
+                self.progreso.completar_archivo(archivo, error=True)
+            else:
+                df_procesado, columnas_eliminadas = resultado_archivo
+                filas = len(df_procesado)
                 
-                dataframes.append(df_procesado)
+                if acumulador is not None:
+                    with self.metricas.medir('concatenacion', archivo) as medicion:
+                        acumulador.agregar(archivo, df_procesado)
+                        medicion['filas'] = filas
+                    # El DataFrame ya está copiado: se libera antes de leer el siguiente
+                    del df_procesado, resultado_archivo
+                else:
+                    dataframes.append(df_procesado)
                 archivos_procesados.append(archivo)
                 columnas_eliminadas_por_archivo[os.path.basename(archivo)] = columnas_eliminadas
+                self.progreso.completar_archivo(archivo, filas=filas)
                 
-                logger.info(f"Archivo {archivo} procesado exitosamente: {len(df_procesado)} registros")
-                
-            except Exception as e:
-                error_msg = f"Error procesando {archivo}: {str(e)}"
-                logger.error(error_msg)
-                errores.append(error_msg)
-                continue
+                logger.info(f"Archivo {archivo} procesado exitosamente: {filas} registros")
+            
+            if self.cancelacion.cancelado:
+                return self._resultado_cancelado(archivos_procesados)
         
-        if not dataframes:
+        if not archivos_procesados:
             return {
                 'exito': False,
                 'error': 'No se pudo procesar ningún archivo válido',
                 'errores': errores
             }
         
+        # Unificar columnas y tipos: cada DataFrame se convierte una sola vez
+        # y la concatenación ya no reindexa ni promueve tipos
+        self.progreso.cambiar_etapa('consolidacion')
+        with self.metricas.medir('esquema') as medicion:
+            if acumulador is not None:
+                plan = acumulador.plan()
+            else:
+                plan = PlanEsquema.desde_dataframes(list(zip(archivos_procesados, dataframes)), self.modo_esquema)
+            plan.registrar()
+            if self.esquema_estricto:
+                try:
+                    plan.verificar()
+                except ErrorEsquema as e:
+                    logger.error(str(e))
+                    return {
+                        'exito': False,
+                        'error': str(e),
+                        'errores': errores,
+                        'esquema': e.reporte
+                    }
+            for i, df in enumerate(dataframes):
+                dataframes[i] = plan.alinear(df)
+            medicion['filas'] = acumulador.filas if acumulador is not None else sum(len(df) for df in dataframes)
+        
         # Consolidar DataFrames
         logger.info("Consolidando DataFrames...")
-        df_consolidado = pd.concat(dataframes, ignore_index=True)
+        with self.metricas.medir('concatenacion') as medicion:
+            if acumulador is not None:
+                df_consolidado = acumulador.finalizar(plan)
+                if acumulador.crecimientos:
+                    logger.warning(f"La estimación de filas se superó {acumulador.crecimientos} veces")
+            else:
+                df_consolidado = pd.concat(dataframes, ignore_index=True)
+                dataframes.clear()
+            medicion['filas'] = len(df_consolidado)
+        
+        if self.cancelacion.cancelado:
+            return self._resultado_cancelado(archivos_procesados)
         
-        # Eliminar duplicados si se solicita
+        # Detectar (y eliminar si se solicita) duplicados en una sola pasada
+        self.progreso.cambiar_etapa('duplicados')
         duplicados_eliminados = 0
+        with self.metricas.medir('duplicados') as medicion:
+            info_duplicados = self.data_analyzer.analizar_duplicados(
+                df_consolidado,
+                columnas_clave=self._columnas_clave_duplicados(list(df_consolidado.columns)),
+                eliminar=self.eliminar_duplicados,
+                verificacion_exacta=self.verificar_duplicados
+            )
+            medicion['filas'] = len(df_consolidado)
         if self.eliminar_duplicados:
-            antes = len(df_consolidado)
-            df_consolidado = df_consolidado.drop_duplicates().reset_index(drop=True)
-            duplicados_eliminados = antes - len(df_consolidado)
+            df_consolidado = info_duplicados.pop('dataframe')
+            duplicados_eliminados = info_duplicados['total_duplicados']
             logger.info(f"Duplicados eliminados: {duplicados_eliminados}")
+            # Tras eliminarlos, el consolidado ya no tiene duplicados
+            info_duplicados.update(tiene_duplicados=False, total_duplicados=0,
+                                   indices_duplicados=[], indices_truncados=False)
         
         # Generar resumen
-        resumen = self.data_analyzer.generar_resumen(df_consolidado, archivos_procesados)
-        info_duplicados = self.data_analyzer.detectar_duplicados(df_consolidado)
+        with self.metricas.medir('resumen') as medicion:
+            resumen = self.data_analyzer.generar_resumen(df_consolidado, archivos_procesados)
+            if self.optimizar_memoria:
+                resumen['memoria'] = self._reporte_memoria(df_consolidado)
+            medicion['filas'] = len(df_consolidado)
         
         resultado = {
             'exito': True,
@@ -137,7 +777,10 @@ class Consolidator:
             'columnas_eliminadas_por_archivo': columnas_eliminadas_por_archivo,
             'duplicados_eliminados': duplicados_eliminados,
             'resumen': resumen,
-            'info_duplicados': info_duplicados
+            'info_duplicados': info_duplicados,
+            'esquema': plan.reporte(),
+            'cache': self.cache.estadisticas() if self.usar_cache and self.cache else None,
+            'metricas': self.metricas.resumen()
         }
         
         logger.info(f"Procesamiento completado: {resumen['total_registros']} registros, {resumen['total_columnas']} columnas")
@@ -146,31 +789,34 @@ class Consolidator:
     def guardar_consolidado(self, 
                            df: pd.DataFrame, 
                            formato: str = 'csv',
-                           nombre_personalizado: str = None) -> Dict[str, Any]:
+                           nombre_personalizado: str = None,
+                           ruta_salida: str = None) -> Dict[str, Any]:
         """
         Guarda el DataFrame consolidado en el formato especificado.
         
         Args:
             df: DataFrame consolidado
-            formato: Formato de salida ('csv' o 'xlsx')
+            formato: Formato de salida ('csv', 'xlsx', 'parquet' o 'feather')
             nombre_personalizado: Nombre personalizado para el archivo (opcional)
+            ruta_salida: Ruta completa del archivo de salida (opcional; tiene
+                prioridad sobre nombre_personalizado y la carpeta generados)
             
         Returns:
             Diccionario con el resultado del guardado
         """
         try:
-            # Determinar nombre del archivo
-            if nombre_personalizado:
-                nombre_archivo = f"{nombre_personalizado}.{formato.lower()}"
-            else:
-                nombre_archivo = self.file_manager.crear_nombre_archivo_salida(formato)
-            
-            # Obtener ruta de salida
-            ruta_generados = self.file_manager.obtener_ruta_generados()
-            ruta_completa = os.path.join(ruta_generados, nombre_archivo)
+            nombre_archivo, ruta_completa = self._ruta_salida(formato, nombre_personalizado, ruta_salida)
             
             # Guardar archivo
-            exito = self.file_processor.guardar_archivo(df, ruta_completa, formato)
+            with self.metricas.medir('guardado') as medicion:
+                exito = self.file_processor.guardar_archivo(
+                    df, ruta_completa, formato,
+                    compresion=self.compresion_salida,
+                    filas_por_grupo=self.filas_por_grupo
+                )
+                medicion['filas'] = len(df)
+                if exito:
+                    medicion['bytes'] = os.path.getsize(ruta_completa)
             
             if exito:
                 return {
@@ -194,42 +840,331 @@ class Consolidator:
                 'error': f'Error al guardar el archivo: {str(e)}'
             }
     
+    def _ruta_salida(self, 
+                     formato: str, 
+                     nombre_personalizado: str = None,
+                     ruta_salida: str = None) -> Tuple[str, str]:
+        """
+        Determina el nombre y la ruta completa del archivo de salida.
+        
+        Args:
+            formato: Formato de salida ('csv', 'xlsx', 'parquet' o 'feather')
+            nombre_personalizado: Nombre personalizado para el archivo (opcional)
+            ruta_salida: Ruta completa del archivo de salida (opcional; tiene
+                prioridad sobre nombre_personalizado y la carpeta generados)
+            
+        Returns:
+            Tupla (nombre del archivo, ruta completa)
+        """
+        if ruta_salida:
+            return os.path.basename(ruta_salida), os.path.abspath(ruta_salida)
+        
+        if nombre_personalizado:
+            nombre_archivo = f"{nombre_personalizado}.{formato.lower()}"
+        else:
+            nombre_archivo = self.file_manager.crear_nombre_archivo_salida(formato)
+        
+        ruta_generados = self.file_manager.obtener_ruta_generados()
+        return nombre_archivo, os.path.join(ruta_generados, nombre_archivo)
+    
+    def _plan_esquema_salida(self, archivos: List[str]) -> PlanEsquema:
+        """
+        Calcula las columnas del consolidado a partir de los encabezados.
+        
+        Reproduce el orden que tendría pd.concat sobre los DataFrames procesados:
+        primero las dos columnas de periodo (y la de hoja, si se consolidan
+        varias hojas) y luego la unión (o intersección, según modo_esquema) de
+        columnas en orden de aparición, sin las columnas ignoradas (o no
+        incluidas). Sin leer datos no hay tipos: el plan solo define columnas.
+        
+        Args:
+            archivos: Lista de archivos válidos
+            
+        Returns:
+            PlanEsquema con las columnas de salida
+        """
+        fijas = [self.columna_2_nombre, self.columna_1_nombre]
+        if self.hojas_excel is not None:
+            fijas.append(self.columna_hoja_nombre)
+        selector = SelectorColumnas(self.columnas_a_ignorar, self.columnas_a_incluir)
+        
+        # Los archivos cuyo encabezado no se pueda leer se reportarán al procesarlos
+        encabezados = [
+            (archivo, [columna for columna in columnas if selector.conservar(columna) and columna not in fijas])
+            for archivo, columnas in self.descubridor_esquema.descubrir(archivos, self.hojas_excel).items()
+        ]
+        return PlanEsquema.desde_encabezados(encabezados, self.modo_esquema, fijas)
+    
+    def procesar_y_guardar_streaming(self, 
+                                     archivos: List[str], 
+                                     formato: str = 'csv',
+                                     nombre_personalizado: str = None,
+                                     ruta_salida: str = None,
+                                     progreso: Optional[ProgresoConsolidacion] = None,
+                                     cancelacion: Optional[TokenCancelacion] = None,
+                                     metricas: Optional[RegistroMetricas] = None) -> Dict[str, Any]:
+        """
+        Procesa archivos escribiendo cada resultado directamente en la salida.
+        
+        A diferencia de procesar_archivos, nunca mantiene el consolidado completo
+        en memoria: cada archivo (o cada bloque, si se configuró tamano_bloque)
+        se lee, se transforma y se agrega al archivo de salida. Si se eliminan
+        duplicados, solo se recuerda un hash por fila distinta.
+        
+        Args:
+            archivos: Lista de archivos a procesar
+            formato: Formato de salida ('csv' o 'xlsx')
+            nombre_personalizado: Nombre personalizado para el archivo (opcional)
+            ruta_salida: Ruta completa del archivo de salida (opcional; tiene
+                prioridad sobre nombre_personalizado y la carpeta generados)
+            progreso: Dónde informar el avance (por defecto, uno nuevo en self.progreso)
+            cancelacion: Token que se consulta entre bloques; al cancelar se
+                descarta la salida parcial (por defecto, uno nuevo en self.cancelacion)
+            metricas: Dónde registrar las métricas por etapa (por defecto, uno
+                nuevo en self.metricas)
+            
+        Returns:
+            Diccionario con el resultado completo (sin la clave 'dataframe')
+        """
+        self._preparar_seguimiento(progreso, cancelacion, metricas)
+        logger.info(f"Iniciando procesamiento en streaming de {len(archivos)} archivos")
+        
+        validacion = self.file_manager.validar_archivos(archivos)
+        
+        if validacion['total_validos'] == 0:
+            return {
+                'exito': False,
+                'error': 'No hay archivos válidos para procesar',
+                'archivos_invalidos': validacion['invalidos']
+            }
+        
+        if validacion['total_invalidos'] > 0:
+            logger.warning(f"Archivos inválidos encontrados: {validacion['invalidos']}")
+        
+        with self.metricas.medir('esquema'):
+            plan = self._plan_esquema_salida(validacion['validos'])
+        plan.registrar()
+        if self.esquema_estricto:
+            try:
+                plan.verificar()
+            except ErrorEsquema as e:
+                logger.error(str(e))
+                return {
+                    'exito': False,
+                    'error': str(e),
+                    'esquema': e.reporte
+                }
+        columnas_salida = plan.columnas
+        nombre_archivo, ruta_completa = self._ruta_salida(formato, nombre_personalizado, ruta_salida)
+        escritor = ESCRITORES[formato.lower()](ruta_completa, columnas_salida)
+        acumulador = ResumenIncremental(columnas_salida)
+        deduplicador = None
+        if self.eliminar_duplicados:
+            deduplicador = DeduplicadorIncremental(
+                self._columnas_clave_duplicados(columnas_salida) or columnas_salida,
+                verificacion_exacta=self.verificar_duplicados
+            )
+        
+        archivos_procesados = []
+        errores = []
+        columnas_eliminadas_por_archivo = {}
+        
+        self.progreso.iniciar(validacion['validos'])
+        try:
+            for archivo, bloques, error in self._iterar_bloques(validacion['validos']):
+                if error is None:
+                    # Si un bloque falla, se deshace lo ya escrito de este archivo
+                    escritor.punto_control()
+                    if deduplicador is not None:
+                        deduplicador.punto_control()
+                    parcial = ResumenIncremental()
+                    columnas_eliminadas = []
+                    try:
+                        for df_procesado, columnas_eliminadas in bloques:
+                            self.progreso.agregar_filas(len(df_procesado))
+                            if deduplicador is not None:
+                                with self.metricas.medir('duplicados', archivo) as medicion:
+                                    medicion['filas'] = len(df_procesado)
+                                    df_procesado = deduplicador.filtrar(df_procesado)
+                            with self.metricas.medir('escritura', archivo) as medicion:
+                                escritor.escribir(df_procesado)
+                                medicion['filas'] = len(df_procesado)
+                            with self.metricas.medir('resumen', archivo):
+                                parcial.agregar(df_procesado)
+                            self.cancelacion.verificar()
+                    except Exception as e:
+                        escritor.revertir()
+                        if deduplicador is not None:
+                            deduplicador.revertir()
+                        error = e
+                
+                if isinstance(error, ConsolidacionCancelada) or self.cancelacion.cancelado:
+                    escritor.descartar()
+                    return self._resultado_cancelado(archivos_procesados)
+                
+                self.progreso.completar_archivo(archivo, error=error is not None)
+                if error is not None:
+                    error_msg = f"Error procesando {archivo}: {str(error)}"
+                    logger.error(error_msg)
+                    errores.append(error_msg)
+                    continue
+                
+                acumulador.combinar(parcial)
+                archivos_procesados.append(archivo)
+                columnas_eliminadas_por_archivo[os.path.basename(archivo)] = columnas_eliminadas
+                
+                logger.info(f"Archivo {archivo} procesado y escrito: {parcial.total_registros} registros")
+            
+            if not archivos_procesados:
+                escritor.descartar()
+                return {
+                    'exito': False,
+                    'error': 'No se pudo procesar ningún archivo válido',
+                    'errores': errores
+                }
+            
+            self.progreso.cambiar_etapa('guardado')
+            with self.metricas.medir('guardado') as medicion:
+                escritor.cerrar()
+                medicion.update(filas=escritor.registros, bytes=os.path.getsize(ruta_completa))
+            
+        except Exception as e:
+            escritor.descartar()
+            logger.error(f"Error al guardar consolidado: {str(e)}")
+            return {
+                'exito': False,
+                'error': f'Error al guardar el archivo: {str(e)}',
+                'errores': errores
+            }
+        
+        with self.metricas.medir('resumen'):
+            resumen = acumulador.generar(archivos_procesados)
+        logger.info(f"Procesamiento completado: {resumen['total_registros']} registros, {resumen['total_columnas']} columnas")
+        
+        duplicados_eliminados = deduplicador.duplicados_eliminados if deduplicador is not None else 0
+        if deduplicador is not None:
+            logger.info(f"Duplicados eliminados: {duplicados_eliminados}")
+        
+        self.progreso.cambiar_etapa('finalizado')
+        return {
+            'exito': True,
+            'dataframe': None,
+            'archivos_procesados': archivos_procesados,
+            'archivos_con_errores': errores,
+            'archivos_invalidos': validacion['invalidos'],
+            'columnas_eliminadas_por_archivo': columnas_eliminadas_por_archivo,
+            'duplicados_eliminados': duplicados_eliminados,
+            'resumen': resumen,
+            'info_duplicados': None,
+            'esquema': plan.reporte(),
+            'cache': self.cache.estadisticas() if self.usar_cache and self.cache else None,
+            'guardado': {
+                'exito': True,
+                'ruta_archivo': ruta_completa,
+                'nombre_archivo': nombre_archivo,
+                'formato': formato,
+                'registros': escritor.registros,
+                'columnas': len(columnas_salida)
+            },
+            'progreso': self.progreso.instantanea(),
+            'metricas': self.metricas.resumen()
+        }
+    
     def procesar_y_guardar(self, 
                           archivos: List[str], 
                           formato: str = 'csv',
-                          nombre_personalizado: str = None) -> Dict[str, Any]:
+                          nombre_personalizado: str = None,
+                          ruta_salida: str = None,
+                          progreso: Optional[ProgresoConsolidacion] = None,
+                          cancelacion: Optional[TokenCancelacion] = None,
+                          metricas: Optional[RegistroMetricas] = None) -> Dict[str, Any]:
         """
         Procesa archivos y guarda el resultado consolidado.
         
+        El avance se informa en `progreso` (o self.progreso), que puede leerse
+        desde otro hilo con instantanea(). La cancelación es cooperativa: se
+        comprueba entre archivos, entre bloques y antes de guardar.
+        
+        El resultado incluye 'metricas' (tiempo, filas, bytes y memoria por
+        etapa y por archivo); se exportan a JSON si se configuró ruta_metricas,
+        y con `perfilador` la ejecución completa se perfila ('perfil').
+        
         Args:
             archivos: Lista de archivos a procesar
-            formato: Formato de salida ('csv' o 'xlsx')
+            formato: Formato de salida ('csv', 'xlsx', 'parquet' o 'feather')
             nombre_personalizado: Nombre personalizado para el archivo (opcional)
+            ruta_salida: Ruta completa del archivo de salida (opcional; tiene
+                prioridad sobre nombre_personalizado y la carpeta generados)
+            progreso: Dónde informar el avance (opcional)
+            cancelacion: Token para cancelar desde otro hilo (opcional; también
+                se puede usar cancelar())
+            metricas: Dónde registrar las métricas por etapa (opcional)
             
         Returns:
             Diccionario con el resultado completo
         """
+        self._preparar_seguimiento(progreso, cancelacion, metricas)
+        perfilador = None
+        if self.perfilador is not None:
+            perfilador = Perfilador(self.perfilador, self.ruta_perfil,
+                                    directorio=self.file_manager.obtener_ruta_generados())
+            perfilador.iniciar()
+        
+        try:
+            resultado = self._procesar_y_guardar(archivos, formato, nombre_personalizado, ruta_salida)
+        finally:
+            info_perfil = perfilador.detener() if perfilador is not None else None
+            self.metricas.detener()
+        
+        resultado['metricas'] = self.metricas.resumen()
+        logger.info(self.metricas.texto_resumen())
+        if self.ruta_metricas:
+            resultado['metricas']['ruta'] = self.metricas.exportar_json(self.ruta_metricas)
+        if info_perfil is not None:
+            resultado['perfil'] = info_perfil
+        return resultado
+    
+    def _procesar_y_guardar(self, 
+                            archivos: List[str], 
+                            formato: str,
+                            nombre_personalizado: str = None,
+                            ruta_salida: str = None) -> Dict[str, Any]:
+        """Cuerpo de procesar_y_guardar, con el seguimiento ya preparado."""
+        if self.modo_streaming:
+            if formato.lower() not in ESCRITORES:
+                logger.warning(f"El modo streaming solo admite {list(ESCRITORES)}; "
+                               f"se usará el modo en memoria para {formato}")
+            else:
+                return self.procesar_y_guardar_streaming(archivos, formato, nombre_personalizado, ruta_salida,
+                                                         self.progreso, self.cancelacion, self.metricas)
+        
         # Procesar archivos
-        resultado_procesamiento = self.procesar_archivos(archivos)
+        resultado_procesamiento = self.procesar_archivos(archivos, self.progreso, self.cancelacion, self.metricas)
         
         if not resultado_procesamiento['exito']:
             return resultado_procesamiento
         
+        if self.cancelacion.cancelado:
+            return self._resultado_cancelado(resultado_procesamiento['archivos_procesados'])
+        
         # Guardar resultado
+        self.progreso.cambiar_etapa('guardado')
         resultado_guardado = self.guardar_consolidado(
             df=resultado_procesamiento['dataframe'],
             formato=formato,
-            nombre_personalizado=nombre_personalizado
+            nombre_personalizado=nombre_personalizado,
+            ruta_salida=ruta_salida
         )
         
         # Combinar resultados
+        self.progreso.cambiar_etapa('finalizado')
         resultado_final = {
             **resultado_procesamiento,
-            'guardado': resultado_guardado
+            'guardado': resultado_guardado,
+            'progreso': self.progreso.instantanea()
         }
         
         return resultado_final
 
-
 # Importar os para uso en el módulo
 import os
@@ -0,0 +1,195 @@
+"""
+Módulo de seguimiento del progreso y cancelación de la consolidación.
+El consolidador informa su avance a un ProgresoConsolidacion y consulta un
+TokenCancelacion; la interfaz los lee desde otro hilo sin bloquearse.
+"""
+
+import os
+import time
+import threading
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Etapas de una consolidación, en orden
+ETAPAS = ('inicio', 'lectura', 'consolidacion', 'duplicados', 'guardado', 'finalizado', 'cancelado')
+
+
+class ConsolidacionCancelada(Exception):
+    """La consolidación se detuvo porque se solicitó su cancelación."""
+
+
+class TokenCancelacion:
+    """
+    Solicitud de cancelación cooperativa, compartida entre hilos.
+
+    El consolidador la consulta entre archivos, entre bloques y entre etapas;
+    lo que esté en curso en ese momento (por ejemplo, leer un archivo) termina
+    antes de que la cancelación tenga efecto.
+    """
+
+    def __init__(self):
+        self._evento = threading.Event()
+
+    def cancelar(self):
+        """Solicita la cancelación."""
+        if not self._evento.is_set():
+            logger.info("Cancelación solicitada")
+        self._evento.set()
+
+    @property
+    def cancelado(self) -> bool:
+        """Si se solicitó la cancelación."""
+        return self._evento.is_set()
+
+    def verificar(self):
+        """Lanza ConsolidacionCancelada si se solicitó la cancelación."""
+        if self._evento.is_set():
+            raise ConsolidacionCancelada("Consolidación cancelada por el usuario")
+
+
+class ProgresoConsolidacion:
+    """
+    Estado del avance de una consolidación, seguro entre hilos.
+
+    El avance se mide en bytes de los archivos de entrada: un archivo suma su
+    tamaño al terminar de leerse (con o sin error). A partir de eso se estiman
+    la fracción completada y el tiempo restante; las filas por segundo se
+    calculan sobre las filas leídas.
+    """
+
+    def __init__(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Args:
+            callback: Función opcional que recibe `instantanea()` en cada
+                actualización. Se llama desde el hilo que procesa, así que no
+                debe tocar widgets de Tkinter directamente.
+        """
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._reiniciar([])
+
+    def _reiniciar(self, archivos: List[str]):
+        """Vuelve al estado inicial para los archivos indicados."""
+        self._tamanos = {}
+        for archivo in archivos:
+            try:
+                self._tamanos[archivo] = os.path.getsize(archivo)
+            except OSError:
+                self._tamanos[archivo] = 0
+        self._etapa = 'inicio'
+        self._archivo_actual = None
+        self._archivos_completados = 0
+        self._archivos_con_error = 0
+        self._filas = 0
+        self._bytes_leidos = 0
+        self._inicio = time.perf_counter()
+        self._fin = None
+
+    def iniciar(self, archivos: List[str]):
+        """
+        Comienza el seguimiento de una consolidación.
+
+        Args:
+            archivos: Archivos válidos que se van a leer
+        """
+        with self._lock:
+            self._reiniciar(archivos)
+            self._etapa = 'lectura'
+        self._notificar()
+
+    def iniciar_archivo(self, archivo: str):
+        """Indica el archivo que se está leyendo."""
+        with self._lock:
+            self._archivo_actual = archivo
+        self._notificar()
+
+    def agregar_filas(self, filas: int):
+        """Suma filas leídas del archivo en curso (por ejemplo, un bloque)."""
+        with self._lock:
+            self._filas += filas
+        self._notificar()
+
+    def completar_archivo(self, archivo: str, filas: int = 0, error: bool = False):
+        """
+        Marca un archivo como terminado.
+
+        Args:
+            archivo: Archivo terminado
+            filas: Filas que aún no se informaron con agregar_filas
+            error: Si el archivo no se pudo procesar
+        """
+        with self._lock:
+            self._archivos_completados += 1
+            self._archivos_con_error += int(error)
+            self._filas += filas
+            self._bytes_leidos += self._tamanos.get(archivo, 0)
+            if self._archivo_actual == archivo:
+                self._archivo_actual = None
+        self._notificar()
+
+    def cambiar_etapa(self, etapa: str):
+        """
+        Pasa a otra etapa de la consolidación.
+
+        Args:
+            etapa: Una de ETAPAS
+        """
+        if etapa not in ETAPAS:
+            raise ValueError(f"Etapa desconocida: {etapa}. Use una de {list(ETAPAS)}")
+        with self._lock:
+            self._etapa = etapa
+            if etapa in ('finalizado', 'cancelado'):
+                self._fin = time.perf_counter()
+                self._archivo_actual = None
+        self._notificar()
+
+    def instantanea(self) -> Dict[str, Any]:
+        """
+        Copia del estado actual, apta para leerse desde otro hilo.
+
+        Returns:
+            Diccionario con etapa, archivos, filas, bytes, fracción (0 a 1),
+            filas por segundo, segundos transcurridos y ETA en segundos (None
+            si aún no se puede estimar)
+        """
+        with self._lock:
+            ahora = self._fin if self._fin is not None else time.perf_counter()
+            transcurrido = ahora - self._inicio
+            bytes_totales = sum(self._tamanos.values())
+            total_archivos = len(self._tamanos)
+            if bytes_totales:
+                fraccion = self._bytes_leidos / bytes_totales
+            else:
+                fraccion = self._archivos_completados / total_archivos if total_archivos else 0.0
+
+            eta = None
+            if self._etapa == 'lectura' and 0 < fraccion < 1:
+                eta = transcurrido * (1 - fraccion) / fraccion
+            elif self._etapa in ('finalizado', 'cancelado'):
+                eta = 0.0
+
+            return {
+                'etapa': self._etapa,
+                'archivo_actual': self._archivo_actual,
+                'total_archivos': total_archivos,
+                'archivos_completados': self._archivos_completados,
+                'archivos_con_error': self._archivos_con_error,
+                'filas': self._filas,
+                'bytes_leidos': self._bytes_leidos,
+                'bytes_totales': bytes_totales,
+                'fraccion': min(fraccion, 1.0),
+                'filas_por_segundo': self._filas / transcurrido if transcurrido > 0 else 0.0,
+                'segundos': transcurrido,
+                'eta_segundos': eta,
+            }
+
+    def _notificar(self):
+        """Llama al callback, si hay, con el estado actual."""
+        if self.callback is None:
+            return
+        try:
+            self.callback(self.instantanea())
+        except Exception as e:
+            logger.warning(f"Error en el callback de progreso: {e}")
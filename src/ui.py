@@ -9,11 +9,17 @@ from tkinter import filedialog, messagebox, ttk
 from typing import List, Dict, Any
 import threading
 import logging
-import pandas as pd  # para detectar encabezados (rápido con nrows=0)
+import importlib.util
 from .processor import Consolidator
+from .utils import EXTENSIONES_CSV, EXTENSIONES_SOPORTADAS
+from .esquema import DescubridorEsquema
+from .progreso import ProgresoConsolidacion, TokenCancelacion
 
 logger = logging.getLogger(__name__)
 
+# Cada cuánto se refresca la barra de progreso mientras se procesa
+INTERVALO_PROGRESO_MS = 200
+
 
 class ConsolidadorUI:
     """Interfaz gráfica para el consolidador de archivos."""
@@ -21,6 +27,9 @@ class ConsolidadorUI:
     def __init__(self):
         self.root = tk.Tk()
         self.consolidador = Consolidator()
+        self.descubridor_esquema = DescubridorEsquema()
+        self.progreso = ProgresoConsolidacion()
+        self.cancelacion = TokenCancelacion()
         
         # Variables de la interfaz
         self.archivos_seleccionados: List[str] = []
@@ -79,6 +88,9 @@ class ConsolidadorUI:
         # Sección de botones
         self.crear_seccion_botones()
         
+        # Sección de progreso
+        self.crear_seccion_progreso()
+        
         # Sección de resultados
         self.crear_seccion_resultados()
 
@@ -163,7 +175,13 @@ class ConsolidadorUI:
         frame_formato.grid(row=2, column=1, sticky=tk.W, padx=(10, 0), pady=2)
         
         ttk.Radiobutton(frame_formato, text="CSV (.csv)", variable=self.formato_salida, value="csv").pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Radiobutton(frame_formato, text="Excel (.xlsx)", variable=self.formato_salida, value="xlsx").pack(side=tk.LEFT)
+        ttk.Radiobutton(frame_formato, text="Excel (.xlsx)", variable=self.formato_salida, value="xlsx").pack(side=tk.LEFT, padx=(0, 10))
+        # Parquet y Feather requieren pyarrow
+        estado_columnar = tk.NORMAL if importlib.util.find_spec("pyarrow") is not None else tk.DISABLED
+        ttk.Radiobutton(frame_formato, text="Parquet (.parquet)", variable=self.formato_salida, value="parquet",
+                        state=estado_columnar).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Radiobutton(frame_formato, text="Feather (.feather)", variable=self.formato_salida, value="feather",
+                        state=estado_columnar).pack(side=tk.LEFT)
     
     # =============== NUEVO: Selector de modo de manejo de columnas ===============
     def crear_seccion_modo_columnas(self):
@@ -267,6 +285,18 @@ class ConsolidadorUI:
         ttk.Checkbutton(frame_opciones, text="Eliminar duplicados del resultado final", 
                        variable=self.eliminar_duplicados_var).pack(anchor=tk.W, pady=2)
         
+        self.todas_las_hojas_var = tk.BooleanVar()
+        ttk.Checkbutton(frame_opciones, text="Consolidar todas las hojas de los archivos Excel (agrega columna HOJA_ORIGEN)", 
+                       variable=self.todas_las_hojas_var).pack(anchor=tk.W, pady=2)
+        
+        self.optimizar_memoria_var = tk.BooleanVar()
+        ttk.Checkbutton(frame_opciones, text="Optimizar memoria (categorías, números compactos y texto Arrow)", 
+                       variable=self.optimizar_memoria_var).pack(anchor=tk.W, pady=2)
+        
+        self.preasignar_var = tk.BooleanVar()
+        ttk.Checkbutton(frame_opciones, text="Consolidar en columnas preasignadas (menor pico de memoria)", 
+                       variable=self.preasignar_var).pack(anchor=tk.W, pady=2)
+        
         self.progreso_detallado_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(frame_opciones, text="Mostrar progreso detallado", 
                        variable=self.progreso_detallado_var).pack(anchor=tk.W, pady=2)
@@ -280,16 +310,33 @@ class ConsolidadorUI:
                                       command=self.procesar_archivos, style="Accent.TButton")
         self.btn_procesar.pack(side=tk.LEFT, padx=(0, 10))
         
+        self.btn_cancelar = ttk.Button(frame_botones, text="⏹ Cancelar", 
+                                      command=self.cancelar_procesamiento, state="disabled")
+        self.btn_cancelar.pack(side=tk.LEFT, padx=(0, 10))
+        
         ttk.Button(frame_botones, text="🧹 Limpiar Todo", 
                   command=self.limpiar_todo).pack(side=tk.LEFT, padx=(0, 10))
         
         ttk.Button(frame_botones, text="❌ Salir", 
                   command=self.root.quit).pack(side=tk.LEFT)
     
+    def crear_seccion_progreso(self):
+        """Crea la barra de progreso del procesamiento."""
+        frame_progreso = ttk.Frame(self.scrollable_frame)
+        frame_progreso.grid(row=8, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        frame_progreso.columnconfigure(0, weight=1)
+        
+        self.barra_progreso = ttk.Progressbar(frame_progreso, orient=tk.HORIZONTAL, 
+                                              mode="determinate", maximum=100)
+        self.barra_progreso.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        
+        self.etiqueta_progreso = ttk.Label(frame_progreso, text="", font=("Arial", 9))
+        self.etiqueta_progreso.grid(row=1, column=0, sticky=tk.W, pady=(2, 0))
+    
     def crear_seccion_resultados(self):
         """Crea la sección de resultados y logs."""
         frame_resultados = ttk.LabelFrame(self.scrollable_frame, text="📊 Resultados y Logs", padding="10")
-        frame_resultados.grid(row=8, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
+        frame_resultados.grid(row=9, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
         frame_resultados.columnconfigure(0, weight=1)
         frame_resultados.rowconfigure(0, weight=1)
         
@@ -308,9 +355,10 @@ class ConsolidadorUI:
         archivos = filedialog.askopenfilenames(
             title="Seleccionar archivos CSV y Excel",
             filetypes=[
-                ("Archivos CSV y Excel", "*.csv;*.xlsx;*.xls"), 
-                ("Archivos CSV", "*.csv"), 
+                ("Archivos soportados", ";".join(f"*{extension}" for extension in EXTENSIONES_SOPORTADAS)), 
+                ("Archivos CSV", ";".join(f"*{extension}" for extension in EXTENSIONES_CSV)), 
                 ("Archivos Excel", "*.xlsx;*.xls"),
+                ("Archivos Parquet y Feather", "*.parquet;*.feather"),
                 ("Todos los archivos", "*.*")
             ]
         )
@@ -383,10 +431,58 @@ class ConsolidadorUI:
         
         self.procesando = True
         self.btn_procesar.config(text="⏳ Procesando...", state="disabled")
+        self.btn_cancelar.config(state="normal")
+        
+        # El hilo informa el avance aquí; la interfaz lo consulta con root.after
+        self.progreso = ProgresoConsolidacion()
+        self.cancelacion = TokenCancelacion()
         
         thread = threading.Thread(target=self._procesar_archivos_thread)
         thread.daemon = True
         thread.start()
+        
+        self._actualizar_progreso()
+    
+    def cancelar_procesamiento(self):
+        """Solicita cancelar el procesamiento en curso."""
+        if not self.procesando:
+            return
+        self.cancelacion.cancelar()
+        self.btn_cancelar.config(state="disabled")
+        self.etiqueta_progreso.config(text="Cancelando... (se detiene al terminar el archivo o bloque en curso)")
+    
+    def _actualizar_progreso(self):
+        """Refresca la barra de progreso y se reprograma mientras se procesa."""
+        estado = self.progreso.instantanea()
+        self.barra_progreso['value'] = estado['fraccion'] * 100
+        if not self.cancelacion.cancelado or estado['etapa'] == 'cancelado':
+            self.etiqueta_progreso.config(text=self._texto_progreso(estado))
+        
+        if self.procesando:
+            self.root.after(INTERVALO_PROGRESO_MS, self._actualizar_progreso)
+    
+    def _texto_progreso(self, estado: Dict[str, Any]) -> str:
+        """Describe el estado del progreso en una línea."""
+        etapas = {
+            'inicio': "Preparando...",
+            'lectura': "Leyendo archivos",
+            'consolidacion': "Consolidando...",
+            'duplicados': "Analizando duplicados...",
+            'guardado': "Guardando archivo...",
+            'finalizado': "Completado",
+            'cancelado': "Cancelado",
+        }
+        partes = [f"{etapas[estado['etapa']]} {estado['archivos_completados']}/{estado['total_archivos']}"]
+        if self.progreso_detallado_var.get():
+            partes.append(f"{estado['filas']:,} filas")
+            partes.append(f"{estado['bytes_leidos'] / 1e6:,.1f}/{estado['bytes_totales'] / 1e6:,.1f} MB")
+            partes.append(f"{estado['filas_por_segundo']:,.0f} filas/s")
+            if estado['eta_segundos'] is not None and estado['etapa'] == 'lectura':
+                minutos, segundos = divmod(int(estado['eta_segundos']), 60)
+                partes.append(f"ETA {minutos}m {segundos:02d}s")
+            if estado['archivo_actual']:
+                partes.append(os.path.basename(estado['archivo_actual']))
+        return " · ".join(partes)
     
     def _procesar_archivos_thread(self):
         """Procesa los archivos en un hilo separado."""
@@ -402,12 +498,11 @@ class ConsolidadorUI:
                     texto = (self.entry_incluir_lista.get() or "").strip()
                     columnas_incluir = [c.strip() for c in texto.split(",") if c.strip()]
 
-                # Descubrir unión de columnas de archivos seleccionados
-                union_cols = self._descubrir_union_columnas(self.archivos_seleccionados)
-                # Ignorar todo lo que no esté en la lista a incluir
-                usar_cols_ignorar = [c for c in union_cols if c not in set(columnas_incluir)]
-                logger.info(f"Incluir: {len(columnas_incluir)} | Se ignorarán (complemento): {len(usar_cols_ignorar)}")
+                # La selección se aplica al leer: las demás columnas no se parsean
+                usar_cols_ignorar = []
+                logger.info(f"Incluir: {len(columnas_incluir)}")
             else:
+                columnas_incluir = None
                 usar_cols_ignorar = list(self.columnas_a_ignorar)
                 logger.info(f"Ignorar explícitas: {len(usar_cols_ignorar)}")
 
@@ -416,13 +511,19 @@ class ConsolidadorUI:
                 columna_1_nombre=self.entry_columna1.get().strip() or "Archivo_Origen",
                 columna_2_nombre=self.entry_columna2.get().strip() or "Fecha_Procesamiento",
                 columnas_a_ignorar=usar_cols_ignorar,
-                eliminar_duplicados=self.eliminar_duplicados_var.get()
+                columnas_a_incluir=columnas_incluir,
+                eliminar_duplicados=self.eliminar_duplicados_var.get(),
+                hojas_excel=".*" if self.todas_las_hojas_var.get() else None,
+                optimizar_memoria=self.optimizar_memoria_var.get(),
+                modo_consolidacion='preasignado' if self.preasignar_var.get() else 'concat'
             )
             
             # Procesar y guardar
             resultado = self.consolidador.procesar_y_guardar(
                 archivos=self.archivos_seleccionados,
-                formato=self.formato_salida.get()
+                formato=self.formato_salida.get(),
+                progreso=self.progreso,
+                cancelacion=self.cancelacion
             )
             
             # Actualizar interfaz en el hilo principal
@@ -448,7 +549,12 @@ class ConsolidadorUI:
             self.texto_resultados.insert(tk.END, f"   • Total de registros: {resumen['total_registros']:,}\n")
             self.texto_resultados.insert(tk.END, f"   • Total de columnas: {resumen['total_columnas']}\n")
             self.texto_resultados.insert(tk.END, f"   • Archivos procesados: {resumen['archivos_procesados']}\n")
-            self.texto_resultados.insert(tk.END, f"   • Formato de salida: {resultado['guardado']['formato'].upper()}\n\n")
+            self.texto_resultados.insert(tk.END, f"   • Formato de salida: {resultado['guardado']['formato'].upper()}\n")
+            if 'memoria' in resumen:
+                memoria = resumen['memoria']
+                self.texto_resultados.insert(tk.END, f"   • Memoria: {memoria['antes_mb']:,.1f} MB -> {memoria['despues_mb']:,.1f} MB "
+                                                     f"(-{memoria['reduccion_pct']}%)\n")
+            self.texto_resultados.insert(tk.END, "\n")
             
             self.texto_resultados.insert(tk.END, f"📁 ARCHIVOS PROCESADOS:\n")
             for archivo in resumen['nombres_archivos']:
@@ -462,9 +568,23 @@ class ConsolidadorUI:
                         self.texto_resultados.insert(tk.END, f"   • {archivo}: {', '.join(columnas)}\n")
                 self.texto_resultados.insert(tk.END, "\n")
             
+            esquema = resultado.get('esquema') or {}
+            if esquema.get('columnas_faltantes'):
+                self.texto_resultados.insert(tk.END, f"🧩 COLUMNAS FALTANTES (quedan vacías):\n")
+                for archivo, columnas in esquema['columnas_faltantes'].items():
+                    self.texto_resultados.insert(tk.END, f"   • {archivo}: {', '.join(map(str, columnas))}\n")
+                self.texto_resultados.insert(tk.END, "\n")
+            
             if resultado['duplicados_eliminados'] > 0:
                 self.texto_resultados.insert(tk.END, f"🔄 DUPLICADOS ELIMINADOS: {resultado['duplicados_eliminados']}\n\n")
             
+            metricas = resultado.get('metricas')
+            if metricas and self.progreso_detallado_var.get():
+                self.texto_resultados.insert(tk.END, f"⏱️ TIEMPOS POR ETAPA (total {metricas['total_segundos']:.2f} s):\n")
+                for etapa, datos in metricas['por_etapa'].items():
+                    self.texto_resultados.insert(tk.END, f"   • {etapa}: {datos['segundos']:.2f} s ({datos['filas']:,} filas)\n")
+                self.texto_resultados.insert(tk.END, "\n")
+            
             guardado = resultado['guardado']
             self.texto_resultados.insert(tk.END, f"💾 ARCHIVO GUARDADO:\n")
             self.texto_resultados.insert(tk.END, f"   • Nombre: {guardado['nombre_archivo']}\n")
@@ -482,6 +602,11 @@ class ConsolidadorUI:
                               f"Archivo consolidado creado exitosamente:\n{guardado['nombre_archivo']}\n\n"
                               f"Registros: {guardado['registros']:,}\n"
                               f"Ubicación: {guardado['ruta_archivo']}")
+        elif resultado.get('cancelado'):
+            self.texto_resultados.insert(tk.END, "⏹ PROCESAMIENTO CANCELADO\n")
+            self.texto_resultados.insert(tk.END, "="*60 + "\n\n")
+            self.texto_resultados.insert(tk.END, f"Archivos leídos antes de cancelar: {len(resultado['archivos_procesados'])}\n")
+            self.texto_resultados.insert(tk.END, "No se generó ningún archivo de salida.\n")
         else:
             self._mostrar_error(resultado.get('error', 'Error desconocido'))
     
@@ -497,6 +622,8 @@ class ConsolidadorUI:
         """Finaliza el procesamiento y restaura la interfaz."""
         self.procesando = False
         self.btn_procesar.config(text="🚀 Procesar y Consolidar", state="normal")
+        self.btn_cancelar.config(state="disabled")
+        self._actualizar_progreso()
         self.actualizar_estadisticas()
     
     def actualizar_estadisticas(self):
@@ -528,6 +655,8 @@ class ConsolidadorUI:
             self.limpiar_columnas_ignorar()
             self.limpiar_columnas_incluir()
             self.texto_resultados.delete(1.0, tk.END)
+            self.barra_progreso['value'] = 0
+            self.etiqueta_progreso.config(text="")
             self.entry_columna1.delete(0, tk.END)
             self.entry_columna1.insert(0, "Archivo_Origen")
             self.entry_columna2.delete(0, tk.END)
@@ -539,6 +668,9 @@ class ConsolidadorUI:
             self.modo_columnas_var.set("ignorar")
             self._actualizar_modo_columnas()
             self.eliminar_duplicados_var.set(False)
+            self.todas_las_hojas_var.set(False)
+            self.optimizar_memoria_var.set(False)
+            self.preasignar_var.set(False)
             self.actualizar_estadisticas()
     
     def ejecutar(self):
@@ -556,22 +688,10 @@ class ConsolidadorUI:
                 self.lista_columnas_disponibles.insert(tk.END, c)
 
     def _descubrir_union_columnas(self, archivos: List[str]) -> List[str]:
-        cols = set()
-        for ruta in archivos:
-            try:
-                low = ruta.lower()
-                if low.endswith(".csv"):
-                    df = pd.read_csv(ruta, nrows=0, encoding="utf-8", engine="python")
-                elif low.endswith(".xlsx"):
-                    df = pd.read_excel(ruta, nrows=0, engine="openpyxl")
-                elif low.endswith(".xls"):
-                    df = pd.read_excel(ruta, nrows=0, engine="xlrd")
-                else:
-                    continue
-                cols.update(map(str, df.columns))
-            except Exception as e:
-                logger.warning(f"No se pudieron leer encabezados de {os.path.basename(ruta)}: {e}")
-        return sorted(cols)
+        # Solo lee encabezados (en paralelo y con caché por archivo)
+        soportados = [ruta for ruta in archivos if ruta.lower().endswith(EXTENSIONES_SOPORTADAS)]
+        patron_hojas = ".*" if self.todas_las_hojas_var.get() else None
+        return self.descubridor_esquema.union_columnas(soportados, patron_hojas)
 
     def _actualizar_modo_columnas(self):
         """Muestra/oculta secciones según el modo seleccionado."""
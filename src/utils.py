@@ -4,26 +4,458 @@ Contiene funciones auxiliares para manejo de archivos y procesamiento de datos.
 """
 
 import pandas as pd
+import numpy as np
 import os
+import io
+import re
+import csv
+import codecs
+import importlib.util
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple, Union
 import logging
 
+from .escritores import ESCRITORES, EscritorXlsx
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Columnas de origen de los periodos que inserta procesar_dataframe
+COLUMNAS_FECHA = ('FECHA_ASIG', 'FECHA_LEG')
+
+# Representaciones posibles de las columnas de periodo YYYYMM
+FORMATOS_PERIODO = ('texto', 'entero', 'categoria')
+
+# Formatos de salida soportados (parquet y feather requieren pyarrow)
+FORMATOS_SALIDA = ('csv', 'xlsx', 'parquet', 'feather')
+
+# Compresiones de CSV admitidas en la entrada, por extensión (.zst requiere zstandard)
+COMPRESIONES_CSV = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd', '.zip': 'zip'}
+
+# Motores de lectura de Excel, en orden de preferencia (ver FileProcessor.motor_excel)
+MOTORES_EXCEL = ('calamine', 'openpyxl', 'xlrd')
+
+# Extensiones de entrada por tipo de archivo
+EXTENSIONES_CSV = ('.csv',) + tuple(f".csv{extension}" for extension in COMPRESIONES_CSV)
+EXTENSIONES_EXCEL = ('.xlsx', '.xls')
+EXTENSIONES_COLUMNARES = ('.parquet', '.feather')
+EXTENSIONES_SOPORTADAS = EXTENSIONES_CSV + EXTENSIONES_EXCEL + EXTENSIONES_COLUMNARES
+
+
+class SelectorColumnas:
+    """
+    Selección de columnas que se empuja al lector (`usecols`).
+    
+    Se usa como callable de `usecols` en read_csv/read_excel para que las
+    columnas descartadas nunca se parseen. Registra además el encabezado
+    completo del archivo para que procesar_dataframe pueda reportar las
+    columnas eliminadas y las no encontradas igual que antes.
+    """
+    
+    def __init__(self, 
+                 columnas_a_ignorar: List[str] = None,
+                 columnas_a_incluir: Optional[List[str]] = None):
+        """
+        Args:
+            columnas_a_ignorar: Columnas a descartar (modo ignorar)
+            columnas_a_incluir: Si se indica, solo se conservan estas columnas (modo incluir)
+        """
+        self.columnas_a_ignorar = set(columnas_a_ignorar or [])
+        self.columnas_a_incluir = set(columnas_a_incluir) if columnas_a_incluir is not None else None
+        self._columnas_origen: Dict[str, None] = {}
+    
+    def conservar(self, columna) -> bool:
+        """Indica si la columna forma parte del resultado final."""
+        if self.columnas_a_incluir is not None:
+            return columna in self.columnas_a_incluir
+        return columna not in self.columnas_a_ignorar
+    
+    def __call__(self, columna) -> bool:
+        """Indica si la columna debe leerse del archivo."""
+        primera = not self._columnas_origen
+        self._columnas_origen[columna] = None
+        
+        # Las fechas se leen siempre para derivar los periodos, y la primera
+        # columna también, para conservar el número de filas aunque no se
+        # seleccione ninguna otra.
+        return primera or columna in COLUMNAS_FECHA or self.conservar(columna)
+    
+    @property
+    def columnas_origen(self) -> List[str]:
+        """Encabezado completo del archivo leído (vacío hasta leerlo)."""
+        return list(self._columnas_origen)
+    
+    def copia(self) -> 'SelectorColumnas':
+        """Selector con la misma selección y sin encabezado registrado (uno por hoja)."""
+        copia = SelectorColumnas()
+        copia.columnas_a_ignorar = self.columnas_a_ignorar
+        copia.columnas_a_incluir = self.columnas_a_incluir
+        return copia
+    
+    def registrar(self, columnas: List[str]):
+        """Agrega columnas al encabezado registrado, en orden y sin repetir."""
+        for columna in columnas:
+            self._columnas_origen[columna] = None
+
+
 class FileProcessor:
-    """Clase para procesar archivos CSV y Excel."""
+    """Clase para procesar archivos CSV, Excel, Parquet y Feather."""
+    
+    # Encodings candidatos para CSV, en orden de preferencia
+    ENCODINGS_CSV = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+    
+    # Bytes que se leen del inicio y del final del archivo para detectar el encoding
+    TAMANO_MUESTRA_ENCODING = 64 * 1024
+    
+    # Política de read_csv (encoding_errors) si la muestra no fue representativa
+    POLITICA_ERRORES_ENCODING = 'replace'
+    
+    # Marcas de orden de bytes (BOM), de la más larga a la más corta
+    _BOMS = [
+        (codecs.BOM_UTF32_LE, 'utf-32'),
+        (codecs.BOM_UTF32_BE, 'utf-32'),
+        (codecs.BOM_UTF8, 'utf-8-sig'),
+        (codecs.BOM_UTF16_LE, 'utf-16'),
+        (codecs.BOM_UTF16_BE, 'utf-16'),
+    ]
+    
+    # Encodings ya detectados, por (ruta absoluta, tamaño, mtime)
+    _cache_encodings: Dict[tuple, str] = {}
+    
+    # Formatos de fecha explícitos que se prueban sobre una muestra (día primero).
+    # Las fechas ISO ('%Y-%m-%d') se leen como año-mes-día: antes pasaban por
+    # dayfirst=True y '2024-01-05' daba el periodo 202405 en lugar de 202401.
+    FORMATOS_FECHA = [
+        '%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d-%m-%Y', '%d.%m.%Y',
+        '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d', '%Y%m%d',
+    ]
+    
+    # Valores distintos que se usan para detectar el formato de fecha
+    TAMANO_MUESTRA_FECHAS = 50
+    
+    @staticmethod
+    def tipo_archivo(ruta_archivo: str) -> str:
+        """
+        Determina el tipo de un archivo de entrada por su extensión.
+        
+        Args:
+            ruta_archivo: Ruta del archivo
+            
+        Returns:
+            'csv' (también comprimido), 'xlsx', 'xls', 'parquet' o 'feather'
+            
+        Raises:
+            ValueError: Si la extensión no está en EXTENSIONES_SOPORTADAS
+        """
+        nombre_archivo = os.path.basename(ruta_archivo).lower()
+        if nombre_archivo.endswith(EXTENSIONES_CSV):
+            return 'csv'
+        for extension in EXTENSIONES_EXCEL + EXTENSIONES_COLUMNARES:
+            if nombre_archivo.endswith(extension):
+                return extension.lstrip('.')
+        raise ValueError(f"Tipo de archivo no soportado: {nombre_archivo}")
+    
+    @staticmethod
+    def _compresion_csv(ruta_archivo: str) -> Optional[str]:
+        """Compresión de un CSV según su extensión (None si es texto plano)."""
+        return COMPRESIONES_CSV.get(os.path.splitext(ruta_archivo.lower())[1])
+    
+    @staticmethod
+    def _abrir_binario(ruta_archivo: str):
+        """Abre un CSV en modo binario, descomprimiéndolo al vuelo si hace falta."""
+        compresion = FileProcessor._compresion_csv(ruta_archivo)
+        if compresion is None:
+            return open(ruta_archivo, 'rb')
+        if compresion == 'gzip':
+            import gzip
+            return gzip.open(ruta_archivo, 'rb')
+        if compresion == 'bz2':
+            import bz2
+            return bz2.open(ruta_archivo, 'rb')
+        if compresion == 'xz':
+            import lzma
+            return lzma.open(ruta_archivo, 'rb')
+        if compresion == 'zstd':
+            import zstandard
+            return zstandard.ZstdDecompressor().stream_reader(open(ruta_archivo, 'rb'), closefd=True)
+        
+        import zipfile
+        contenedor = zipfile.ZipFile(ruta_archivo)
+        miembros = [info for info in contenedor.infolist() if not info.is_dir()]
+        if len(miembros) != 1:
+            contenedor.close()
+            raise ValueError(f"El ZIP debe contener un solo archivo: {os.path.basename(ruta_archivo)}")
+        miembro = contenedor.open(miembros[0])
+        # El archivo subyacente sigue abierto hasta que se cierre el miembro
+        contenedor.close()
+        return miembro
+    
+    @staticmethod
+    def detectar_encoding(ruta_archivo: str) -> str:
+        """
+        Detecta el encoding de un CSV a partir de una muestra acotada de bytes.
+        
+        Revisa primero el BOM y luego prueba los encodings candidatos sobre el
+        inicio y el final del archivo, sin parsearlo. En los CSV comprimidos
+        solo se analiza el inicio del contenido descomprimido. El resultado se
+        guarda en caché mientras el archivo no cambie de tamaño ni de fecha de
+        modificación.
+        
+        Args:
+            ruta_archivo: Ruta del archivo CSV
+            
+        Returns:
+            Nombre del encoding a usar con pd.read_csv
+        """
+        stat = os.stat(ruta_archivo)
+        clave = (os.path.abspath(ruta_archivo), stat.st_size, stat.st_mtime_ns)
+        encoding = FileProcessor._cache_encodings.get(clave)
+        if encoding is not None:
+            return encoding
+        
+        tamano = FileProcessor.TAMANO_MUESTRA_ENCODING
+        comprimido = FileProcessor._compresion_csv(ruta_archivo) is not None
+        with FileProcessor._abrir_binario(ruta_archivo) as archivo:
+            inicio = archivo.read(tamano)
+            final = b''
+            if not comprimido and stat.st_size > 2 * tamano:
+                archivo.seek(-tamano, os.SEEK_END)
+                # Descartar bytes de continuación UTF-8 de un carácter cortado
+                final = archivo.read(tamano).lstrip(bytes(range(0x80, 0xC0)))
+        
+        for bom, encoding_bom in FileProcessor._BOMS:
+            if inicio.startswith(bom):
+                encoding = encoding_bom
+                break
+        else:
+            for candidato in FileProcessor.ENCODINGS_CSV:
+                try:
+                    # final=False: la muestra inicial puede cortar un carácter multibyte
+                    codecs.getincrementaldecoder(candidato)().decode(inicio, final=False)
+                    final.decode(candidato)
+                except UnicodeDecodeError:
+                    continue
+                encoding = candidato
+                break
+            else:
+                encoding = FileProcessor.ENCODINGS_CSV[-1]
+        
+        FileProcessor._cache_encodings[clave] = encoding
+        logger.info(f"Encoding detectado para {os.path.basename(ruta_archivo)}: {encoding}")
+        return encoding
+    
+    @staticmethod
+    def _leer_csv(ruta_archivo: str, **kwargs) -> pd.DataFrame:
+        """
+        Lee un CSV con el encoding detectado en una sola pasada.
+        
+        Si aun así aparecen bytes inválidos fuera de la muestra analizada, se
+        relee aplicando POLITICA_ERRORES_ENCODING en lugar de fallar.
+        
+        Args:
+            ruta_archivo: Ruta del archivo CSV
+            **kwargs: Argumentos adicionales para pd.read_csv
+            
+        Returns:
+            DataFrame leído
+        """
+        encoding = FileProcessor.detectar_encoding(ruta_archivo)
+        try:
+            return pd.read_csv(ruta_archivo, encoding=encoding, **kwargs)
+        except UnicodeDecodeError:
+            politica = FileProcessor.POLITICA_ERRORES_ENCODING
+            logger.warning(f"Bytes inválidos para {encoding} en {os.path.basename(ruta_archivo)}; "
+                           f"se relee con encoding_errors='{politica}'")
+            return pd.read_csv(ruta_archivo, encoding=encoding, encoding_errors=politica, **kwargs)
+    
+    @staticmethod
+    def _esquema_columnar(ruta_archivo: str):
+        """Esquema Arrow de un parquet/feather, leído sin cargar los datos."""
+        if FileProcessor.tipo_archivo(ruta_archivo) == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.read_schema(ruta_archivo)
+        import pyarrow.ipc
+        with pyarrow.ipc.open_file(ruta_archivo) as lector:
+            return lector.schema
+    
+    @staticmethod
+    def _columnas_columnar(ruta_archivo: str) -> List[str]:
+        """Columnas de datos de un parquet/feather (sin las del índice de pandas)."""
+        esquema = FileProcessor._esquema_columnar(ruta_archivo)
+        metadata = esquema.pandas_metadata or {}
+        indice = {col for col in metadata.get('index_columns', []) if isinstance(col, str)}
+        return [nombre for nombre in esquema.names if nombre not in indice]
+    
+    @staticmethod
+    def _proyeccion_columnar(ruta_archivo: str, usecols=None) -> Optional[List[str]]:
+        """
+        Traduce `usecols` (lista o callable) a la lista de columnas a leer.
+        
+        Los formatos columnares leen solo esas columnas del disco, así que el
+        filtro se aplica sobre el esquema antes de tocar los datos.
+        """
+        if usecols is None:
+            return None
+        if callable(usecols):
+            return [col for col in FileProcessor._columnas_columnar(ruta_archivo) if usecols(col)]
+        return list(usecols)
+    
+    @staticmethod
+    def _leer_columnar(ruta_archivo: str, usecols=None) -> pd.DataFrame:
+        """Lee un parquet o feather con proyección de columnas."""
+        columnas = FileProcessor._proyeccion_columnar(ruta_archivo, usecols)
+        if FileProcessor.tipo_archivo(ruta_archivo) == 'parquet':
+            return pd.read_parquet(ruta_archivo, engine='pyarrow', columns=columnas)
+        return pd.read_feather(ruta_archivo, columns=columnas)
+    
+    @staticmethod
+    def motor_excel(ruta_archivo: str, preferido: Optional[str] = None) -> str:
+        """
+        Elige el motor de lectura para un archivo Excel.
+        
+        Sin preferencia se usa calamine (python-calamine, en Rust) si está
+        instalado; si no, openpyxl para .xlsx y xlrd para .xls.
+        
+        Args:
+            ruta_archivo: Ruta del archivo Excel
+            preferido: Motor de MOTORES_EXCEL a usar, o None para elegirlo
+            
+        Returns:
+            Nombre del motor
+            
+        Raises:
+            ValueError: Si el motor no existe o no puede leer ese tipo de archivo
+        """
+        tipo = FileProcessor.tipo_archivo(ruta_archivo)
+        compatibles = {'xlsx': ('calamine', 'openpyxl'), 'xls': ('calamine', 'xlrd')}[tipo]
+        
+        if preferido is not None:
+            if preferido not in MOTORES_EXCEL:
+                raise ValueError(f"Motor de Excel no soportado: {preferido}")
+            if preferido not in compatibles:
+                raise ValueError(f"El motor {preferido} no lee archivos .{tipo}")
+            return preferido
+        
+        if importlib.util.find_spec('python_calamine') is not None:
+            return 'calamine'
+        return compatibles[1]
+    
+    @staticmethod
+    def listar_hojas(ruta_archivo: str, motor: Optional[str] = None) -> List[str]:
+        """
+        Nombres de las hojas de un archivo Excel, en orden.
+        
+        Args:
+            ruta_archivo: Ruta del archivo Excel
+            motor: Motor de lectura (None = automático)
+            
+        Returns:
+            Lista de nombres de hojas
+        """
+        motor = FileProcessor.motor_excel(ruta_archivo, motor)
+        with pd.ExcelFile(ruta_archivo, engine=motor) as libro:
+            return [str(nombre) for nombre in libro.sheet_names]
+    
+    @staticmethod
+    def leer_hojas_excel(ruta_archivo: str, 
+                         hojas: Optional[List[Union[int, str]]] = None,
+                         usecols=None,
+                         motor: Optional[str] = None,
+                         patron: Optional[str] = None,
+                         max_workers: Optional[int] = 1) -> Dict[str, pd.DataFrame]:
+        """
+        Lee varias hojas de un archivo Excel.
+        
+        Con un solo worker el libro se abre una vez para todas las hojas. Con
+        varios, cada hoja se parsea en su propio hilo con su propio manejador
+        del libro (cuánto se gana depende del motor: openpyxl está limitado
+        por el GIL, calamine no).
+        
+        Args:
+            ruta_archivo: Ruta del archivo Excel
+            hojas: Nombres o posiciones de las hojas (None = todas)
+            usecols: Columnas a parsear (lista o callable, p. ej. un SelectorColumnas)
+            motor: Motor de MOTORES_EXCEL (None = automático, ver motor_excel)
+            patron: Expresión regular; solo se leen las hojas cuyo nombre la
+                contenga (ver filtrar_hojas)
+            max_workers: Hilos para parsear hojas (None = uno por hoja, hasta
+                el número de CPUs)
+            
+        Returns:
+            Diccionario nombre de hoja -> DataFrame, en el orden del libro
+            
+        Raises:
+            ValueError: Si ninguna hoja coincide con el patrón
+        """
+        motor = FileProcessor.motor_excel(ruta_archivo, motor)
+        with pd.ExcelFile(ruta_archivo, engine=motor) as libro:
+            seleccion = FileProcessor._resolver_hojas(libro.sheet_names, hojas)
+            if patron is not None:
+                seleccion = FileProcessor.filtrar_hojas(seleccion, patron)
+                if not seleccion:
+                    raise ValueError(f"Ninguna hoja coincide con el patrón '{patron}'")
+            
+            # Un SelectorColumnas registra el encabezado que ve: cada hoja usa
+            # el suyo (los hilos no comparten estado) y al final se unen en
+            # el orden del libro
+            selectores = {nombre: usecols.copia() if isinstance(usecols, SelectorColumnas) else usecols
+                          for nombre in seleccion}
+            
+            if max_workers is None:
+                max_workers = os.cpu_count() or 1
+            max_workers = min(max_workers, len(seleccion))
+            if max_workers <= 1:
+                resultado = {nombre: pd.read_excel(libro, sheet_name=nombre, usecols=selectores[nombre])
+                             for nombre in seleccion}
+        
+        if max_workers > 1:
+            def leer_hoja(nombre):
+                return pd.read_excel(ruta_archivo, engine=motor, sheet_name=nombre, usecols=selectores[nombre])
+            
+            logger.info(f"Leyendo {len(seleccion)} hojas de {os.path.basename(ruta_archivo)} con {max_workers} hilos")
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                resultado = dict(zip(seleccion, executor.map(leer_hoja, seleccion)))
+        
+        if isinstance(usecols, SelectorColumnas):
+            for nombre in seleccion:
+                usecols.registrar(selectores[nombre].columnas_origen)
+        return resultado
+    
+    @staticmethod
+    def filtrar_hojas(nombres: List[str], patron: str) -> List[str]:
+        """
+        Filtra nombres de hojas con una expresión regular (re.search).
+        
+        Args:
+            nombres: Nombres de hojas
+            patron: Expresión regular; '.*' selecciona todas
+            
+        Returns:
+            Nombres que coinciden, en el mismo orden
+        """
+        expresion = re.compile(patron)
+        return [nombre for nombre in nombres if expresion.search(str(nombre))]
     
     @staticmethod
-    def leer_archivo(ruta_archivo: str) -> pd.DataFrame:
+    def _resolver_hojas(nombres: List[str], hojas: Optional[List[Union[int, str]]]) -> List[str]:
+        """Convierte posiciones de hojas en nombres (None = todas las hojas)."""
+        if hojas is None:
+            return [str(nombre) for nombre in nombres]
+        return [str(nombres[hoja]) if isinstance(hoja, int) else hoja for hoja in hojas]
+    
+    @staticmethod
+    def leer_archivo(ruta_archivo: str, usecols=None, motor_excel: Optional[str] = None) -> pd.DataFrame:
         """
-        Lee un archivo CSV o Excel y retorna un DataFrame.
+        Lee un archivo CSV (plano o comprimido), Excel, Parquet o Feather.
         
         Args:
             ruta_archivo: Ruta del archivo a leer
+            usecols: Columnas a parsear (lista o callable, p. ej. un SelectorColumnas)
+            motor_excel: Motor para Excel (None = automático, ver motor_excel);
+                se lee la primera hoja
             
         Returns:
             DataFrame con los datos del archivo
@@ -35,27 +467,15 @@ class FileProcessor:
             nombre_archivo = os.path.basename(ruta_archivo).lower()
             logger.info(f"Leyendo archivo: {nombre_archivo}")
             
-            if nombre_archivo.endswith('.xlsx'):
-                df = pd.read_excel(ruta_archivo, engine='openpyxl')
-            elif nombre_archivo.endswith('.xls'):
-                df = pd.read_excel(ruta_archivo, engine='xlrd')
-            elif nombre_archivo.endswith('.csv'):
-                # Intentar diferentes encodings para CSV
-                encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-                
-                for encoding in encodings:
-                    try:
-                        df = pd.read_csv(ruta_archivo, encoding=encoding)
-                        logger.info(f"Archivo CSV leído con encoding: {encoding}")
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                else:
-                    # Si ninguno funciona, usar el último encoding
-                    df = pd.read_csv(ruta_archivo, encoding='utf-8', errors='ignore')
-                    logger.warning(f"Usando encoding UTF-8 con errores ignorados para {nombre_archivo}")
+            tipo = FileProcessor.tipo_archivo(ruta_archivo)
+            if tipo in ('xlsx', 'xls'):
+                hojas = FileProcessor.leer_hojas_excel(ruta_archivo, [0], usecols=usecols, motor=motor_excel)
+                df = next(iter(hojas.values()))
+            elif tipo == 'csv':
+                # read_csv descomprime según la extensión (.gz, .zst, ...)
+                df = FileProcessor._leer_csv(ruta_archivo, usecols=usecols)
             else:
-                raise ValueError(f"Tipo de archivo no soportado: {nombre_archivo}")
+                df = FileProcessor._leer_columnar(ruta_archivo, usecols=usecols)
             
             logger.info(f"Archivo {nombre_archivo} leído exitosamente: {len(df)} registros, {len(df.columns)} columnas")
             return df
@@ -64,12 +484,376 @@ class FileProcessor:
             logger.error(f"Error al leer {ruta_archivo}: {str(e)}")
             raise Exception(f"Error al leer {ruta_archivo}: {str(e)}")
     
+    @staticmethod
+    def leer_archivo_por_bloques(ruta_archivo: str, 
+                                 tamano_bloque: int = 100_000,
+                                 usecols=None,
+                                 motor_excel: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Lee un archivo en bloques de como máximo `tamano_bloque` filas.
+        
+        Los CSV (también comprimidos) se leen de forma incremental, de modo que
+        nunca hay más de un bloque en memoria; los Parquet se leen por lotes de
+        sus row groups. Los Excel y Feather se entregan en un único bloque.
+        
+        Args:
+            ruta_archivo: Ruta del archivo a leer
+            tamano_bloque: Número máximo de filas por bloque
+            usecols: Columnas a parsear (lista o callable, p. ej. un SelectorColumnas)
+            motor_excel: Motor para Excel (None = automático, ver motor_excel)
+            
+        Yields:
+            DataFrames con las filas de cada bloque
+            
+        Raises:
+            Exception: Si no se puede leer el archivo
+        """
+        nombre_archivo = os.path.basename(ruta_archivo).lower()
+        tipo = FileProcessor.tipo_archivo(ruta_archivo)
+        
+        if tipo == 'parquet':
+            yield from FileProcessor._leer_parquet_por_bloques(ruta_archivo, tamano_bloque, usecols)
+            return
+        if tipo != 'csv':
+            yield FileProcessor.leer_archivo(ruta_archivo, usecols=usecols, motor_excel=motor_excel)
+            return
+        
+        logger.info(f"Leyendo archivo por bloques de {tamano_bloque} filas: {nombre_archivo}")
+        registros = 0
+        
+        try:
+            encoding = FileProcessor.detectar_encoding(ruta_archivo)
+            opciones = {'encoding': encoding, 'chunksize': tamano_bloque, 'usecols': usecols}
+            try:
+                with pd.read_csv(ruta_archivo, **opciones) as lector:
+                    for bloque in lector:
+                        registros += len(bloque)
+                        yield bloque
+            except UnicodeDecodeError:
+                # Solo se puede releer si aún no se entregó ningún bloque
+                if registros:
+                    raise
+                politica = FileProcessor.POLITICA_ERRORES_ENCODING
+                logger.warning(f"Bytes inválidos para {encoding} en {nombre_archivo}; "
+                               f"se relee con encoding_errors='{politica}'")
+                with pd.read_csv(ruta_archivo, encoding_errors=politica, **opciones) as lector:
+                    for bloque in lector:
+                        registros += len(bloque)
+                        yield bloque
+        except Exception as e:
+            logger.error(f"Error al leer {ruta_archivo}: {str(e)}")
+            raise Exception(f"Error al leer {ruta_archivo}: {str(e)}")
+        
+        logger.info(f"Archivo {nombre_archivo} leído exitosamente por bloques: {registros} registros")
+    
+    @staticmethod
+    def _leer_parquet_por_bloques(ruta_archivo: str, tamano_bloque: int, usecols=None) -> Iterator[pd.DataFrame]:
+        """Lee un parquet en lotes de como máximo `tamano_bloque` filas."""
+        nombre_archivo = os.path.basename(ruta_archivo).lower()
+        logger.info(f"Leyendo archivo por bloques de {tamano_bloque} filas: {nombre_archivo}")
+        registros = 0
+        
+        try:
+            import pyarrow.parquet as pq
+            
+            columnas = FileProcessor._proyeccion_columnar(ruta_archivo, usecols)
+            if columnas is None:
+                columnas = FileProcessor._columnas_columnar(ruta_archivo)
+            with pq.ParquetFile(ruta_archivo) as lector:
+                for lote in lector.iter_batches(batch_size=tamano_bloque, columns=columnas):
+                    bloque = lote.to_pandas()
+                    registros += len(bloque)
+                    yield bloque
+        except Exception as e:
+            logger.error(f"Error al leer {ruta_archivo}: {str(e)}")
+            raise Exception(f"Error al leer {ruta_archivo}: {str(e)}")
+        
+        logger.info(f"Archivo {nombre_archivo} leído exitosamente por bloques: {registros} registros")
+    
+    @staticmethod
+    def leer_encabezados(ruta_archivo: str, patron_hojas: Optional[str] = None) -> List[str]:
+        """
+        Lee solo los nombres de columnas de un archivo de entrada.
+        
+        No parsea los datos: en CSV lee la primera línea con el encoding
+        detectado, en Excel solo la primera fila de la primera hoja (o de las
+        hojas que coinciden con `patron_hojas`) y en Parquet/Feather el
+        esquema. Los nombres vacíos o repetidos se normalizan igual que en
+        pandas.
+        
+        Args:
+            ruta_archivo: Ruta del archivo
+            patron_hojas: En Excel, expresión regular de las hojas a consultar;
+                se retorna la unión de sus encabezados
+            
+        Returns:
+            Lista con los nombres de columnas en el orden del archivo
+            
+        Raises:
+            Exception: Si no se pueden leer los encabezados
+        """
+        tipo = FileProcessor.tipo_archivo(ruta_archivo)
+        
+        if tipo in ('xlsx', 'xls'):
+            if tipo == 'xlsx':
+                filas = FileProcessor._encabezados_xlsx(ruta_archivo, patron_hojas)
+            else:
+                filas = FileProcessor._encabezados_xls(ruta_archivo, patron_hojas)
+            columnas = []
+            for valores in filas:
+                for columna in FileProcessor._normalizar_encabezados(valores):
+                    if columna not in columnas:
+                        columnas.append(columna)
+            return columnas
+        elif tipo == 'csv':
+            valores = FileProcessor._encabezados_csv(ruta_archivo)
+        else:
+            # El esquema ya tiene nombres únicos
+            return FileProcessor._columnas_columnar(ruta_archivo)
+        
+        return FileProcessor._normalizar_encabezados(valores)
+    
+    @staticmethod
+    def _encabezados_csv(ruta_archivo: str) -> List[Any]:
+        """Primera fila no vacía de un CSV, con el encoding detectado."""
+        encoding = FileProcessor.detectar_encoding(ruta_archivo)
+        with io.TextIOWrapper(FileProcessor._abrir_binario(ruta_archivo), encoding=encoding, newline='',
+                              errors=FileProcessor.POLITICA_ERRORES_ENCODING) as archivo:
+            for fila in csv.reader(archivo):
+                if fila:
+                    return fila
+        raise ValueError("No columns to parse from file")
+    
+    @staticmethod
+    def _encabezados_xlsx(ruta_archivo: str, patron_hojas: Optional[str] = None) -> List[List[Any]]:
+        """Primera fila de cada hoja pedida, en modo solo lectura de openpyxl."""
+        import openpyxl
+        
+        filas = []
+        libro = openpyxl.load_workbook(ruta_archivo, read_only=True, data_only=True)
+        try:
+            if patron_hojas is None:
+                hojas = libro.worksheets[:1]
+            else:
+                hojas = [libro[nombre] for nombre in FileProcessor.filtrar_hojas(libro.sheetnames, patron_hojas)]
+            for hoja in hojas:
+                valores = list(next(hoja.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+                while valores and valores[-1] is None:
+                    valores.pop()
+                filas.append(valores)
+        finally:
+            libro.close()
+        return filas
+    
+    @staticmethod
+    def _encabezados_xls(ruta_archivo: str, patron_hojas: Optional[str] = None) -> List[List[Any]]:
+        """Primera fila de cada hoja pedida de un .xls, cargando solo esas hojas."""
+        import xlrd
+        
+        filas = []
+        libro = xlrd.open_workbook(ruta_archivo, on_demand=True)
+        try:
+            if patron_hojas is None:
+                indices = [0]
+            else:
+                nombres = FileProcessor.filtrar_hojas(libro.sheet_names(), patron_hojas)
+                indices = [libro.sheet_names().index(nombre) for nombre in nombres]
+            for indice in indices:
+                hoja = libro.sheet_by_index(indice)
+                filas.append(hoja.row_values(0) if hoja.nrows else [])
+        finally:
+            libro.release_resources()
+        return filas
+    
+    @staticmethod
+    def _normalizar_encabezados(valores: List[Any]) -> List[Any]:
+        """
+        Aplica las reglas de pandas a una fila de encabezados.
+        
+        Los vacíos pasan a 'Unnamed: i', los floats enteros a int y los
+        repetidos reciben sufijos '.1', '.2', ...
+        """
+        columnas = []
+        for i, valor in enumerate(valores):
+            if valor is None or valor == '':
+                valor = f"Unnamed: {i}"
+            elif isinstance(valor, float) and valor.is_integer():
+                valor = int(valor)
+            columnas.append(valor)
+        
+        # Mismo criterio que el parser de pandas: un sufijo nunca repite un
+        # nombre que ya aparece en el encabezado original
+        originales = set(columnas)
+        contador: Dict[Any, int] = {}
+        for i, original in enumerate(columnas):
+            columna = original
+            actual = contador.get(columna, 0)
+            while actual > 0:
+                contador[original] = actual + 1
+                columna = f"{original}.{actual}"
+                if columna in originales:
+                    actual += 1
+                else:
+                    actual = contador.get(columna, 0)
+            columnas[i] = columna
+            contador[columna] = actual + 1
+        
+        return columnas
+    
+    @staticmethod
+    def estimar_filas(ruta_archivo: str, patron_hojas: Optional[str] = None) -> int:
+        """
+        Estima las filas de datos de un archivo sin parsearlo.
+        
+        En CSV cuenta los saltos de línea (sobreestima si hay campos entre
+        comillas con saltos de línea o líneas vacías); en Excel usa la
+        dimensión declarada de cada hoja y en Parquet/Feather los metadatos,
+        que son exactos.
+        
+        Args:
+            ruta_archivo: Ruta del archivo
+            patron_hojas: En Excel, expresión regular de las hojas a contar
+                (None = solo la primera hoja)
+        
+        Returns:
+            Número estimado de filas (sin encabezado)
+        
+        Raises:
+            Exception: Si no se puede abrir el archivo
+        """
+        tipo = FileProcessor.tipo_archivo(ruta_archivo)
+        
+        if tipo == 'csv':
+            lineas = 0
+            ultimo = b'\n'
+            with FileProcessor._abrir_binario(ruta_archivo) as archivo:
+                for trozo in iter(lambda: archivo.read(1024 * 1024), b''):
+                    lineas += trozo.count(b'\n')
+                    ultimo = trozo[-1:]
+            if ultimo != b'\n':
+                lineas += 1
+            return max(lineas - 1, 0)
+        
+        if tipo == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(ruta_archivo).metadata.num_rows
+        
+        if tipo == 'feather':
+            import pyarrow.ipc
+            with pyarrow.ipc.open_file(ruta_archivo) as lector:
+                return lector.count_rows()
+        
+        if tipo == 'xlsx':
+            import openpyxl
+            libro = openpyxl.load_workbook(ruta_archivo, read_only=True)
+            try:
+                nombres = libro.sheetnames[:1] if patron_hojas is None else \
+                    FileProcessor.filtrar_hojas(libro.sheetnames, patron_hojas)
+                # max_row sale de la dimensión declarada (None si el libro no la tiene)
+                return sum(max((libro[nombre].max_row or 1) - 1, 0) for nombre in nombres)
+            finally:
+                libro.close()
+        
+        import xlrd
+        libro = xlrd.open_workbook(ruta_archivo, on_demand=True)
+        try:
+            nombres = libro.sheet_names()[:1] if patron_hojas is None else \
+                FileProcessor.filtrar_hojas(libro.sheet_names(), patron_hojas)
+            return sum(max(libro.sheet_by_name(nombre).nrows - 1, 0) for nombre in nombres)
+        finally:
+            libro.release_resources()
+    
+    @staticmethod
+    def _detectar_formato_fecha(valores: pd.Index) -> Optional[str]:
+        """
+        Detecta un formato de fecha explícito a partir de una muestra de valores.
+        
+        Args:
+            valores: Valores distintos (texto) de la columna de fecha
+            
+        Returns:
+            Formato strftime que interpreta toda la muestra, o None si ninguno lo hace
+        """
+        muestra = pd.Series(valores[:FileProcessor.TAMANO_MUESTRA_FECHAS]).dropna().astype(str)
+        if muestra.empty:
+            return None
+        
+        for formato in FileProcessor.FORMATOS_FECHA:
+            if pd.to_datetime(muestra, format=formato, errors='coerce').notna().all():
+                return formato
+        return None
+    
+    @staticmethod
+    def derivar_periodo(serie: pd.Series, formato_periodo: str = 'texto') -> pd.Series:
+        """
+        Convierte una columna de fechas en su periodo YYYYMM.
+        
+        Las fechas se parsean una sola vez por valor distinto (estas columnas
+        repiten pocos valores), con un formato explícito detectado sobre una
+        muestra y, para lo que no encaje, la inferencia con dayfirst=True de
+        siempre. El periodo se calcula como año*100+mes, sin strftime por fila.
+        
+        Args:
+            serie: Columna de fechas (texto o datetime)
+            formato_periodo: 'texto' ('YYYYMM', '' si no es fecha), 'entero'
+                (Int32, nulo si no es fecha) o 'categoria' (texto categórico)
+            
+        Returns:
+            Serie con el periodo, con el mismo índice que `serie`
+        """
+        if formato_periodo not in FORMATOS_PERIODO:
+            raise ValueError(f"Formato de periodo no soportado: {formato_periodo}")
+        
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            fechas = serie
+            periodos = (fechas.dt.year * 100 + fechas.dt.month).to_numpy(dtype='float64', na_value=np.nan)
+        else:
+            codigos, unicos = pd.factorize(serie)
+            
+            formato = None
+            if unicos.dtype == object or pd.api.types.is_string_dtype(unicos.dtype):
+                formato = FileProcessor._detectar_formato_fecha(unicos)
+            
+            if formato is not None:
+                fechas = pd.to_datetime(unicos, format=formato, errors='coerce')
+                pendientes = fechas.isna()
+                if pendientes.any():
+                    # Valores que no siguen el formato de la muestra
+                    fechas = fechas.where(~pendientes, pd.to_datetime(
+                        unicos.where(pendientes), errors='coerce', dayfirst=True
+                    ))
+            else:
+                fechas = pd.to_datetime(unicos, errors='coerce', dayfirst=True)
+            
+            fechas = pd.DatetimeIndex(fechas)
+            periodos_unicos = (fechas.year * 100 + fechas.month).to_numpy(dtype='float64', na_value=np.nan)
+            # El código -1 (valor nulo) toma el NaN agregado al final
+            periodos = np.append(periodos_unicos, np.nan)[codigos]
+        
+        if formato_periodo == 'entero':
+            return pd.Series(periodos, index=serie.index).astype('Int32')
+        
+        # Texto: se formatea una vez por periodo distinto
+        codigos, unicos = pd.factorize(periodos)
+        textos = [f"{int(periodo):06d}" for periodo in unicos]
+        if formato_periodo == 'categoria':
+            if (codigos == -1).any():
+                codigos = np.where(codigos == -1, len(textos), codigos)
+                textos.append("")
+            return pd.Series(pd.Categorical.from_codes(codigos, categories=textos), index=serie.index)
+        
+        textos = np.array(textos + [""], dtype=object)
+        return pd.Series(textos[codigos], index=serie.index, dtype=object)
+    
     @staticmethod
     def procesar_dataframe(df: pd.DataFrame, 
                         nombre_archivo: str,
                         columnas_a_ignorar: List[str],
                         columna_1_nombre: str = "PERIODO_L",
-                        columna_2_nombre: str = "PERIODO_A") -> pd.DataFrame:
+                        columna_2_nombre: str = "PERIODO_A",
+                        columnas_a_incluir: Optional[List[str]] = None,
+                        columnas_origen: Optional[List[str]] = None,
+                        formato_periodo: str = 'texto') -> pd.DataFrame:
         """
         Procesa un DataFrame agregando columnas y eliminando las especificadas.
 
@@ -77,23 +861,51 @@ class FileProcessor:
         * columna_1_nombre  <- FECHA_ASIG formateada 'YYYYMM'
         * columna_2_nombre  <- FECHA_LEG  formateada 'YYYYMM'
         Mantiene intactas las columnas originales.
+
+        Si se indica `columnas_a_incluir` solo se conservan esas columnas y se
+        ignora `columnas_a_ignorar`. Si el archivo se leyó con un
+        SelectorColumnas, `columnas_origen` es su encabezado completo: las
+        columnas que ya no se parsearon cuentan igual como eliminadas.
         """
-        df_procesado = df.copy()
+        if columnas_origen is None:
+            columnas_origen = list(df.columns)
+        presentes = set(columnas_origen)
+
+        for nombre in (columna_2_nombre, columna_1_nombre):
+            if nombre in df.columns:
+                raise ValueError(f"cannot insert {nombre}, already exists")
 
         # Formato 'YYYYMM' (sin guion). dayfirst=True para fechas tipo DD/MM/YYYY.
-        if "FECHA_ASIG" in df_procesado.columns:
-            asig_fmt = pd.to_datetime(
-                df_procesado["FECHA_ASIG"], errors="coerce", dayfirst=True
-            ).dt.strftime("%Y%m").fillna("")
-        else:
-            asig_fmt = ""  # se difunde como escalar
+        # Si falta la columna, el periodo queda vacío en todas las filas.
+        vacia = pd.Series(np.nan, index=df.index, dtype=object)
+        asig_fmt = FileProcessor.derivar_periodo(
+            df["FECHA_ASIG"] if "FECHA_ASIG" in df.columns else vacia, formato_periodo
+        )
+        leg_fmt = FileProcessor.derivar_periodo(
+            df["FECHA_LEG"] if "FECHA_LEG" in df.columns else vacia, formato_periodo
+        )
 
-        if "FECHA_LEG" in df_procesado.columns:
-            leg_fmt = pd.to_datetime(
-                df_procesado["FECHA_LEG"], errors="coerce", dayfirst=True
-            ).dt.strftime("%Y%m").fillna("")
-        else:
-            leg_fmt = ""
+        # Columnas a eliminar según el modo
+        if columnas_a_incluir is not None:
+            incluir = set(columnas_a_incluir)
+            for columna in columnas_a_incluir:
+                if columna not in presentes:
+                    logger.warning(f"Columna a incluir '{columna}' no encontrada en {nombre_archivo}")
+            columnas_a_ignorar = [c for c in columnas_origen if c not in incluir]
+
+        columnas_eliminadas = []
+        for columna in columnas_a_ignorar:
+            if columna in presentes:
+                columnas_eliminadas.append(columna)
+                logger.info(f"Columna '{columna}' eliminada de {nombre_archivo}")
+            else:
+                logger.warning(f"Columna '{columna}' no encontrada en {nombre_archivo}")
+
+        # Una sola proyección con las columnas finales (sin una copia por
+        # columna eliminada); el DataFrame recibido no se modifica.
+        eliminar = set(columnas_eliminadas)
+        posiciones = [i for i, columna in enumerate(df.columns) if columna not in eliminar]
+        df_procesado = df.iloc[:, posiciones]
 
         # Insertar al inicio con los nombres que pases (los puedes renombrar al llamar)
         df_procesado.insert(0, columna_2_nombre, asig_fmt)
@@ -104,30 +916,67 @@ class FileProcessor:
             f"'{columna_1_nombre}' (de FECHA_LEG) con formato 'YYYYMM'"
         )
 
-        # Eliminar columnas especificadas
-        columnas_eliminadas = []
-        for columna in columnas_a_ignorar:
-            if columna in df_procesado.columns:
-                df_procesado = df_procesado.drop(columns=[columna])
-                columnas_eliminadas.append(columna)
-                logger.info(f"Columna '{columna}' eliminada de {nombre_archivo}")
-            else:
-                logger.warning(f"Columna '{columna}' no encontrada en {nombre_archivo}")
-
         return df_procesado, columnas_eliminadas
 
 
     @staticmethod
-    def guardar_archivo(df: pd.DataFrame, 
+    def procesar_hojas(hojas: Dict[Optional[str], pd.DataFrame],
+                       nombre_archivo: str,
+                       columna_hoja_nombre: str = "HOJA_ORIGEN",
+                       columnas_origen: Optional[List[str]] = None,
+                       **opciones) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Procesa varias hojas de un archivo y las une en un solo DataFrame.
+        
+        Cada hoja pasa por procesar_dataframe y recibe la columna
+        `columna_hoja_nombre` con su nombre, justo después de las dos columnas
+        de periodo. Las hojas con clave None (archivos sin hojas, p. ej. CSV)
+        dejan esa columna vacía.
+        
+        Args:
+            hojas: Diccionario nombre de hoja -> DataFrame leído
+            nombre_archivo: Nombre del archivo de origen
+            columna_hoja_nombre: Nombre de la columna de procedencia
+            columnas_origen: Unión de los encabezados leídos (ver procesar_dataframe)
+            **opciones: Argumentos adicionales para procesar_dataframe
+            
+        Returns:
+            Tupla (DataFrame procesado, columnas eliminadas)
+        """
+        procesadas = []
+        columnas_eliminadas = []
+        for nombre_hoja, df in hojas.items():
+            df_procesado, eliminadas = FileProcessor.procesar_dataframe(
+                df=df, nombre_archivo=nombre_archivo, columnas_origen=columnas_origen, **opciones
+            )
+            if columna_hoja_nombre in df_procesado.columns:
+                raise ValueError(f"cannot insert {columna_hoja_nombre}, already exists")
+            df_procesado.insert(2, columna_hoja_nombre, nombre_hoja)
+            procesadas.append(df_procesado)
+            columnas_eliminadas.extend(col for col in eliminadas if col not in columnas_eliminadas)
+        
+        if len(procesadas) == 1:
+            return procesadas[0], columnas_eliminadas
+        return pd.concat(procesadas, ignore_index=True), columnas_eliminadas
+    
+    @staticmethod
+    def guardar_archivo(df: Union[pd.DataFrame, Iterable[pd.DataFrame]], 
                        ruta_salida: str, 
-                       formato: str = 'csv') -> bool:
+                       formato: str = 'csv',
+                       compresion: Optional[str] = None,
+                       filas_por_grupo: Optional[int] = None) -> bool:
         """
         Guarda un DataFrame en el formato especificado.
         
         Args:
-            df: DataFrame a guardar
+            df: DataFrame a guardar, o un iterable de bloques (CSV o xlsx)
             ruta_salida: Ruta donde guardar el archivo
-            formato: Formato de salida ('csv' o 'xlsx')
+            formato: Formato de salida ('csv', 'xlsx', 'parquet' o 'feather')
+            compresion: Compresión para parquet ('snappy', 'zstd', 'gzip',
+                'brotli', 'lz4' o 'none') y feather ('lz4', 'zstd' o
+                'uncompressed'); None usa la del formato
+            filas_por_grupo: Filas por row group (parquet) o por record batch
+                (feather); None usa el valor de pyarrow
             
         Returns:
             True si se guardó exitosamente, False en caso contrario
@@ -136,12 +985,45 @@ class FileProcessor:
             # Crear directorio si no existe
             os.makedirs(os.path.dirname(ruta_salida), exist_ok=True)
             
-            if formato.lower() == 'csv':
+            if not isinstance(df, pd.DataFrame):
+                if formato.lower() not in ESCRITORES:
+                    raise ValueError(f"La escritura por bloques solo admite {list(ESCRITORES)}, no {formato}")
+                escritor = ESCRITORES[formato.lower()](ruta_salida)
+                try:
+                    for bloque in df:
+                        escritor.escribir(bloque)
+                    escritor.cerrar()
+                except Exception:
+                    escritor.descartar()
+                    raise
+            elif formato.lower() == 'csv':
                 df.to_csv(ruta_salida, index=False, encoding='utf-8-sig')
                 logger.info(f"Archivo CSV guardado: {ruta_salida}")
             elif formato.lower() == 'xlsx':
-                df.to_excel(ruta_salida, index=False, engine='openpyxl')
-                logger.info(f"Archivo Excel guardado: {ruta_salida}")
+                # Fila a fila, sin construir el libro completo en memoria
+                escritor = EscritorXlsx(ruta_salida, list(df.columns))
+                try:
+                    escritor.escribir(df)
+                    escritor.cerrar()
+                except Exception:
+                    escritor.descartar()
+                    raise
+            elif formato.lower() == 'parquet':
+                sin_compresion = compresion in ('none', 'uncompressed')
+                opciones = {'compression': None if sin_compresion else (compresion or 'snappy')}
+                if filas_por_grupo:
+                    opciones['row_group_size'] = filas_por_grupo
+                FileProcessor._preparar_columnar(df).to_parquet(
+                    ruta_salida, engine='pyarrow', index=False, **opciones)
+                logger.info(f"Archivo Parquet guardado: {ruta_salida}")
+            elif formato.lower() == 'feather':
+                opciones = {}
+                if compresion:
+                    opciones['compression'] = compresion
+                if filas_por_grupo:
+                    opciones['chunksize'] = filas_por_grupo
+                FileProcessor._preparar_columnar(df).reset_index(drop=True).to_feather(ruta_salida, **opciones)
+                logger.info(f"Archivo Feather guardado: {ruta_salida}")
             else:
                 raise ValueError(f"Formato no soportado: {formato}")
             
@@ -150,6 +1032,27 @@ class FileProcessor:
         except Exception as e:
             logger.error(f"Error al guardar archivo {ruta_salida}: {str(e)}")
             return False
+    
+    @staticmethod
+    def _preparar_columnar(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adapta un DataFrame para escribirlo con Arrow (parquet/feather).
+        
+        Arrow exige un solo tipo por columna: las columnas object que mezclan
+        tipos (p. ej. números y texto de archivos distintos) se guardan como
+        texto, conservando los nulos.
+        """
+        mixtas = [col for col in df.columns
+                  if df[col].dtype == object
+                  and pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed')]
+        if not mixtas:
+            return df
+        
+        logger.info(f"Columnas con tipos mixtos guardadas como texto: {mixtas}")
+        df = df.copy(deep=False)
+        for col in mixtas:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        return df
 
 
 class FileManager:
@@ -161,13 +1064,13 @@ class FileManager:
         Crea un nombre único para el archivo de salida.
         
         Args:
-            formato: Formato del archivo ('csv' o 'xlsx')
+            formato: Formato del archivo (ver FORMATOS_SALIDA)
             
         Returns:
             Nombre del archivo con timestamp
         """
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        extension = 'csv' if formato.lower() == 'csv' else 'xlsx'
+        extension = formato.lower() if formato.lower() in FORMATOS_SALIDA else 'xlsx'
         return f"consolidado_{timestamp}.{extension}"
     
     @staticmethod
@@ -187,6 +1090,21 @@ class FileManager:
         
         return ruta_generados
     
+    @staticmethod
+    def obtener_ruta_cache() -> str:
+        """
+        Obtiene la ruta del directorio de la caché de resultados por archivo.
+        
+        Returns:
+            Ruta absoluta del directorio cache
+        """
+        directorio_actual = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ruta_cache = os.path.join(directorio_actual, 'cache')
+        
+        os.makedirs(ruta_cache, exist_ok=True)
+        
+        return ruta_cache
+    
     @staticmethod
     def validar_archivos(archivos: List[str]) -> Dict[str, Any]:
         """
@@ -204,7 +1122,7 @@ class FileManager:
         for archivo in archivos:
             if os.path.exists(archivo) and os.path.isfile(archivo):
                 nombre = os.path.basename(archivo).lower()
-                if nombre.endswith(('.csv', '.xlsx', '.xls')):
+                if nombre.endswith(EXTENSIONES_SOPORTADAS):
                     archivos_validos.append(archivo)
                 else:
                     archivos_invalidos.append(f"{archivo} (formato no soportado)")
@@ -219,6 +1137,187 @@ class FileManager:
         }
 
 
+class ResumenIncremental:
+    """
+    Acumula el resumen del consolidado bloque a bloque.
+    
+    Produce el mismo diccionario que DataAnalyzer.generar_resumen sin
+    necesitar el DataFrame consolidado completo en memoria.
+    """
+    
+    def __init__(self, columnas: List[str] = None):
+        self.total_registros = 0
+        self.columnas: List[str] = list(columnas) if columnas else []
+        self.tipos_datos: Dict[str, Any] = {}
+    
+    def agregar(self, df: pd.DataFrame):
+        """
+        Suma un bloque al resumen.
+        
+        Args:
+            df: Bloque ya procesado
+        """
+        self._agregar_tipos(df.dtypes.items())
+        self.total_registros += len(df)
+    
+    def combinar(self, otro: 'ResumenIncremental'):
+        """
+        Suma al resumen lo acumulado por otro resumen (p. ej. el de un archivo).
+        
+        Args:
+            otro: Resumen parcial a incorporar
+        """
+        self._agregar_tipos(otro.tipos_datos.items())
+        self.total_registros += otro.total_registros
+        for columna in otro.columnas:
+            if columna not in self.columnas:
+                self.columnas.append(columna)
+    
+    def _agregar_tipos(self, tipos):
+        """Registra los tipos de datos vistos, degradando a object si difieren."""
+        for columna, tipo in tipos:
+            if columna not in self.columnas:
+                self.columnas.append(columna)
+            previo = self.tipos_datos.get(columna)
+            if previo is None:
+                self.tipos_datos[columna] = tipo
+            elif previo != tipo:
+                # Tipos distintos entre bloques: al concatenar quedarían como object
+                self.tipos_datos[columna] = np.dtype('O')
+    
+    def generar(self, archivos_procesados: List[str]) -> Dict[str, Any]:
+        """
+        Genera el resumen acumulado.
+        
+        Args:
+            archivos_procesados: Lista de archivos procesados
+            
+        Returns:
+            Diccionario con el resumen (mismas claves que generar_resumen)
+        """
+        return {
+            'total_registros': self.total_registros,
+            'total_columnas': len(self.columnas),
+            'archivos_procesados': len(archivos_procesados),
+            'nombres_archivos': [os.path.basename(archivo) for archivo in archivos_procesados],
+            'columnas': list(self.columnas),
+            'tipos_datos': {columna: self.tipos_datos.get(columna, np.dtype('O')) for columna in self.columnas}
+        }
+
+
+class DeduplicadorIncremental:
+    """
+    Elimina filas duplicadas entre archivos y bloques sin el consolidado en memoria.
+    
+    Guarda solo un hash de 64 bits por fila distinta (ver
+    DataAnalyzer.hash_filas), en un array de NumPy ordenado. Conserva la
+    primera aparición de cada fila, igual que drop_duplicates() sobre el
+    consolidado completo.
+    
+    Con verificacion_exacta, además guarda los valores de cada fila distinta
+    para no descartar filas diferentes que comparten hash; la memoria pasa a
+    ser proporcional a los datos únicos.
+    """
+    
+    def __init__(self, columnas: List[str], verificacion_exacta: bool = False):
+        """
+        Args:
+            columnas: Columnas que definen un duplicado. Las que falten en un
+                bloque se consideran nulas, como al concatenar.
+            verificacion_exacta: Comparar valores cuando coinciden los hashes
+        """
+        self.columnas = list(columnas)
+        self.verificacion_exacta = verificacion_exacta
+        self.duplicados_eliminados = 0
+        self.colisiones = 0
+        self._vistos = np.empty(0, dtype=np.uint64)
+        self._filas: Dict[int, List[tuple]] = {}
+        self._registro: List[int] = []
+        self._control = None
+    
+    @property
+    def filas_distintas(self) -> int:
+        """Número de filas distintas vistas hasta ahora."""
+        return len(self._vistos) + self.colisiones
+    
+    def filtrar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Quita de un bloque las filas ya vistas (en este u otros bloques).
+        
+        Args:
+            df: Bloque ya procesado
+            
+        Returns:
+            Bloque sin duplicados, con el índice reiniciado si se quitaron filas
+        """
+        if len(df) == 0:
+            return df
+        
+        datos = df.reindex(columns=self.columnas)
+        hashes = DataAnalyzer.hash_filas(datos)
+        
+        posiciones = np.searchsorted(self._vistos, hashes)
+        vistos = np.zeros(len(hashes), dtype=bool)
+        dentro = posiciones < len(self._vistos)
+        vistos[dentro] = self._vistos[posiciones[dentro]] == hashes[dentro]
+        repetidos = pd.Series(hashes, copy=False).duplicated().to_numpy()
+        candidatos = vistos | repetidos
+        
+        if self.verificacion_exacta:
+            conservar = self._verificar(datos, hashes, candidatos)
+        else:
+            conservar = ~candidatos
+        
+        nuevos = np.unique(hashes[conservar & ~vistos])
+        self._vistos = np.insert(self._vistos, np.searchsorted(self._vistos, nuevos), nuevos)
+        
+        eliminados = int(len(df) - conservar.sum())
+        if eliminados == 0:
+            return df
+        self.duplicados_eliminados += eliminados
+        return df[conservar].reset_index(drop=True)
+    
+    def _verificar(self, datos: pd.DataFrame, hashes: np.ndarray, candidatos: np.ndarray) -> np.ndarray:
+        """Decide qué filas conservar comparando valores de las filas con hash repetido."""
+        filas = list(datos.astype(object).where(datos.notna(), None).itertuples(index=False, name=None))
+        conservar = ~candidatos
+        
+        # Las filas con hash nuevo y único en el bloque son distintas seguro
+        for i in np.flatnonzero(conservar):
+            self._filas[int(hashes[i])] = [filas[i]]
+            self._registro.append(int(hashes[i]))
+        
+        for i in np.flatnonzero(candidatos):
+            clave = int(hashes[i])
+            previas = self._filas.setdefault(clave, [])
+            if filas[i] in previas:
+                continue
+            if previas:
+                self.colisiones += 1
+            previas.append(filas[i])
+            self._registro.append(clave)
+            conservar[i] = True
+        
+        return conservar
+    
+    def punto_control(self):
+        """Marca el estado actual para poder deshacer los bloques siguientes."""
+        self._control = (self._vistos, self.duplicados_eliminados, self.colisiones)
+        self._registro = []
+    
+    def revertir(self):
+        """Olvida las filas vistas desde el último punto de control."""
+        if self._control is None:
+            return
+        self._vistos, self.duplicados_eliminados, self.colisiones = self._control
+        for clave in reversed(self._registro):
+            previas = self._filas[clave]
+            previas.pop()
+            if not previas:
+                del self._filas[clave]
+        self._registro = []
+
+
 class DataAnalyzer:
     """Clase para analizar datos del consolidado."""
     
@@ -243,22 +1342,163 @@ class DataAnalyzer:
             'tipos_datos': df.dtypes.to_dict()
         }
     
+    # Máximo de índices de ejemplo que se devuelven en el análisis de duplicados
+    MAX_INDICES_DUPLICADOS = 1000
+    
     @staticmethod
-    def detectar_duplicados(df: pd.DataFrame) -> Dict[str, Any]:
+    def hash_filas(df: pd.DataFrame, columnas_clave: Optional[List[str]] = None) -> np.ndarray:
         """
-        Detecta duplicados en el DataFrame.
+        Calcula un hash de 64 bits por fila, vectorizado.
+        
+        Dos filas con los mismos valores en las columnas clave obtienen el
+        mismo hash aunque vengan de archivos o bloques distintos: los números
+        se comparan por valor (1 y 1.0 son iguales, como en drop_duplicates)
+        y todos los nulos son equivalentes. El índice no participa.
         
         Args:
             df: DataFrame a analizar
+            columnas_clave: Columnas que definen la fila (None = todas)
             
         Returns:
-            Diccionario con información de duplicados
+            Array uint64 con un hash por fila
         """
-        duplicados = df.duplicated()
-        total_duplicados = duplicados.sum()
+        columnas = list(df.columns) if columnas_clave is None else list(columnas_clave)
+        resultado = np.zeros(len(df), dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for columna in columnas:
+                resultado ^= DataAnalyzer._hash_columna(df[columna])
+                resultado *= np.uint64(0x100000001B3)
+        return resultado
+    
+    @staticmethod
+    def _hash_columna(serie: pd.Series) -> np.ndarray:
+        """Hash por valor de una columna, independiente de su dtype numérico."""
+        nulos = serie.isna().to_numpy()
         
-        return {
+        if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            hashes = DataAnalyzer._hash_numerico(serie, nulos)
+        else:
+            # Se hashean solo los valores distintos: el texto (sobre todo el de
+            # Arrow) no se convierte a un objeto de Python por fila
+            codigos, unicos = pd.factorize(serie)
+            hashes = np.zeros(len(serie), dtype=np.uint64)
+            if len(unicos):
+                valores = pd.Series(unicos, copy=False).to_numpy(dtype=object)
+                if isinstance(serie.dtype, pd.StringDtype):
+                    hashes = pd.util.hash_array(valores)[codigos]
+                else:
+                    hashes = DataAnalyzer._hash_objetos(valores)[codigos]
+        
+        hashes[nulos] = np.uint64(0x9E3779B97F4A7C15)
+        return hashes
+    
+    @staticmethod
+    def _hash_numerico(serie: pd.Series, nulos: np.ndarray) -> np.ndarray:
+        """Hash de valores numéricos; 1 y 1.0 tienen el mismo hash."""
+        if pd.api.types.is_integer_dtype(serie) and not nulos.any():
+            bits = serie.to_numpy(dtype=np.int64).view(np.uint64)
+        else:
+            valores = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+            bits = valores.view(np.uint64).copy()
+            # Los floats con valor entero se representan como el entero
+            enteros = np.isfinite(valores) & (valores == np.trunc(valores)) & (np.abs(valores) < 2.0 ** 63)
+            bits[enteros] = valores[enteros].astype(np.int64).view(np.uint64)
+        return pd.util.hash_array(bits)
+    
+    @staticmethod
+    def _hash_objetos(valores: np.ndarray) -> np.ndarray:
+        """
+        Hash de valores de Python, con la misma igualdad que drop_duplicates().
+        
+        hash_array compara la representación en texto, así que 1 y '1'
+        coincidirían. Los números (y booleanos, True == 1) van por el hash
+        numérico, y el resto de los valores que no son texto combina su hash
+        con el de su tipo.
+        """
+        hashes = pd.util.hash_array(valores)
+        tipos = np.array([type(valor).__name__ for valor in valores], dtype=object)
+        numericos = np.array([isinstance(valor, (int, float, np.number, np.bool_)) for valor in valores], dtype=bool)
+        if numericos.any():
+            serie = pd.Series(valores[numericos], dtype=object).infer_objects()
+            if pd.api.types.is_bool_dtype(serie):
+                serie = serie.astype(np.int64)
+            elif not pd.api.types.is_numeric_dtype(serie):
+                # Mezcla de booleanos y números
+                serie = serie.astype(np.float64)
+            hashes[numericos] = DataAnalyzer._hash_numerico(serie, np.zeros(len(serie), dtype=bool))
+        otros = ~numericos & (tipos != 'str')
+        if otros.any():
+            with np.errstate(over='ignore'):
+                hashes[otros] ^= pd.util.hash_array(tipos[otros]) * np.uint64(0x100000001B3)
+        return hashes
+    
+    @staticmethod
+    def analizar_duplicados(df: pd.DataFrame, 
+                            columnas_clave: Optional[List[str]] = None,
+                            eliminar: bool = False,
+                            max_indices: Optional[int] = MAX_INDICES_DUPLICADOS,
+                            verificacion_exacta: bool = False) -> Dict[str, Any]:
+        """
+        Detecta (y opcionalmente elimina) duplicados en una sola pasada.
+        
+        Cada fila se resume en un hash de 64 bits (ver hash_filas) y la marca
+        de duplicado se calcula sobre esos hashes, sin volver a comparar todas
+        las columnas. Se conserva la primera aparición, como drop_duplicates().
+        
+        Args:
+            df: DataFrame a analizar
+            columnas_clave: Columnas que definen un duplicado (None = todas)
+            eliminar: Si retornar también el DataFrame sin duplicados
+            max_indices: Máximo de índices de ejemplo a retornar (None = todos)
+            verificacion_exacta: Comparar los valores en lugar de los hashes
+                (descarta colisiones de hash; más lento)
+            
+        Returns:
+            Diccionario con información de duplicados y, si eliminar es True,
+            el DataFrame resultante en la clave 'dataframe'
+        """
+        if columnas_clave is not None:
+            faltantes = [col for col in columnas_clave if col not in df.columns]
+            if faltantes:
+                raise ValueError(f"Columnas clave no encontradas: {faltantes}")
+        
+        if verificacion_exacta:
+            duplicados = df.duplicated(subset=columnas_clave).to_numpy()
+        else:
+            hashes = DataAnalyzer.hash_filas(df, columnas_clave)
+            duplicados = pd.Series(hashes, copy=False).duplicated().to_numpy()
+        total_duplicados = int(duplicados.sum())
+        
+        posiciones = np.flatnonzero(duplicados)
+        if max_indices is not None:
+            posiciones = posiciones[:max_indices]
+        
+        resultado = {
             'tiene_duplicados': total_duplicados > 0,
-            'total_duplicados': int(total_duplicados),
-            'indices_duplicados': df[duplicados].index.tolist() if total_duplicados > 0 else []
+            'total_duplicados': total_duplicados,
+            'indices_duplicados': df.index[posiciones].tolist(),
+            'indices_truncados': len(posiciones) < total_duplicados,
+            'columnas_clave': list(columnas_clave) if columnas_clave is not None else None
         }
+        
+        if eliminar:
+            resultado['dataframe'] = df[~duplicados].reset_index(drop=True) if total_duplicados else df
+        
+        return resultado
+    
+    @staticmethod
+    def detectar_duplicados(df: pd.DataFrame, 
+                            columnas_clave: Optional[List[str]] = None,
+                            max_indices: Optional[int] = MAX_INDICES_DUPLICADOS) -> Dict[str, Any]:
+        """
+        Detecta duplicados en el DataFrame.
+        
+        Args:
+            df: DataFrame a analizar
+            columnas_clave: Columnas que definen un duplicado (None = todas)
+            max_indices: Máximo de índices de ejemplo a retornar (None = todos)
+            
+        Returns:
+            Diccionario con información de duplicados
+        """
+        return DataAnalyzer.analizar_duplicados(df, columnas_clave, max_indices=max_indices)
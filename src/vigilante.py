@@ -0,0 +1,550 @@
+"""
+Módulo de vigilancia de carpetas para el consolidador de archivos.
+Consolida de forma incremental los archivos que llegan a una carpeta de
+entrada, procesando solo los nuevos o modificados.
+"""
+
+import csv
+import importlib.util
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .utils import EXTENSIONES_SOPORTADAS
+
+logger = logging.getLogger(__name__)
+
+# Extensiones que se consolidan al aparecer en la carpeta: las mismas que
+# admite FileProcessor (CSV y comprimidos, Excel, Parquet y Feather)
+EXTENSIONES_VIGILADAS = EXTENSIONES_SOPORTADAS
+
+# Cómo se incorpora cada lote a la salida
+MODOS_VIGILANCIA = ('reconstruir', 'anexar')
+
+# Con eventos del sistema (watchdog), cada cuánto se vuelve a recorrer la
+# carpeta completa por si se perdió alguno (desbordes de inotify, carpetas de red)
+INTERVALO_REESCANEO = 60.0
+
+# Cambiar si cambia el formato del diario de estado
+VERSION_DIARIO = 1
+
+Firma = Tuple[int, int]
+
+
+def _firma(ruta: str) -> Optional[Firma]:
+    """Tamaño y fecha de modificación (ns) de un archivo, o None si no existe."""
+    try:
+        stat = os.stat(ruta)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _escribir_sincronizado(ruta: str, contenido: str):
+    """Reemplaza un archivo de texto de forma atómica y lo baja a disco."""
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        archivo.write(contenido)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+
+
+class DiarioVigilancia:
+    """
+    Diario de estado de la vigilancia: qué archivos ya están en la salida.
+
+    Se guarda como JSON reemplazando el archivo de forma atómica (temporal,
+    fsync y os.replace), así que una caída deja la versión anterior o la
+    nueva, nunca una mezcla. En modo 'anexar', antes de escribir un lote se
+    anota el tamaño de la salida; si el proceso se interrumpe a mitad del
+    lote, al reiniciar la salida se recorta a ese tamaño y el lote se repite.
+    """
+
+    def __init__(self, ruta: str, ruta_salida: str):
+        """
+        Args:
+            ruta: Archivo JSON del diario
+            ruta_salida: Salida consolidada a la que corresponde el diario
+        """
+        self.ruta = ruta
+        self.ruta_salida = ruta_salida
+        self.archivos: Dict[str, Dict[str, Any]] = {}
+        self.lote_pendiente: Optional[Dict[str, Any]] = None
+        self._cargar()
+
+    def _cargar(self):
+        """Lee el diario; si es ilegible o de otra salida, se empieza de cero."""
+        if not os.path.exists(self.ruta):
+            return
+        try:
+            with open(self.ruta, encoding='utf-8') as archivo:
+                datos = json.load(archivo)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Diario de vigilancia ilegible, se reinicia: {e}")
+            return
+        if datos.get('version') != VERSION_DIARIO or datos.get('salida') != self.ruta_salida:
+            logger.warning(f"El diario {self.ruta} corresponde a otra salida o versión; se reinicia")
+            return
+        self.archivos = datos.get('archivos', {})
+        self.lote_pendiente = datos.get('lote_pendiente')
+
+    def guardar(self):
+        """Escribe el diario en disco."""
+        _escribir_sincronizado(self.ruta, json.dumps({
+            'version': VERSION_DIARIO,
+            'salida': self.ruta_salida,
+            'archivos': self.archivos,
+            'lote_pendiente': self.lote_pendiente,
+        }, ensure_ascii=False, indent=2))
+
+    def cambiado(self, ruta: str, firma: Firma) -> bool:
+        """Si el archivo es nuevo o cambió desde que se registró."""
+        entrada = self.archivos.get(ruta)
+        return entrada is None or (entrada['tamano'], entrada['mtime_ns']) != tuple(firma)
+
+    def registrar(self, ruta: str, firma: Firma, error: Optional[str] = None):
+        """Anota un archivo como incorporado (o como fallido, con `error`)."""
+        entrada = {
+            'tamano': firma[0],
+            'mtime_ns': firma[1],
+            'procesado': datetime.now().isoformat(timespec='seconds'),
+        }
+        if error:
+            entrada['error'] = error
+        # Un archivo modificado conserva su posición en el orden de llegada
+        self.archivos[ruta] = entrada
+
+    def consolidados(self) -> List[str]:
+        """Archivos incorporados sin error, en orden de llegada."""
+        return [ruta for ruta, entrada in self.archivos.items() if not entrada.get('error')]
+
+
+class VigilanteCarpeta:
+    """
+    Vigila una carpeta y consolida los archivos a medida que llegan.
+
+    Los cambios se detectan con eventos del sistema de archivos (inotify,
+    FSEvents...) si watchdog está instalado, y si no recorriendo la carpeta
+    cada `intervalo` segundos. En ambos casos un archivo solo se procesa
+    cuando su tamaño y fecha de modificación no cambian durante
+    `espera_estable` segundos, para no leer archivos que se están copiando.
+
+    Cada lote de archivos listos se consolida con la configuración del
+    Consolidator recibido:
+
+    - 'reconstruir': se consolida la lista completa de archivos registrados
+      en un temporal que reemplaza a la salida de forma atómica. Se activa la
+      caché de resultados, así que solo se leen los archivos nuevos o
+      modificados; los eliminados de la carpeta salen del consolidado.
+    - 'anexar' (solo CSV): se procesan únicamente los archivos del lote y sus
+      filas se agregan al final de la salida. Si un archivo ya incorporado se
+      modifica o el lote trae columnas nuevas, se reconstruye la salida. La
+      eliminación de duplicados se aplica dentro de cada lote.
+
+    El diario de estado (DiarioVigilancia) permite reiniciar el proceso sin
+    repetir ni perder archivos.
+    """
+
+    def __init__(self,
+                 consolidador,
+                 carpeta: str,
+                 ruta_salida: str,
+                 formato: str = 'csv',
+                 modo: str = 'reconstruir',
+                 recursivo: bool = False,
+                 intervalo: float = 2.0,
+                 espera_estable: float = 5.0,
+                 ruta_estado: str = None,
+                 usar_eventos: bool = None,
+                 al_consolidar: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Args:
+            consolidador: Consolidator ya configurado
+            carpeta: Carpeta a vigilar
+            ruta_salida: Archivo consolidado
+            formato: Formato de salida ('csv', 'xlsx', 'parquet' o 'feather')
+            modo: 'reconstruir' o 'anexar' (ver MODOS_VIGILANCIA)
+            recursivo: Vigilar también las subcarpetas
+            intervalo: Segundos entre revisiones de la carpeta
+            espera_estable: Segundos que un archivo debe quedar sin cambios
+                antes de procesarlo
+            ruta_estado: Diario de estado (por defecto, junto a la salida con
+                extensión .vigilancia.json)
+            usar_eventos: Usar watchdog (None: si está instalado)
+            al_consolidar: Función que recibe el resultado de cada lote
+        """
+        if modo not in MODOS_VIGILANCIA:
+            raise ValueError(f"Modo de vigilancia no válido: {modo}. Use {list(MODOS_VIGILANCIA)}")
+        if modo == 'anexar' and formato.lower() != 'csv':
+            raise ValueError("El modo 'anexar' solo admite salida CSV")
+        if not os.path.isdir(carpeta):
+            raise ValueError(f"La carpeta a vigilar no existe: {carpeta}")
+
+        self.consolidador = consolidador
+        self.carpeta = os.path.abspath(carpeta)
+        self.ruta_salida = os.path.abspath(ruta_salida)
+        self.formato = formato.lower()
+        self.modo = modo
+        self.recursivo = recursivo
+        self.intervalo = intervalo
+        self.espera_estable = espera_estable
+        self.al_consolidar = al_consolidar
+        if usar_eventos is None:
+            usar_eventos = importlib.util.find_spec('watchdog') is not None
+        self.usar_eventos = usar_eventos
+
+        raiz, extension = os.path.splitext(self.ruta_salida)
+        self.ruta_temporal = f"{raiz}.tmp{extension}"
+        self.diario = DiarioVigilancia(os.path.abspath(ruta_estado or f"{raiz}.vigilancia.json"),
+                                       self.ruta_salida)
+        # Archivos propios que pueden quedar dentro de la carpeta vigilada
+        self._excluidos = {self.ruta_salida, self.ruta_temporal,
+                           f"{self.ruta_salida}.parcial", f"{self.ruta_temporal}.parcial"}
+
+        # La caché guarda Feather: si está dentro de la carpeta no debe consolidarse
+        self._directorio_cache = os.path.abspath(
+            consolidador.directorio_cache or consolidador.file_manager.obtener_ruta_cache())
+
+        if modo == 'reconstruir' and not consolidador.usar_cache:
+            logger.info("El modo 'reconstruir' activa la caché de resultados para leer solo los archivos nuevos")
+            consolidador.usar_cache = True
+
+        # ruta -> (firma observada, momento desde el que no cambia)
+        self._candidatos: Dict[str, Tuple[Firma, float]] = {}
+        self._eventos: set = set()
+        self._bloqueo = threading.Lock()
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._ultimo_escaneo: Optional[float] = None
+        self.lotes = 0
+
+        self._recuperar()
+
+    def _recuperar(self):
+        """Deshace lo que haya dejado a medias una ejecución interrumpida."""
+        if os.path.exists(self.ruta_temporal):
+            os.remove(self.ruta_temporal)
+        pendiente = self.diario.lote_pendiente
+        if pendiente is None:
+            return
+        bytes_salida = pendiente.get('bytes_salida')
+        logger.warning(f"Lote interrumpido de {len(pendiente.get('archivos', []))} archivos; se repetirá")
+        if bytes_salida is None:
+            if os.path.exists(self.ruta_salida):
+                os.remove(self.ruta_salida)
+        elif os.path.exists(self.ruta_salida) and os.path.getsize(self.ruta_salida) > bytes_salida:
+            with open(self.ruta_salida, 'r+b') as archivo:
+                archivo.truncate(bytes_salida)
+        self.diario.lote_pendiente = None
+        self.diario.guardar()
+
+    def _vigilable(self, ruta: str) -> bool:
+        """Si una ruta es un archivo de entrada (y no la salida ni un temporal)."""
+        nombre = os.path.basename(ruta)
+        if nombre.startswith(('.', '~$')) or ruta in self._excluidos:
+            return False
+        if os.path.commonpath([ruta, self._directorio_cache]) == self._directorio_cache:
+            return False
+        return nombre.lower().endswith(EXTENSIONES_VIGILADAS)
+
+    def escanear(self) -> List[str]:
+        """Archivos de entrada presentes en la carpeta."""
+        if self.recursivo:
+            rutas = [os.path.join(directorio, nombre)
+                     for directorio, _, nombres in os.walk(self.carpeta) for nombre in nombres]
+        else:
+            with os.scandir(self.carpeta) as entradas:
+                rutas = [entrada.path for entrada in entradas if entrada.is_file()]
+        return [ruta for ruta in rutas if self._vigilable(ruta)]
+
+    def notificar(self, ruta: str):
+        """Marca una ruta para revisarla en el próximo ciclo (desde otro hilo)."""
+        ruta = os.path.abspath(ruta)
+        if not self._vigilable(ruta):
+            return
+        with self._bloqueo:
+            self._eventos.add(ruta)
+        self._despertar.set()
+
+    def _rutas_a_revisar(self) -> set:
+        """Rutas que pueden haber cambiado desde el ciclo anterior."""
+        with self._bloqueo:
+            rutas, self._eventos = self._eventos, set()
+        rutas.update(self._candidatos)
+        ahora = time.monotonic()
+        if (not self.usar_eventos or self._ultimo_escaneo is None
+                or ahora - self._ultimo_escaneo >= INTERVALO_REESCANEO):
+            rutas.update(self.escanear())
+            rutas.update(self.diario.archivos)
+            self._ultimo_escaneo = ahora
+        return rutas
+
+    def revisar(self) -> Tuple[List[str], List[str]]:
+        """
+        Un ciclo de detección con espera de estabilidad.
+
+        Returns:
+            Tupla (archivos listos para consolidar, archivos registrados que
+            ya no existen)
+        """
+        ahora = time.monotonic()
+        listos, eliminados = [], []
+        for ruta in self._rutas_a_revisar():
+            firma = _firma(ruta)
+            if firma is None:
+                self._candidatos.pop(ruta, None)
+                if ruta in self.diario.archivos:
+                    eliminados.append(ruta)
+                continue
+            if not self.diario.cambiado(ruta, firma):
+                self._candidatos.pop(ruta, None)
+                continue
+            previo = self._candidatos.get(ruta)
+            if previo is None or previo[0] != firma:
+                # Nuevo o todavía cambiando: se vuelve a esperar
+                self._candidatos[ruta] = (firma, ahora)
+            elif ahora - previo[1] >= self.espera_estable:
+                listos.append(ruta)
+        return self._ordenar(listos), sorted(eliminados)
+
+    @staticmethod
+    def _ordenar(rutas: List[str]) -> List[str]:
+        """Ordena por fecha de modificación (orden de llegada) y luego por nombre."""
+        return sorted(rutas, key=lambda ruta: ((_firma(ruta) or (0, 0))[1], ruta))
+
+    def consolidar(self, archivos: List[str], eliminados: List[str] = ()) -> Optional[Dict[str, Any]]:
+        """
+        Incorpora un lote a la salida y lo registra en el diario.
+
+        Args:
+            archivos: Archivos nuevos o modificados
+            eliminados: Archivos registrados que ya no existen
+
+        Returns:
+            Resumen del lote, o None si no había nada que hacer
+        """
+        for ruta in eliminados:
+            logger.info(f"Archivo eliminado de la carpeta: {ruta}")
+            del self.diario.archivos[ruta]
+        if not archivos and not (eliminados and self.modo == 'reconstruir'):
+            if eliminados:
+                self.diario.guardar()
+            return None
+
+        firmas = {ruta: _firma(ruta) for ruta in archivos}
+        firmas = {ruta: firma for ruta, firma in firmas.items() if firma is not None}
+        inicio = time.perf_counter()
+
+        modificados = [ruta for ruta in firmas if ruta in self.diario.archivos
+                       and not self.diario.archivos[ruta].get('error')]
+        reconstruir = modificados or not self.diario.consolidados() or not os.path.exists(self.ruta_salida)
+        if self.modo == 'anexar' and reconstruir:
+            if modificados:
+                logger.info(f"Archivos ya consolidados que cambiaron: {modificados}; se reconstruye la salida")
+            resultado = self._reconstruir(firmas)
+        elif self.modo == 'anexar':
+            resultado = self._anexar(firmas)
+        else:
+            resultado = self._reconstruir(firmas)
+
+        self.lotes += 1
+        resumen = {
+            'exito': resultado['exito'],
+            'lote': self.lotes,
+            'modo': resultado['modo'],
+            'archivos': list(firmas),
+            'eliminados': list(eliminados),
+            'archivos_con_errores': resultado.get('archivos_con_errores', []),
+            'filas_agregadas': resultado.get('filas_agregadas'),
+            'filas_salida': resultado.get('filas_salida'),
+            'ruta_salida': self.ruta_salida,
+            'segundos': round(time.perf_counter() - inicio, 3),
+        }
+        if not resultado['exito']:
+            resumen['error'] = resultado.get('error')
+        logger.info(f"Lote {self.lotes} ({resultado['modo']}): {len(firmas)} archivos, "
+                    f"{len(resumen['archivos_con_errores'])} con errores")
+        if self.al_consolidar is not None:
+            self.al_consolidar(resumen)
+        return resumen
+
+    def _registrar_lote(self, firmas: Dict[str, Firma], resultado: Dict[str, Any]):
+        """Anota en el diario los archivos del lote según el resultado."""
+        procesados = set(resultado.get('archivos_procesados', [])) if resultado.get('exito') else set()
+        errores = resultado.get('archivos_con_errores', [])
+        for ruta, firma in firmas.items():
+            error = None
+            if ruta not in procesados:
+                error = next((mensaje for mensaje in errores if ruta in mensaje),
+                             resultado.get('error') or 'No se pudo procesar')
+            self.diario.registrar(ruta, firma, error)
+
+    def _reconstruir(self, firmas: Dict[str, Firma]) -> Dict[str, Any]:
+        """Consolida todos los archivos registrados más el lote y reemplaza la salida."""
+        archivos = [ruta for ruta in self.diario.consolidados() if ruta not in firmas and os.path.exists(ruta)]
+        archivos.extend(firmas)
+        if not archivos:
+            # Sin archivos que consolidar, la salida deja de existir
+            if os.path.exists(self.ruta_salida):
+                os.remove(self.ruta_salida)
+            self.diario.guardar()
+            return {'exito': True, 'modo': 'reconstruir', 'filas_salida': 0}
+
+        resultado = self.consolidador.procesar_y_guardar(archivos, formato=self.formato,
+                                                         ruta_salida=self.ruta_temporal)
+        guardado = resultado.get('exito') and resultado.get('guardado', {}).get('exito')
+        if guardado:
+            os.replace(self.ruta_temporal, self.ruta_salida)
+        else:
+            if os.path.exists(self.ruta_temporal):
+                os.remove(self.ruta_temporal)
+            logger.error(f"No se pudo reconstruir {self.ruta_salida}: "
+                         f"{resultado.get('error') or resultado.get('guardado', {}).get('error')}")
+            resultado = {**resultado, 'exito': False}
+
+        self._registrar_lote(firmas, resultado)
+        self.diario.guardar()
+        return {
+            'exito': bool(guardado),
+            'modo': 'reconstruir',
+            'error': resultado.get('error'),
+            'archivos_con_errores': resultado.get('archivos_con_errores', []),
+            'filas_salida': resultado.get('resumen', {}).get('total_registros') if guardado else None,
+        }
+
+    def _encabezado_salida(self) -> Optional[List[str]]:
+        """Columnas del CSV de salida, o None si no existe."""
+        if not os.path.exists(self.ruta_salida) or os.path.getsize(self.ruta_salida) == 0:
+            return None
+        with open(self.ruta_salida, encoding='utf-8-sig', newline='') as archivo:
+            return next(csv.reader(archivo), None)
+
+    def _anexar(self, firmas: Dict[str, Firma]) -> Dict[str, Any]:
+        """Procesa solo el lote y agrega sus filas al final del CSV de salida."""
+        resultado = self.consolidador.procesar_archivos(list(firmas))
+        if not resultado['exito']:
+            self._registrar_lote(firmas, resultado)
+            self.diario.guardar()
+            return {'exito': False, 'modo': 'anexar', 'error': resultado.get('error'),
+                    'archivos_con_errores': resultado.get('archivos_con_errores', [])}
+
+        df = resultado['dataframe']
+        columnas = self._encabezado_salida()
+        if columnas is not None:
+            nuevas = [columna for columna in df.columns if columna not in columnas]
+            if nuevas:
+                logger.info(f"El lote trae columnas nuevas {nuevas}; se reconstruye la salida")
+                return self._reconstruir(firmas)
+            df = df.reindex(columns=columnas)
+
+        bytes_salida = os.path.getsize(self.ruta_salida) if columnas is not None else None
+        self.diario.lote_pendiente = {'archivos': list(firmas), 'bytes_salida': bytes_salida}
+        self.diario.guardar()
+
+        # Con encabezado y BOM solo si el archivo es nuevo, como guardar_archivo
+        encoding = 'utf-8' if columnas is not None else 'utf-8-sig'
+        with open(self.ruta_salida, 'a', encoding=encoding, newline='') as archivo:
+            df.to_csv(archivo, index=False, header=columnas is None)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+
+        self.diario.lote_pendiente = None
+        self._registrar_lote(firmas, resultado)
+        self.diario.guardar()
+        return {
+            'exito': True,
+            'modo': 'anexar',
+            'archivos_con_errores': resultado.get('archivos_con_errores', []),
+            'filas_agregadas': len(df),
+        }
+
+    def ciclo(self) -> Optional[Dict[str, Any]]:
+        """Revisa la carpeta y consolida lo que esté listo."""
+        listos, eliminados = self.revisar()
+        for ruta in listos:
+            self._candidatos.pop(ruta, None)
+        if not listos and not eliminados:
+            return None
+        return self.consolidar(listos, eliminados)
+
+    def procesar_existentes(self) -> Optional[Dict[str, Any]]:
+        """
+        Consolida en una sola pasada lo que ya está en la carpeta.
+
+        Sin observar la carpeta en el tiempo, un archivo se considera estable
+        si su fecha de modificación tiene al menos `espera_estable` segundos.
+        """
+        listos, eliminados = [], [ruta for ruta in self.diario.archivos if not os.path.exists(ruta)]
+        ahora = time.time()
+        for ruta in self.escanear():
+            firma = _firma(ruta)
+            if firma is None or not self.diario.cambiado(ruta, firma):
+                continue
+            if ahora - firma[1] / 1e9 >= self.espera_estable:
+                listos.append(ruta)
+            else:
+                logger.info(f"Archivo modificado hace menos de {self.espera_estable} s, se omite: {ruta}")
+        if not listos and not eliminados:
+            return None
+        return self.consolidar(self._ordenar(listos), sorted(eliminados))
+
+    def _iniciar_observador(self):
+        """Inicia el observador de watchdog que llama a notificar()."""
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        vigilante = self
+
+        class _Manejador(FileSystemEventHandler):
+            def on_any_event(self, evento):
+                if evento.is_directory:
+                    return
+                for ruta in (evento.src_path, getattr(evento, 'dest_path', None)):
+                    if ruta:
+                        vigilante.notificar(os.fsdecode(ruta))
+
+        observador = Observer()
+        observador.schedule(_Manejador(), self.carpeta, recursive=self.recursivo)
+        observador.start()
+        logger.info(f"Vigilando {self.carpeta} con eventos del sistema de archivos")
+        return observador
+
+    def ejecutar(self, max_ciclos: int = None):
+        """
+        Vigila la carpeta hasta que se llame a detener().
+
+        Args:
+            max_ciclos: Terminar después de este número de ciclos (opcional)
+        """
+        self._detener.clear()
+        observador = self._iniciar_observador() if self.usar_eventos else None
+        if observador is None:
+            logger.info(f"Vigilando {self.carpeta} cada {self.intervalo} s")
+        ciclos = 0
+        try:
+            while not self._detener.is_set():
+                self._despertar.clear()
+                self.ciclo()
+                ciclos += 1
+                if max_ciclos is not None and ciclos >= max_ciclos:
+                    break
+                # Con eventos y sin archivos en espera, se duerme hasta el próximo evento
+                espera = self.intervalo
+                if observador is not None and not self._candidatos:
+                    espera = INTERVALO_REESCANEO
+                self._despertar.wait(espera)
+        finally:
+            if observador is not None:
+                observador.stop()
+                observador.join()
+        logger.info(f"Vigilancia terminada: {self.lotes} lotes consolidados")
+
+    def detener(self):
+        """Termina ejecutar() al final del ciclo en curso (seguro desde otro hilo o señal)."""
+        self._detener.set()
+        self._despertar.set()